@@ -21,7 +21,8 @@ done
 
 echo "=== Truncating retrieval.documents and retrieval.chunks ==="
 docker compose exec -T postgres psql -U "$POSTGRES_USER" -d "$POSTGRES_DB" \
-  -c "TRUNCATE retrieval.documents CASCADE;"
+  -c "TRUNCATE retrieval.documents CASCADE;" \
+  -c "UPDATE retrieval.kb_generation SET generation = generation + 1, updated_at = now();"
 
 echo "=== Building ingest image (ensures UPSERT pipeline is used) ==="
 docker compose --profile tools build ingest
@@ -15,3 +15,9 @@ class IngestSettings(BaseAppSettings):
     embedder_backend: str = "sentence_transformers"  # sentence_transformers | mock
     embedder_model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
     kb_default_version: str = "6.1 (latest)"
+    # Per-version partial HNSW index; must match RETRIEVAL_VECTOR_DISTANCE (empty = do not create)
+    vector_distance: str = "l2"
+    hnsw_m: int = 16
+    hnsw_ef_construction: int = 64
+    vector_quantization: str = "none"  # none | halfvec | binary; must match RETRIEVAL_VECTOR_QUANTIZATION
+    pca_dim: int = 0  # >0: fit PCA per version to this dim (= RETRIEVAL_PCA_DIM, migration 012); 0 = off
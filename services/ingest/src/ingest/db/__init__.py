@@ -1,3 +1,3 @@
-from ingest.db.models import Base, Chunk, Document
+from ingest.db.models import Base, Chunk, Document, Section
 
-__all__ = ["Base", "Chunk", "Document"]
+__all__ = ["Base", "Chunk", "Document", "Section"]
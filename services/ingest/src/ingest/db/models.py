@@ -2,15 +2,20 @@
 from datetime import datetime
 from uuid import uuid4
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy import DateTime, FetchedValue, ForeignKey, Integer, String, Text
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, TSVECTOR, UUID
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 try:
-    from pgvector.sqlalchemy import Vector
+    from pgvector.sqlalchemy import BIT, HALFVEC, Vector
     VECTOR_TYPE = Vector(384)
+    HALFVEC_TYPE = HALFVEC(384)
+    PCA_VECTOR_TYPE = Vector()  # dimension = INGEST_PCA_DIM, fixed by migration 012
 except ImportError:
+    from sqlalchemy.dialects.postgresql import BIT
     VECTOR_TYPE = None
+    HALFVEC_TYPE = None
+    PCA_VECTOR_TYPE = None
 
 
 class Base(DeclarativeBase):
@@ -26,6 +31,24 @@ class Document(Base):
     path: Mapped[str] = mapped_column(String(1024), nullable=False)
     meta: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
     version: Mapped[str] = mapped_column(Text, nullable=False)
+    # Mean-pooled chunk embeddings (migration 013)
+    embedding: Mapped[list[float] | None] = mapped_column(VECTOR_TYPE, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+
+
+class Section(Base):
+    __tablename__ = "sections"
+    __table_args__ = {"schema": "retrieval"}
+
+    id: Mapped[uuid4] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    document_id: Mapped[uuid4] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("retrieval.documents.id", ondelete="CASCADE"), nullable=False
+    )
+    version: Mapped[str] = mapped_column(Text, nullable=False)
+    section_key: Mapped[str] = mapped_column(Text, nullable=False)
+    section_title: Mapped[str | None] = mapped_column(Text, nullable=True)
+    chunk_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    embedding: Mapped[list[float] | None] = mapped_column(VECTOR_TYPE, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
 
 
@@ -38,10 +61,29 @@ class Chunk(Base):
         UUID(as_uuid=True), ForeignKey("retrieval.documents.id"), nullable=False
     )
     text: Mapped[str] = mapped_column(Text, nullable=False)
+    # Copy of documents.version (migration 010): vector search filters chunks without the join
+    version: Mapped[str] = mapped_column(Text, nullable=False)
+    section_id: Mapped[uuid4] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("retrieval.sections.id", ondelete="SET NULL"), nullable=True
+    )
     index_in_doc: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     section_title: Mapped[str | None] = mapped_column(Text, nullable=True)
     document_title: Mapped[str | None] = mapped_column(String(512), nullable=True)
     position: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     token_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     embedding: Mapped[list[float] | None] = mapped_column(VECTOR_TYPE, nullable=True)
+    # halfvec / binary-quantized copies of embedding (migration 011)
+    embedding_half: Mapped[list[float] | None] = mapped_column(HALFVEC_TYPE, nullable=True)
+    embedding_bin: Mapped[str | None] = mapped_column(BIT(384), nullable=True)
+    # PCA-reduced embedding (migration 012), written when INGEST_PCA_DIM > 0
+    embedding_pca: Mapped[list[float] | None] = mapped_column(PCA_VECTOR_TYPE, nullable=True)
+    # shared.tokenize.term_frequencies of text (migration 008)
+    lexical_terms: Mapped[list[str] | None] = mapped_column(ARRAY(Text), nullable=True)
+    lexical_tf: Mapped[list[int] | None] = mapped_column(ARRAY(Integer), nullable=True)
+    lexical_len: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # Generated column owned by migration 006 (dictionary: RETRIEVAL_TEXT_SEARCH_CONFIG at
+    # migration time); FetchedValue only tells the ORM never to write it
+    tsv: Mapped[str | None] = mapped_column(
+        TSVECTOR, FetchedValue(), server_onupdate=FetchedValue(), nullable=True
+    )
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
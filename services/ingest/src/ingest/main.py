@@ -18,6 +18,11 @@ def main() -> None:
             embedder_backend=settings.embedder_backend,
             embedder_model_name=settings.embedder_model_name,
             embedding_dim=settings.embedding_dim,
+            vector_distance=settings.vector_distance,
+            hnsw_m=settings.hnsw_m,
+            hnsw_ef_construction=settings.hnsw_ef_construction,
+            vector_quantization=settings.vector_quantization,
+            pca_dim=settings.pca_dim,
         )
     )
     print(f"Ingested {n} chunks", file=sys.stderr)
@@ -5,12 +5,16 @@ import sys
 from pathlib import Path
 from uuid import uuid4
 
+import numpy as np
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from ingest.chunking import ParagraphChunker
 from ingest.loaders import PDFLoader, TextLoader
+from shared.ann_index import version_index_ddl
 from shared.embedder import Embedder
+from shared.pca import PcaProjection
+from shared.tokenize import term_frequencies
 
 MIN_CHUNK_LENGTH = 150
 
@@ -50,6 +54,159 @@ def merge_short_chunks(chunks: list[str]) -> list[str]:
     return result
 
 
+def group_sections(chunks: list[str]) -> list[tuple[str, str | None, list[int]]]:
+    """(section key, section title, chunk positions) per markdown section, in document order.
+
+    Every chunk with a header (its section_title) starts a new section, even when an earlier
+    section has the same title; a chunk without a header continues the previous section.
+    The key is the position of the section's first chunk ('0' may be text before any header).
+    """
+    sections: list[tuple[str, str | None, list[int]]] = []
+    for i, chunk in enumerate(chunks):
+        title = extract_section_title(chunk)
+        if title is not None or not sections:
+            sections.append((str(i), title, []))
+        sections[-1][2].append(i)
+    return sections
+
+
+_SECTION_UPSERT = text("""
+    INSERT INTO retrieval.sections
+        (id, document_id, version, section_key, section_title, chunk_count, embedding, created_at)
+    VALUES
+        (CAST(:id AS uuid), CAST(:doc_id AS uuid), :version, :key, :title, :chunk_count, CAST(:emb AS vector), now())
+    ON CONFLICT (document_id, section_key) DO UPDATE SET
+        version = EXCLUDED.version, section_title = EXCLUDED.section_title,
+        chunk_count = EXCLUDED.chunk_count, embedding = EXCLUDED.embedding
+    RETURNING id
+""")
+
+
+async def write_sections(
+    session: AsyncSession,
+    doc_id: str,
+    version: str,
+    chunks: list[str],
+    embeddings: list[list[float] | None],
+) -> int:
+    """Upsert the document's sections with mean-pooled embeddings, link chunks, set documents.embedding.
+
+    First stage of hierarchical retrieval (migration 013). Returns the number of sections.
+    """
+    sections = group_sections(chunks)
+    for key, title, positions in sections:
+        vectors = [embeddings[i] for i in positions if i < len(embeddings) and embeddings[i] is not None]
+        row = await session.execute(
+            _SECTION_UPSERT,
+            {
+                "id": str(uuid4()),
+                "doc_id": doc_id,
+                "version": version,
+                "key": key,
+                "title": title,
+                "chunk_count": len(positions),
+                "emb": _vector_literal(np.mean(vectors, axis=0)) if vectors else None,
+            },
+        )
+        await session.execute(
+            text(
+                "UPDATE retrieval.chunks SET section_id = CAST(:section_id AS uuid) "
+                "WHERE document_id = CAST(:doc_id AS uuid) AND position = ANY(CAST(:positions AS integer[]))"
+            ),
+            {"section_id": str(row.scalar_one()), "doc_id": doc_id, "positions": positions},
+        )
+    await session.execute(
+        text(
+            "DELETE FROM retrieval.sections "
+            "WHERE document_id = CAST(:doc_id AS uuid) AND NOT (section_key = ANY(CAST(:keys AS text[])))"
+        ),
+        {"doc_id": doc_id, "keys": [key for key, _, _ in sections]},
+    )
+    vectors = [emb for emb in embeddings if emb is not None]
+    await session.execute(
+        text("UPDATE retrieval.documents SET embedding = CAST(:emb AS vector) WHERE id = CAST(:doc_id AS uuid)"),
+        {"emb": _vector_literal(np.mean(vectors, axis=0)) if vectors else None, "doc_id": doc_id},
+    )
+    return len(sections)
+
+
+def _vector_literal(values) -> str:
+    return "[" + ",".join(str(float(x)) for x in values) + "]"
+
+
+_PCA_COLUMN_TYPE = text("""
+    SELECT format_type(atttypid, atttypmod) FROM pg_attribute
+    WHERE attrelid = 'retrieval.chunks'::regclass AND attname = 'embedding_pca' AND NOT attisdropped
+""")
+
+
+def _log_error(event: str, message: str) -> None:
+    try:
+        import structlog
+        structlog.get_logger().error(event, msg=message)
+    except Exception:
+        print(f"[ingest] ERROR: {message}", file=sys.stderr)
+
+
+async def write_pca(session: AsyncSession, version: str, pca_dim: int) -> PcaProjection | None:
+    """Fit PCA on all embedded chunks of the version, store it and the reduced vectors (migration 012).
+
+    The training set is read back from retrieval.chunks, so chunks not touched by this run
+    (failed files, earlier runs from another path) get reduced vectors too. pca_dim <= 0, or
+    a pca_dim that does not match the chunks.embedding_pca column (RETRIEVAL_PCA_DIM of
+    migration 012), removes the version's projection: retrieval then uses the full vectors.
+    """
+    if pca_dim > 0:
+        column_type = (await session.execute(_PCA_COLUMN_TYPE)).scalar()
+        if column_type != f"vector({pca_dim})":
+            _log_error(
+                "ingest_pca_dim_mismatch",
+                f"INGEST_PCA_DIM={pca_dim} does not match retrieval.chunks.embedding_pca "
+                f"({column_type or 'missing, apply migration 012'}); PCA skipped for {version!r}. "
+                "Set INGEST_PCA_DIM to RETRIEVAL_PCA_DIM used by migration 012.",
+            )
+            pca_dim = 0
+    await session.execute(
+        text("UPDATE retrieval.chunks SET embedding_pca = NULL WHERE version = :version AND embedding_pca IS NOT NULL"),
+        {"version": version},
+    )
+    await session.execute(text("DELETE FROM retrieval.pca_projections WHERE version = :version"), {"version": version})
+    if pca_dim <= 0:
+        return None
+    result = await session.execute(
+        text(
+            "SELECT id, CAST(embedding AS text) FROM retrieval.chunks "
+            "WHERE version = :version AND embedding IS NOT NULL ORDER BY id"
+        ),
+        {"version": version},
+    )
+    embeddings = [(str(row[0]), json.loads(row[1])) for row in result.all()]
+    if len(embeddings) <= pca_dim:
+        return None
+    projection = PcaProjection.fit([emb for _, emb in embeddings], pca_dim)
+    await session.execute(
+        text("""
+            INSERT INTO retrieval.pca_projections
+                (version, dim_in, dim_out, mean, components, explained_variance, created_at)
+            VALUES (:version, :dim_in, :dim_out, CAST(:mean AS real[]), CAST(:components AS real[]), :ev, now())
+        """),
+        {
+            "version": version,
+            "dim_in": projection.dim_in,
+            "dim_out": projection.dim_out,
+            "mean": projection.mean.tolist(),
+            "components": projection.components.ravel().tolist(),
+            "ev": projection.explained_variance,
+        },
+    )
+    reduced = projection.transform([emb for _, emb in embeddings])
+    await session.execute(
+        text("UPDATE retrieval.chunks SET embedding_pca = CAST(:emb AS vector) WHERE id = CAST(:id AS uuid)"),
+        [{"emb": _vector_literal(vec), "id": cid} for (cid, _), vec in zip(embeddings, reduced)],
+    )
+    return projection
+
+
 def collect_files(knowledge_path: str) -> list[Path]:
     path = Path(knowledge_path)
     if not path.exists():
@@ -78,6 +235,11 @@ async def run_ingest(
     embedder_backend: str = "sentence_transformers",
     embedder_model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
     embedding_dim: int = 384,
+    vector_distance: str = "l2",
+    hnsw_m: int = 16,
+    hnsw_ef_construction: int = 64,
+    vector_quantization: str = "none",
+    pca_dim: int = 0,
 ) -> int:
     engine = create_async_engine(database_url, echo=False)
     session_factory = async_sessionmaker(
@@ -125,19 +287,29 @@ async def run_ingest(
     """)
     _CHUNK_UPSERT = text("""
         INSERT INTO retrieval.chunks
-            (id, document_id, text, index_in_doc, section_title, document_title, position, token_count, created_at)
+            (id, document_id, version, text, index_in_doc, section_title, document_title, position, token_count,
+             lexical_terms, lexical_tf, lexical_len, created_at)
         VALUES
-            (CAST(:id AS uuid), CAST(:doc_id AS uuid), :text, :idx, :section_title, :doc_title, :position, :token_count, now())
+            (CAST(:id AS uuid), CAST(:doc_id AS uuid), :version, :text, :idx, :section_title, :doc_title, :position, :token_count,
+             CAST(:lexical_terms AS text[]), CAST(:lexical_tf AS integer[]), :lexical_len, now())
         ON CONFLICT (document_id, position) DO UPDATE SET
-            text = EXCLUDED.text, index_in_doc = EXCLUDED.index_in_doc,
+            version = EXCLUDED.version, text = EXCLUDED.text, index_in_doc = EXCLUDED.index_in_doc,
             section_title = EXCLUDED.section_title, document_title = EXCLUDED.document_title,
-            token_count = EXCLUDED.token_count
+            token_count = EXCLUDED.token_count, lexical_terms = EXCLUDED.lexical_terms,
+            lexical_tf = EXCLUDED.lexical_tf, lexical_len = EXCLUDED.lexical_len
         RETURNING id
     """)
     _STALE_CLEANUP = text("""
         DELETE FROM retrieval.chunks
         WHERE document_id = CAST(:doc_id AS uuid) AND position >= :max_position
     """)
+    # Bump KB generation so retrieval caches of this version are invalidated
+    _GENERATION_BUMP = text("""
+        INSERT INTO retrieval.kb_generation (version, generation, updated_at)
+        VALUES (:version, 1, now())
+        ON CONFLICT (version) DO UPDATE SET
+            generation = retrieval.kb_generation.generation + 1, updated_at = now()
+    """)
 
     async with session_factory() as session:
         for path in files:
@@ -175,18 +347,23 @@ async def run_ingest(
                 section_title = extract_section_title(chunk_text)
                 document_title = source
                 token_count = max(0, len(chunk_text) // 4)
+                lexical_terms, lexical_tf, lexical_len = term_frequencies(chunk_text)
                 # UPSERT chunk
                 crow = await session.execute(
                     _CHUNK_UPSERT,
                     {
                         "id": str(uuid4()),
                         "doc_id": doc_id,
+                        "version": kb_default_version,
                         "text": chunk_text,
                         "idx": i,
                         "section_title": section_title,
                         "doc_title": document_title,
                         "position": i,
                         "token_count": token_count,
+                        "lexical_terms": lexical_terms,
+                        "lexical_tf": lexical_tf,
+                        "lexical_len": lexical_len,
                     },
                 )
                 chunk_id = str(crow.scalar_one())
@@ -205,13 +382,40 @@ async def run_ingest(
                     emb_str = "[" + ",".join(str(x) for x in emb) + "]"
                     result = await session.execute(
                         text(
-                            "UPDATE retrieval.chunks SET embedding = CAST(:emb AS vector) WHERE id = CAST(:id AS uuid)"
+                            "UPDATE retrieval.chunks SET embedding = CAST(:emb AS vector), "
+                            "embedding_half = CAST(:emb AS halfvec), "
+                            "embedding_bin = binary_quantize(CAST(:emb AS vector)) "
+                            "WHERE id = CAST(:id AS uuid)"
                         ),
                         {"emb": emb_str, "id": cid},
                     )
                     num_emb += result.rowcount
             if num_emb > 0:
                 print(f"[ingest] Updated {num_emb} chunk embeddings via SQL", file=sys.stderr)
+            await write_sections(session, doc_id, kb_default_version, chunks_text, list(embeddings))
+            await session.commit()
+
+        projection = await write_pca(session, kb_default_version, pca_dim)
+        if projection is not None:
+            print(
+                f"[ingest] PCA {projection.dim_in}->{projection.dim_out}, "
+                f"explained variance {projection.explained_variance:.3f}",
+                file=sys.stderr,
+            )
+        await session.execute(_GENERATION_BUMP, {"version": kb_default_version})
+        await session.commit()
+
+        # Partial ANN index of this version (no-op once it exists; migration 010 covers older versions)
+        if vector_distance:
+            representations = [vector_quantization] + (["pca"] if projection is not None else [])
+            for representation in representations:
+                await session.execute(
+                    text(
+                        version_index_ddl(
+                            kb_default_version, vector_distance, hnsw_m, hnsw_ef_construction, representation
+                        )
+                    )
+                )
             await session.commit()
     await engine.dispose()
 
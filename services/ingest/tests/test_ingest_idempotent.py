@@ -36,3 +36,32 @@ def test_pipeline_cleans_stale_chunks() -> None:
     assert "position >= :max_position" in src or "position >=" in src, (
         "Pipeline must delete stale chunks with position >= new chunk count"
     )
+
+
+def test_pipeline_bumps_kb_generation() -> None:
+    """Verify the pipeline bumps retrieval.kb_generation so retrieval caches are invalidated."""
+    src = _extract_sql_from_source()
+    assert "retrieval.kb_generation" in src, "run_ingest must bump retrieval.kb_generation"
+    assert "generation + 1" in src
+
+
+def test_pipeline_writes_lexical_features() -> None:
+    """Chunks carry precomputed lexical terms so retrieval does not re-tokenize text per query."""
+    src = _extract_sql_from_source()
+    assert "term_frequencies(chunk_text)" in src
+    for column in ("lexical_terms", "lexical_tf", "lexical_len"):
+        assert f"{column} = EXCLUDED.{column}" in src, f"chunk upsert must refresh {column}"
+
+
+def test_pipeline_denormalizes_version_and_indexes_it() -> None:
+    """Chunks carry their document's version and each version gets its own partial ANN index."""
+    src = _extract_sql_from_source()
+    assert "version = EXCLUDED.version" in src
+    assert re.search(r"version_index_ddl\(\s*kb_default_version", src)
+
+
+def test_pipeline_writes_quantized_embeddings() -> None:
+    """halfvec and binary copies are written with the full-precision vector."""
+    src = _extract_sql_from_source()
+    assert "embedding_half = CAST(:emb AS halfvec)" in src
+    assert "embedding_bin = binary_quantize(" in src
@@ -0,0 +1,71 @@
+"""Test that ingest stores a per-version PCA projection and the reduced vectors."""
+import json
+
+import numpy as np
+import pytest
+
+from ingest.pipeline import write_pca
+
+
+class FakeResult:
+    def __init__(self, rows: list[tuple]) -> None:
+        self._rows = rows
+
+    def all(self) -> list[tuple]:
+        return self._rows
+
+    def scalar(self):
+        return self._rows[0][0] if self._rows else None
+
+
+class RecordingSession:
+    """chunks.embedding_pca is vector(column_dim); the version holds `chunks` (id, embedding)."""
+
+    def __init__(self, chunks: list[tuple[str, list[float]]], column_dim: int | None = 3) -> None:
+        self.chunks = chunks
+        self.column_dim = column_dim
+        self.calls: list[tuple[str, object]] = []
+
+    async def execute(self, stmt, params=None):
+        sql = str(stmt)
+        self.calls.append((sql, params))
+        if "pg_attribute" in sql:
+            return FakeResult([(f"vector({self.column_dim})",)] if self.column_dim else [])
+        if sql.startswith("SELECT id"):
+            return FakeResult([(cid, json.dumps(emb)) for cid, emb in self.chunks])
+        return FakeResult([])
+
+
+def _chunks(n: int) -> list[tuple[str, list[float]]]:
+    rng = np.random.default_rng(0)
+    return [(f"id{i}", rng.normal(size=8).tolist()) for i in range(n)]
+
+
+@pytest.mark.asyncio
+async def test_write_pca_fits_all_embedded_chunks_of_the_version() -> None:
+    session = RecordingSession(_chunks(20))
+    projection = await write_pca(session, "6.1", pca_dim=3)
+    assert projection is not None and projection.dim_out == 3
+    sql = [s for s, _ in session.calls]
+    assert "pg_attribute" in sql[0]
+    assert "embedding_pca = NULL" in sql[1] and "DELETE FROM retrieval.pca_projections" in sql[2]
+    assert "embedding IS NOT NULL" in sql[3] and session.calls[3][1] == {"version": "6.1"}
+    assert "INSERT INTO retrieval.pca_projections" in sql[4]
+    updates = session.calls[5][1]
+    assert len(updates) == 20 and updates[0]["emb"].count(",") == 2
+
+
+@pytest.mark.asyncio
+async def test_write_pca_disabled_only_clears_the_version() -> None:
+    session = RecordingSession(_chunks(20))
+    assert await write_pca(session, "6.1", pca_dim=0) is None
+    assert len(session.calls) == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("column_dim", [64, None])
+async def test_write_pca_dim_mismatch_clears_instead_of_failing(column_dim) -> None:
+    session = RecordingSession(_chunks(20), column_dim=column_dim)
+    assert await write_pca(session, "6.1", pca_dim=3) is None
+    sql = [s for s, _ in session.calls]
+    assert len(sql) == 3 and "embedding_pca = NULL" in sql[1]
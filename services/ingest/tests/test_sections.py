@@ -0,0 +1,41 @@
+"""Tests for section grouping and section / document embeddings written by ingest."""
+import pytest
+
+from ingest.pipeline import group_sections, write_sections
+
+
+class _Result:
+    def scalar_one(self) -> str:
+        return "00000000-0000-0000-0000-000000000001"
+
+
+class RecordingSession:
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, dict]] = []
+
+    async def execute(self, stmt, params=None) -> _Result:
+        self.calls.append((str(stmt), params))
+        return _Result()
+
+
+def test_chunks_without_header_continue_the_previous_section() -> None:
+    chunks = ["Введение без заголовка", "# Установка\nшаг 1", "шаг 2", "## Ошибки\nкод 0x204", "# Установка\nещё"]
+    assert group_sections(chunks) == [
+        ("0", None, [0]),
+        ("1", "Установка", [1, 2]),
+        ("3", "Ошибки", [3]),
+        ("4", "Установка", [4]),  # same title, separate section
+    ]
+
+
+@pytest.mark.asyncio
+async def test_write_sections_mean_pools_and_links_chunks() -> None:
+    session = RecordingSession()
+    n = await write_sections(session, "doc", "6.1", ["# A\nx", "y", "# B\nz"], [[1.0, 0.0], [3.0, 2.0], None])
+    assert n == 2
+    upserts = [p for sql, p in session.calls if "INSERT INTO retrieval.sections" in sql]
+    assert [(p["key"], p["chunk_count"], p["emb"]) for p in upserts] == [("0", 2, "[2.0,1.0]"), ("2", 1, None)]
+    links = [p["positions"] for sql, p in session.calls if "SET section_id" in sql]
+    assert links == [[0, 1], [2]]
+    assert "DELETE FROM retrieval.sections" in session.calls[-2][0]
+    assert session.calls[-1][1]["emb"] == "[2.0,1.0]"
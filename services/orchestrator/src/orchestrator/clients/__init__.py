@@ -1,4 +1,4 @@
 from orchestrator.clients.llm_client import LLMClient
-from orchestrator.clients.retrieval_client import RetrievalClient, RetrievalResultItem
+from orchestrator.clients.retrieval_client import ChunkTextCache, RetrievalClient, RetrievalResultItem
 
-__all__ = ["LLMClient", "RetrievalClient", "RetrievalResultItem"]
+__all__ = ["ChunkTextCache", "LLMClient", "RetrievalClient", "RetrievalResultItem"]
@@ -1,4 +1,5 @@
 """HTTP client for retrieval service."""
+from collections import OrderedDict
 from dataclasses import dataclass
 
 import httpx
@@ -13,34 +14,150 @@ class RetrievalResultItem:
     document_title: str | None = None
     section_title: str | None = None
     position: int = 0
+    neighbor_of: str | None = None  # adjacent chunk added by retrieval expand_neighbors
+    version: str | None = None  # KB version of the chunk (may be a fallback of the requested one)
+
+
+@dataclass(frozen=True)
+class ChunkText:
+    text: str
+    source: str
+    document_title: str | None = None
+    section_title: str | None = None
+
+
+class ChunkTextCache:
+    """LRU of chunk texts by chunk id, valid for one retrieval kb_generation.
+
+    A response with another generation (any version re-ingested) clears the cache.
+    """
+
+    def __init__(self, max_entries: int = 2048) -> None:
+        self._max_entries = max(0, max_entries)
+        self._entries: OrderedDict[str, ChunkText] = OrderedDict()
+        self._generation: int | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_entries > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def sync(self, generation: int) -> None:
+        if generation != self._generation:
+            self._entries.clear()
+            self._generation = generation
+
+    def get(self, chunk_id: str) -> ChunkText | None:
+        entry = self._entries.get(chunk_id)
+        if entry is not None:
+            self._entries.move_to_end(chunk_id)
+        return entry
+
+    def put(self, chunk_id: str, entry: ChunkText) -> None:
+        self._entries[chunk_id] = entry
+        self._entries.move_to_end(chunk_id)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
 
 
 class RetrievalClient:
-    def __init__(self, base_url: str, timeout: float = 30.0) -> None:
+    """With text_cache_size > 0, searches ask for ids and scores only (fields="ids") and
+    chunk texts come from a local ChunkTextCache; missing ones are fetched in one GET /chunks.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float = 30.0,
+        text_cache_size: int = 0,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
         self._base_url = base_url.rstrip("/")
         self._timeout = timeout
+        self._text_cache = ChunkTextCache(text_cache_size)
+        self._transport = transport
+
+    def _client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(timeout=self._timeout, transport=self._transport)
 
     async def search(
-        self, query: str, top_k: int = 5, version: str | None = None
+        self, query: str, top_k: int = 5, version: str | None = None, expand_neighbors: int = 0
     ) -> list[RetrievalResultItem]:
         url = f"{self._base_url}/search"
         payload: dict = {"query": query, "top_k": top_k}
         if version is not None:
             payload["version"] = version
-        async with httpx.AsyncClient(timeout=self._timeout) as client:
+        if expand_neighbors > 0:
+            payload["expand_neighbors"] = expand_neighbors
+        compact = self._text_cache.enabled
+        if compact:
+            payload["fields"] = "ids"
+        async with self._client() as client:
             resp = await client.post(url, json=payload)
             resp.raise_for_status()
             data = resp.json()
-        results = data.get("results", [])
-        return [
-            RetrievalResultItem(
-                chunk_id=r["chunk_id"],
-                text=r["text"],
-                source=r["source"],
-                score=float(r.get("score", 0)),
-                document_title=r.get("document_title"),
-                section_title=r.get("section_title"),
-                position=int(r.get("position", 0)),
+            results = data.get("results", [])
+            texts: dict[str, ChunkText] = {}
+            if compact:
+                texts = await self._texts(client, [r["chunk_id"] for r in results], data)
+        items = []
+        for r in results:
+            if compact:
+                chunk = texts.get(r["chunk_id"])
+                if chunk is None:
+                    continue  # deleted between /search and /chunks
+            else:
+                chunk = ChunkText(r["text"], r["source"], r.get("document_title"), r.get("section_title"))
+            items.append(
+                RetrievalResultItem(
+                    chunk_id=r["chunk_id"],
+                    text=chunk.text,
+                    source=chunk.source,
+                    score=float(r.get("score", 0)),
+                    document_title=chunk.document_title,
+                    section_title=chunk.section_title,
+                    position=int(r.get("position", 0)),
+                    neighbor_of=r.get("neighbor_of"),
+                    version=r.get("version"),
+                )
             )
-            for r in results
-        ]
+        return items
+
+    async def _texts(
+        self, client: httpx.AsyncClient, chunk_ids: list[str], search_data: dict
+    ) -> dict[str, ChunkText]:
+        cache = self._text_cache
+        search_generation = int(search_data.get("kb_generation", 0))
+        cache.sync(search_generation)
+        out: dict[str, ChunkText] = {}
+        missing = []
+        for chunk_id in chunk_ids:
+            entry = cache.get(chunk_id)
+            if entry is None:
+                missing.append(chunk_id)
+            else:
+                out[chunk_id] = entry
+        if missing:
+            data = await self._chunks(client, missing)
+            if out and int(data.get("kb_generation", 0)) != search_generation:
+                # KB changed after /search: the texts taken from the cache may be stale too
+                out = {}
+                data = await self._chunks(client, chunk_ids)
+            cache.sync(int(data.get("kb_generation", 0)))
+            for c in data.get("chunks", []):
+                entry = ChunkText(
+                    c.get("text") or "",
+                    c.get("source") or "",
+                    c.get("document_title"),
+                    c.get("section_title"),
+                )
+                cache.put(c["chunk_id"], entry)
+                out[c["chunk_id"]] = entry
+        return out
+
+    async def _chunks(self, client: httpx.AsyncClient, chunk_ids: list[str]) -> dict:
+        resp = await client.get(f"{self._base_url}/chunks", params={"ids": ",".join(chunk_ids)})
+        resp.raise_for_status()
+        return resp.json()
@@ -13,6 +13,8 @@ class OrchestratorSettings(BaseAppSettings):
     retrieval_url: str = "http://retrieval:8001"
     llm_url: str = "http://llm:8002"
     retrieval_top_k: int = 5
+    # Chunk texts cached by id: /search returns ids and scores only, texts via /chunks (0 = off)
+    retrieval_text_cache_size: int = 2048
     max_history_messages: int = 10
     rag_min_confidence: float = 0.30
     diagnostic_questions_max: int = 2
@@ -20,6 +22,7 @@ class OrchestratorSettings(BaseAppSettings):
     rag_max_context_chars: int = 2000
     rag_strict_mode: bool = False
     rag_join_neighbors: bool = True
+    rag_expand_neighbors: int = 1  # ±n adjacent chunks per hit from retrieval (with rag_join_neighbors)
     rag_dedup_lines: bool = True
     rag_section_extraction: bool = True
     rag_normalize_text: bool = True
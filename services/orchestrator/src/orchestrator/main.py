@@ -39,7 +39,9 @@ async def lifespan(app: FastAPI):
         class_=AsyncSession,
         expire_on_commit=False,
     )
-    retrieval_client = RetrievalClient(settings.retrieval_url)
+    retrieval_client = RetrievalClient(
+        settings.retrieval_url, text_cache_size=settings.retrieval_text_cache_size
+    )
     llm_client = LLMClient(settings.llm_url)
     dialog_service = DialogService(
         session_factory=session_factory,
@@ -53,6 +55,7 @@ async def lifespan(app: FastAPI):
         rag_max_context_chars=settings.rag_max_context_chars,
         rag_strict_mode=settings.rag_strict_mode,
         rag_join_neighbors=settings.rag_join_neighbors,
+        rag_expand_neighbors=settings.rag_expand_neighbors,
         rag_dedup_lines=settings.rag_dedup_lines,
         rag_section_extraction=settings.rag_section_extraction,
         rag_normalize_text=settings.rag_normalize_text,
@@ -45,21 +45,27 @@ def _build_diagnostic_reply(questions_max: int) -> str:
 
 
 def _merge_adjacent_chunks(chunks: list[RetrievalResultItem]) -> list[RetrievalResultItem]:
-    """Merge consecutive chunks from same document (same document_title/source, consecutive position)."""
+    """Merge consecutive chunks from same document (same document_title/source, consecutive position).
+
+    A merged run keeps the best score of its chunks.
+    """
     if not chunks:
         return []
-    key = lambda c: (c.document_title or c.source or "", c.position)
+    # Same document title in another KB version (fallback chain) is a different document
+    key = lambda c: (c.document_title or c.source or "", c.version or "", c.position)
     sorted_chunks = sorted(chunks, key=key)
     merged: list[RetrievalResultItem] = []
     current_doc = None
     current_pos = -2
     current_text: list[str] = []
     current_item: RetrievalResultItem | None = None
+    current_score = 0.0
     for c in sorted_chunks:
-        doc_key = c.document_title or c.source or ""
+        doc_key = (c.document_title or c.source or "", c.version or "")
         if doc_key == current_doc and c.position == current_pos + 1 and current_item:
             current_text.append(c.text)
             current_pos = c.position
+            current_score = max(current_score, c.score)
         else:
             if current_item:
                 merged.append(
@@ -67,26 +73,29 @@ def _merge_adjacent_chunks(chunks: list[RetrievalResultItem]) -> list[RetrievalR
                         chunk_id=current_item.chunk_id,
                         text="\n\n".join(current_text),
                         source=current_item.source,
-                        score=current_item.score,
+                        score=current_score,
                         document_title=current_item.document_title,
                         section_title=current_item.section_title,
                         position=current_item.position,
+                        version=current_item.version,
                     )
                 )
             current_doc = doc_key
             current_pos = c.position
             current_text = [c.text]
             current_item = c
+            current_score = c.score
     if current_item:
         merged.append(
             RetrievalResultItem(
                 chunk_id=current_item.chunk_id,
                 text="\n\n".join(current_text),
                 source=current_item.source,
-                score=current_item.score,
+                score=current_score,
                 document_title=current_item.document_title,
                 section_title=current_item.section_title,
                 position=current_item.position,
+                version=current_item.version,
             )
         )
     return merged
@@ -133,6 +142,7 @@ class DialogService:
         rag_max_context_chars: int = 2500,
         rag_strict_mode: bool = False,
         rag_join_neighbors: bool = True,
+        rag_expand_neighbors: int = 0,
         rag_dedup_lines: bool = True,
         rag_section_extraction: bool = True,
         rag_normalize_text: bool = True,
@@ -148,6 +158,7 @@ class DialogService:
         self._rag_max_context_chars = rag_max_context_chars
         self._rag_strict_mode = rag_strict_mode
         self._rag_join_neighbors = rag_join_neighbors
+        self._rag_expand_neighbors = rag_expand_neighbors
         self._rag_dedup_lines = rag_dedup_lines
         self._rag_section_extraction = rag_section_extraction
         self._rag_normalize_text = rag_normalize_text
@@ -201,13 +212,17 @@ class DialogService:
                 )
 
             # retrieval with version
+            # adjacent chunks come back in the same /search call; they are merged in step 2
             rag_chunks: list[RetrievalResultItem] = await self._retrieval.search(
-                user_message, top_k=self._retrieval_top_k, version=termidesk_version
+                user_message,
+                top_k=self._retrieval_top_k,
+                version=termidesk_version,
+                expand_neighbors=self._rag_expand_neighbors if self._rag_join_neighbors else 0,
             )
 
             top_score = max((c.score for c in rag_chunks), default=0.0)
             rag_info = {
-                "retrieved_count": len(rag_chunks),
+                "retrieved_count": sum(1 for c in rag_chunks if c.neighbor_of is None),
                 "top_score": top_score,
                 "threshold": self._rag_min_confidence,
             }
@@ -265,6 +280,7 @@ class DialogService:
                             document_title=c.document_title,
                             section_title=c.section_title,
                             position=c.position,
+                            version=c.version,
                         )
                         for c in merged
                     ]
@@ -294,6 +310,7 @@ class DialogService:
                             document_title=c.document_title,
                             section_title=c.section_title,
                             position=c.position,
+                            version=c.version,
                         )
                     )
                 context_chunks = cleaned_chunks
@@ -311,6 +328,7 @@ class DialogService:
                             document_title=c.document_title,
                             section_title=c.section_title,
                             position=c.position,
+                            version=c.version,
                         )
                     )
                 context_chunks = cleaned_chunks
@@ -339,9 +357,10 @@ class DialogService:
             for c in context_chunks[:3]:
                 if c.source not in seen_sources:
                     seen_sources.add(c.source)
-                    sources.append(
-                        {"chunk_id": c.chunk_id, "text": c.text[:200], "source": c.source}
-                    )
+                    source = {"chunk_id": c.chunk_id, "text": c.text[:200], "source": c.source}
+                    if c.version and c.version != termidesk_version:
+                        source["version"] = c.version  # found via the retrieval version fallback
+                    sources.append(source)
             return ChatResult(
                 reply=reply_text,
                 sources=sources,
@@ -4,7 +4,7 @@ from unittest.mock import AsyncMock, MagicMock, patch
 from uuid import uuid4
 
 from orchestrator.clients.retrieval_client import RetrievalResultItem
-from orchestrator.service.dialog_service import DialogService
+from orchestrator.service.dialog_service import DialogService, _merge_adjacent_chunks
 
 
 @pytest.fixture
@@ -179,3 +179,58 @@ async def test_retrieval_above_threshold_calls_llm_returns_answer(
     assert result.sources[0]["source"] == "faq.md"
     assert result.rag is not None
     assert result.rag["top_score"] >= 0.30
+
+
+def test_merge_adjacent_keeps_best_score_of_run() -> None:
+    chunks = [
+        RetrievalResultItem(chunk_id="n", text="before", source="a.md", score=0.6, position=1, neighbor_of="h"),
+        RetrievalResultItem(chunk_id="h", text="hit", source="a.md", score=0.8, position=2),
+        RetrievalResultItem(chunk_id="x", text="other", source="b.md", score=0.5, position=7),
+    ]
+    merged = _merge_adjacent_chunks(chunks)
+    assert [(m.chunk_id, m.text, m.score) for m in merged] == [
+        ("n", "before\n\nhit", 0.8),
+        ("x", "other", 0.5),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_neighbors_requested_and_not_counted_as_hits(
+    mock_session_factory: MagicMock,
+    mock_user_with_version: MagicMock,
+    mock_conv: MagicMock,
+) -> None:
+    chunks = [
+        RetrievalResultItem(chunk_id="1", text="Termidesk is VDI.", source="faq.md", score=0.9, position=0),
+        RetrievalResultItem(
+            chunk_id="2", text="Clients exist.", source="faq.md", score=0.9, position=1, neighbor_of="1"
+        ),
+    ]
+    mock_retrieval = MagicMock()
+    mock_retrieval.search = AsyncMock(return_value=chunks)
+    mock_llm = MagicMock()
+    mock_llm.generate = AsyncMock(return_value="ok")
+
+    with (
+        patch("orchestrator.service.dialog_service.UserRepository") as UR,
+        patch("orchestrator.service.dialog_service.ConversationRepository") as CR,
+        patch("orchestrator.service.dialog_service.MessageRepository") as MR,
+    ):
+        UR.return_value.get_by_telegram_id = AsyncMock(return_value=mock_user_with_version)
+        CR.return_value.get_by_id = AsyncMock(return_value=None)
+        CR.return_value.get_or_create = AsyncMock(return_value=mock_conv)
+        MR.return_value.add = AsyncMock()
+        MR.return_value.get_recent = AsyncMock(return_value=[])
+
+        service = DialogService(
+            session_factory=mock_session_factory,
+            retrieval_client=mock_retrieval,
+            llm_client=mock_llm,
+            rag_expand_neighbors=1,
+        )
+        result = await service.reply(user_id="123", telegram_chat_id="123", user_message="Что такое Termidesk?")
+
+    assert mock_retrieval.search.call_args.kwargs["expand_neighbors"] == 1
+    assert result.mode == "answer"
+    assert result.rag is not None and result.rag["retrieved_count"] == 1
+    assert len(result.sources) == 1
@@ -0,0 +1,84 @@
+"""Tests for RetrievalClient compact search with the chunk text cache."""
+import json
+
+import httpx
+import pytest
+
+from orchestrator.clients.retrieval_client import RetrievalClient
+
+CHUNKS = {
+    "c1": {"chunk_id": "c1", "text": "Termidesk is VDI.", "source": "faq.md", "document_title": "FAQ"},
+    "c2": {"chunk_id": "c2", "text": "Install the client.", "source": "faq.md", "document_title": "FAQ"},
+}
+
+
+class FakeRetrieval:
+    def __init__(self) -> None:
+        self.generation = 1
+        self.chunks_generation: int | None = None  # /chunks answering after a re-ingest
+        self.requests: list[httpx.Request] = []
+        self.hits = ["c1"]
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if request.url.path == "/search":
+            body = json.loads(request.content)
+            assert body["fields"] == "ids"
+            results = [{"chunk_id": c, "score": 0.9, "position": i} for i, c in enumerate(self.hits)]
+            return httpx.Response(200, json={"results": results, "kb_generation": self.generation})
+        ids = request.url.params["ids"].split(",")
+        generation = self.chunks_generation or self.generation
+        return httpx.Response(
+            200, json={"chunks": [CHUNKS[i] for i in ids if i in CHUNKS], "kb_generation": generation}
+        )
+
+
+def _paths(fake: FakeRetrieval) -> list[str]:
+    return [f"{r.url.path}?{r.url.query.decode()}" if r.url.query else r.url.path for r in fake.requests]
+
+
+@pytest.mark.asyncio
+async def test_compact_search_fetches_only_missing_texts() -> None:
+    fake = FakeRetrieval()
+    client = RetrievalClient("http://retrieval", text_cache_size=10, transport=httpx.MockTransport(fake))
+    items = await client.search("q")
+    assert [(i.chunk_id, i.text, i.document_title) for i in items] == [("c1", "Termidesk is VDI.", "FAQ")]
+
+    fake.hits = ["c1", "c2"]
+    items = await client.search("q")
+    assert [i.text for i in items] == ["Termidesk is VDI.", "Install the client."]
+    assert _paths(fake) == ["/search", "/chunks?ids=c1", "/search", "/chunks?ids=c2"]
+
+    fake.requests.clear()
+    await client.search("q")
+    assert _paths(fake) == ["/search"]  # all texts cached
+
+    fake.generation = 2  # KB re-ingested: cached texts are stale
+    fake.requests.clear()
+    await client.search("q")
+    assert _paths(fake) == ["/search", "/chunks?ids=c1%2Cc2"]
+
+
+@pytest.mark.asyncio
+async def test_reingest_between_search_and_chunks_refetches_cached_texts() -> None:
+    fake = FakeRetrieval()
+    client = RetrievalClient("http://retrieval", text_cache_size=10, transport=httpx.MockTransport(fake))
+    await client.search("q")  # c1 cached at generation 1
+
+    fake.hits = ["c1", "c2"]
+    fake.chunks_generation = 2
+    fake.requests.clear()
+    items = await client.search("q")
+    assert [i.chunk_id for i in items] == ["c1", "c2"]
+    assert _paths(fake) == ["/search", "/chunks?ids=c2", "/chunks?ids=c1%2Cc2"]
+
+
+@pytest.mark.asyncio
+async def test_full_response_without_cache() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert "fields" not in json.loads(request.content)
+        return httpx.Response(200, json={"results": [{**CHUNKS["c1"], "score": 0.5}]})
+
+    client = RetrievalClient("http://retrieval", transport=httpx.MockTransport(handler))
+    items = await client.search("q")
+    assert items[0].text == "Termidesk is VDI." and items[0].score == 0.5
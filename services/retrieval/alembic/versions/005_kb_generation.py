@@ -0,0 +1,36 @@
+"""Add retrieval.kb_generation: per-version counter bumped by ingest (cache invalidation).
+
+Revision ID: 005
+Revises: 004
+Create Date: 2025-01-01 00:00:04
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "005"
+down_revision: Union[str, None] = "004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "kb_generation",
+        sa.Column("version", sa.Text(), primary_key=True),
+        sa.Column("generation", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        schema="retrieval",
+    )
+    # Seed with versions already ingested so the counter starts from a known state
+    op.execute("""
+        INSERT INTO retrieval.kb_generation (version, generation, updated_at)
+        SELECT DISTINCT version, 1, now() FROM retrieval.documents
+        ON CONFLICT (version) DO NOTHING
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table("kb_generation", schema="retrieval")
@@ -0,0 +1,34 @@
+"""Add chunks.tsv (full-text tsvector, Russian config) with GIN index for hybrid search.
+
+Revision ID: 006
+Revises: 005
+Create Date: 2025-01-01 00:00:05
+
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "006"
+down_revision: Union[str, None] = "005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match RETRIEVAL_TEXT_SEARCH_CONFIG used by retrieval queries
+TS_CONFIG = os.environ.get("RETRIEVAL_TEXT_SEARCH_CONFIG", "russian")
+
+
+def upgrade() -> None:
+    # Generated column: filled by Postgres on every ingest insert/update and backfilled here
+    op.execute(
+        "ALTER TABLE retrieval.chunks ADD COLUMN tsv tsvector "
+        f"GENERATED ALWAYS AS (to_tsvector('{TS_CONFIG}', "
+        "coalesce(section_title, '') || ' ' || text)) STORED"
+    )
+    op.execute("CREATE INDEX ix_retrieval_chunks_tsv ON retrieval.chunks USING gin (tsv)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS retrieval.ix_retrieval_chunks_tsv")
+    op.drop_column("chunks", "tsv", schema="retrieval")
@@ -0,0 +1,48 @@
+"""Replace ivfflat index on chunks.embedding with HNSW (configurable m / ef_construction).
+
+Revision ID: 007
+Revises: 006
+Create Date: 2025-01-01 00:00:06
+
+Parameters (env, read at migration time):
+  RETRIEVAL_VECTOR_DISTANCE      l2 (default) | cosine  -- must match retrieval setting
+  RETRIEVAL_HNSW_M               default 16
+  RETRIEVAL_HNSW_EF_CONSTRUCTION default 64
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OPCLASSES = {"l2": "vector_l2_ops", "cosine": "vector_cosine_ops"}
+
+
+def _opclass() -> str:
+    distance = os.environ.get("RETRIEVAL_VECTOR_DISTANCE", "l2").lower()
+    if distance not in OPCLASSES:
+        raise ValueError(f"RETRIEVAL_VECTOR_DISTANCE must be one of {sorted(OPCLASSES)}, got {distance!r}")
+    return OPCLASSES[distance]
+
+
+def upgrade() -> None:
+    m = int(os.environ.get("RETRIEVAL_HNSW_M", "16"))
+    ef_construction = int(os.environ.get("RETRIEVAL_HNSW_EF_CONSTRUCTION", "64"))
+    op.execute("DROP INDEX IF EXISTS retrieval.ix_retrieval_chunks_embedding_ivfflat")
+    # No try/except: a failed index build must fail the migration (requires pgvector >= 0.5)
+    op.execute(
+        "CREATE INDEX ix_retrieval_chunks_embedding_hnsw ON retrieval.chunks "
+        f"USING hnsw (embedding {_opclass()}) WITH (m = {m}, ef_construction = {ef_construction})"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS retrieval.ix_retrieval_chunks_embedding_hnsw")
+    op.execute(
+        "CREATE INDEX ix_retrieval_chunks_embedding_ivfflat "
+        "ON retrieval.chunks USING ivfflat (embedding vector_l2_ops) WITH (lists = 100)"
+    )
@@ -0,0 +1,56 @@
+"""Add precomputed lexical features to chunks (terms, term frequencies, length) and backfill.
+
+Revision ID: 008
+Revises: 007
+Create Date: 2025-01-01 00:00:07
+
+Ingest writes the columns with shared.tokenize.term_frequencies; existing rows are
+backfilled here with the same function.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from shared.tokenize import term_frequencies
+
+revision: str = "008"
+down_revision: Union[str, None] = "007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_BATCH = 1000
+
+
+def upgrade() -> None:
+    op.add_column("chunks", sa.Column("lexical_terms", postgresql.ARRAY(sa.Text()), nullable=True), schema="retrieval")
+    op.add_column("chunks", sa.Column("lexical_tf", postgresql.ARRAY(sa.Integer()), nullable=True), schema="retrieval")
+    op.add_column("chunks", sa.Column("lexical_len", sa.Integer(), nullable=True), schema="retrieval")
+    bind = op.get_bind()
+    update = sa.text(
+        "UPDATE retrieval.chunks SET lexical_terms = :terms, lexical_tf = :tf, lexical_len = :len "
+        "WHERE id = :id"
+    ).bindparams(
+        sa.bindparam("terms", type_=postgresql.ARRAY(sa.Text())),
+        sa.bindparam("tf", type_=postgresql.ARRAY(sa.Integer())),
+    )
+    while True:
+        rows = bind.execute(
+            sa.text(f"SELECT id, text FROM retrieval.chunks WHERE lexical_terms IS NULL LIMIT {_BATCH}")
+        ).all()
+        if not rows:
+            break
+        params = []
+        for chunk_id, text in rows:
+            terms, tf, length = term_frequencies(text)
+            params.append({"id": chunk_id, "terms": terms, "tf": tf, "len": length})
+        bind.execute(update, params)
+    # Chunk rows changed: invalidate caches and in-memory snapshots of every version
+    op.execute("UPDATE retrieval.kb_generation SET generation = generation + 1, updated_at = now()")
+
+
+def downgrade() -> None:
+    op.drop_column("chunks", "lexical_len", schema="retrieval")
+    op.drop_column("chunks", "lexical_tf", schema="retrieval")
+    op.drop_column("chunks", "lexical_terms", schema="retrieval")
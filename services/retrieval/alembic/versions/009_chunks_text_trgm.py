@@ -0,0 +1,26 @@
+"""Add pg_trgm GIN index on chunks.text for the text-search fallback (ILIKE, <%, similarity).
+
+Revision ID: 009
+Revises: 008
+Create Date: 2025-01-01 00:00:08
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "009"
+down_revision: Union[str, None] = "008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "CREATE INDEX ix_retrieval_chunks_text_trgm ON retrieval.chunks USING gin (text gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS retrieval.ix_retrieval_chunks_text_trgm")
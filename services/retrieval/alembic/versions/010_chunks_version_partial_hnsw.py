@@ -0,0 +1,56 @@
+"""Denormalize documents.version onto chunks; partial HNSW index per KB version.
+
+Revision ID: 010
+Revises: 009
+Create Date: 2025-01-01 00:00:09
+
+Vector search then filters and orders on retrieval.chunks alone, and the planner can use
+the version's own ANN index instead of post-filtering neighbours of all versions.
+Ingest creates the index for versions added later (shared.ann_index).
+
+Parameters (env, read at migration time, same as 007):
+  RETRIEVAL_VECTOR_DISTANCE      l2 (default) | cosine  -- must match retrieval setting
+  RETRIEVAL_HNSW_M               default 16
+  RETRIEVAL_HNSW_EF_CONSTRUCTION default 64
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from shared.ann_index import VERSION_INDEX_PREFIX, version_index_ddl
+
+revision: str = "010"
+down_revision: Union[str, None] = "009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("chunks", sa.Column("version", sa.Text(), nullable=True), schema="retrieval")
+    op.execute(
+        "UPDATE retrieval.chunks c SET version = d.version "
+        "FROM retrieval.documents d WHERE d.id = c.document_id"
+    )
+    op.alter_column("chunks", "version", nullable=False, schema="retrieval")
+    op.create_index("ix_retrieval_chunks_version", "chunks", ["version"], schema="retrieval")
+    distance = os.environ.get("RETRIEVAL_VECTOR_DISTANCE", "l2")
+    m = int(os.environ.get("RETRIEVAL_HNSW_M", "16"))
+    ef_construction = int(os.environ.get("RETRIEVAL_HNSW_EF_CONSTRUCTION", "64"))
+    versions = op.get_bind().execute(sa.text("SELECT DISTINCT version FROM retrieval.chunks")).scalars()
+    for version in list(versions):
+        op.execute(version_index_ddl(version, distance, m, ef_construction))
+
+
+def downgrade() -> None:
+    names = op.get_bind().execute(
+        sa.text(
+            "SELECT indexname FROM pg_indexes WHERE schemaname = 'retrieval' AND indexname LIKE :prefix"
+        ),
+        {"prefix": VERSION_INDEX_PREFIX + "%"},
+    ).scalars()
+    for name in list(names):
+        op.execute(f"DROP INDEX IF EXISTS retrieval.{name}")
+    op.drop_index("ix_retrieval_chunks_version", table_name="chunks", schema="retrieval")
+    op.drop_column("chunks", "version", schema="retrieval")
@@ -0,0 +1,59 @@
+"""Add halfvec and binary-quantized copies of chunks.embedding; partial HNSW on the chosen one.
+
+Revision ID: 011
+Revises: 010
+Create Date: 2025-01-01 00:00:10
+
+embedding_half (halfvec, 2 bytes/dim) and embedding_bin (bit, 1 bit/dim) are written by
+ingest next to the float4 vector, which is kept for rescoring the ANN candidates.
+Requires pgvector >= 0.7.
+
+Parameters (env, read at migration time):
+  RETRIEVAL_VECTOR_QUANTIZATION  none (default) | halfvec | binary -- which column gets
+                                 per-version partial HNSW indexes (same as retrieval setting)
+  RETRIEVAL_VECTOR_DISTANCE, RETRIEVAL_HNSW_M, RETRIEVAL_HNSW_EF_CONSTRUCTION  as in 007
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from shared.ann_index import VERSION_INDEX_PREFIX, version_index_ddl
+
+revision: str = "011"
+down_revision: Union[str, None] = "010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DIM = 384
+
+
+def upgrade() -> None:
+    op.execute(f"ALTER TABLE retrieval.chunks ADD COLUMN embedding_half halfvec({DIM})")
+    op.execute(f"ALTER TABLE retrieval.chunks ADD COLUMN embedding_bin bit({DIM})")
+    op.execute(
+        f"UPDATE retrieval.chunks SET embedding_half = embedding::halfvec({DIM}), "
+        "embedding_bin = binary_quantize(embedding) WHERE embedding IS NOT NULL"
+    )
+    quantization = os.environ.get("RETRIEVAL_VECTOR_QUANTIZATION", "none").lower()
+    if quantization == "none":
+        return
+    distance = os.environ.get("RETRIEVAL_VECTOR_DISTANCE", "l2")
+    m = int(os.environ.get("RETRIEVAL_HNSW_M", "16"))
+    ef_construction = int(os.environ.get("RETRIEVAL_HNSW_EF_CONSTRUCTION", "64"))
+    versions = op.get_bind().execute(sa.text("SELECT DISTINCT version FROM retrieval.chunks")).scalars()
+    for version in list(versions):
+        op.execute(version_index_ddl(version, distance, m, ef_construction, quantization))
+
+
+def downgrade() -> None:
+    names = op.get_bind().execute(
+        sa.text("SELECT indexname FROM pg_indexes WHERE schemaname = 'retrieval' AND indexname LIKE :prefix"),
+        {"prefix": VERSION_INDEX_PREFIX + "%"},
+    ).scalars()
+    for name in list(names):
+        if name.startswith((VERSION_INDEX_PREFIX + "h_", VERSION_INDEX_PREFIX + "b_")):
+            op.execute(f"DROP INDEX IF EXISTS retrieval.{name}")
+    op.drop_column("chunks", "embedding_bin", schema="retrieval")
+    op.drop_column("chunks", "embedding_half", schema="retrieval")
@@ -0,0 +1,45 @@
+"""PCA-reduced embeddings: retrieval.pca_projections and chunks.embedding_pca.
+
+Revision ID: 012
+Revises: 011
+Create Date: 2025-01-01 00:00:11
+
+Ingest (INGEST_PCA_DIM > 0) fits one projection per KB version on its chunk embeddings,
+stores it here, writes the reduced vectors and creates the version's partial HNSW index
+on embedding_pca. Nothing is backfilled: run ingest to populate.
+
+Parameters (env, read at migration time):
+  RETRIEVAL_PCA_DIM  reduced dimension, default 128 (must match INGEST_PCA_DIM)
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "012"
+down_revision: Union[str, None] = "011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "pca_projections",
+        sa.Column("version", sa.Text(), primary_key=True),
+        sa.Column("dim_in", sa.Integer(), nullable=False),
+        sa.Column("dim_out", sa.Integer(), nullable=False),
+        sa.Column("mean", postgresql.ARRAY(sa.REAL()), nullable=False),
+        sa.Column("components", postgresql.ARRAY(sa.REAL()), nullable=False),  # (dim_out, dim_in), row-major
+        sa.Column("explained_variance", sa.Float(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        schema="retrieval",
+    )
+    dim = int(os.environ.get("RETRIEVAL_PCA_DIM", "128"))
+    op.execute(f"ALTER TABLE retrieval.chunks ADD COLUMN embedding_pca vector({dim})")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE retrieval.chunks DROP COLUMN IF EXISTS embedding_pca")  # drops its indexes too
+    op.drop_table("pca_projections", schema="retrieval")
@@ -0,0 +1,73 @@
+"""Document and section embeddings for two-stage (hierarchical) retrieval.
+
+Revision ID: 013
+Revises: 012
+Create Date: 2025-01-01 00:00:12
+
+documents.embedding and retrieval.sections.embedding are mean-pooled chunk embeddings
+written by ingest; chunks.section_id links a chunk to its markdown section. Retrieval
+(RETRIEVAL_HIERARCHICAL=document|section) picks the nearest documents / sections first
+and ranks only their chunks. Nothing is backfilled: run ingest to populate.
+
+Parameters (env, read at migration time):
+  RETRIEVAL_VECTOR_DISTANCE  l2 (default) | cosine -- opclass of the sections HNSW index
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+from shared.ann_index import OPCLASSES
+
+revision: str = "013"
+down_revision: Union[str, None] = "012"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE retrieval.documents ADD COLUMN embedding vector(384)")
+    op.create_table(
+        "sections",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "document_id",
+            UUID(as_uuid=True),
+            sa.ForeignKey("retrieval.documents.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("version", sa.Text(), nullable=False),
+        sa.Column("section_key", sa.Text(), nullable=False),  # position of the section's first chunk in the document
+        sa.Column("section_title", sa.Text(), nullable=True),
+        sa.Column("chunk_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.UniqueConstraint("document_id", "section_key", name="uq_retrieval_sections_document_key"),
+        schema="retrieval",
+    )
+    op.execute("ALTER TABLE retrieval.sections ADD COLUMN embedding vector(384)")
+    op.create_index("ix_retrieval_sections_version", "sections", ["version"], schema="retrieval")
+    distance = os.environ.get("RETRIEVAL_VECTOR_DISTANCE", "l2").lower()
+    op.execute(
+        "CREATE INDEX ix_retrieval_sections_embedding_hnsw ON retrieval.sections "
+        f"USING hnsw (embedding {OPCLASSES.get(distance, 'vector_l2_ops')})"
+    )
+    op.add_column(
+        "chunks",
+        sa.Column(
+            "section_id",
+            UUID(as_uuid=True),
+            sa.ForeignKey("retrieval.sections.id", ondelete="SET NULL"),
+            nullable=True,
+        ),
+        schema="retrieval",
+    )
+    op.create_index("ix_retrieval_chunks_section_id", "chunks", ["section_id"], schema="retrieval")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_retrieval_chunks_section_id", table_name="chunks", schema="retrieval")
+    op.drop_column("chunks", "section_id", schema="retrieval")
+    op.drop_table("sections", schema="retrieval")
+    op.drop_column("documents", "embedding", schema="retrieval")
@@ -1,32 +1,206 @@
 """FastAPI routes for retrieval service."""
-from fastapi import APIRouter, Request
+import time
+from dataclasses import asdict
+from typing import Annotated
 
-from retrieval.api.schemas import SearchRequest, SearchResponse
-from retrieval.service import SearchService
+from fastapi import APIRouter, Query, Request
+from pydantic import BeforeValidator
+
+from retrieval.api.schemas import (
+    CHUNKS_MAX_IDS,
+    BatchSearchRequest,
+    BatchSearchResponse,
+    CacheFlushResponse,
+    ChunksResponse,
+    EmbeddingCacheStats,
+    ExplainRequest,
+    ExplainResultItem,
+    KbStatsResponse,
+    PlanSummaryItem,
+    ResultCacheStats,
+    SearchRequest,
+    SearchExplainResponse,
+    SearchResponse,
+    SearchResultItem,
+    SemanticCacheStats,
+)
+from retrieval.cache import QueryEmbeddingCache, SearchResultCache, SemanticResultCache
+from retrieval.service import KbGenerationWatcher, KbStatsCollector, SearchService
+from retrieval.storage.base import SearchOptions, SearchQuery, SearchResult
+from retrieval.storage.chunks import ChunkReader
 
 router = APIRouter(tags=["retrieval"])
+admin_router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+def _options(body: SearchRequest) -> SearchOptions | None:
+    if body.ef_search is None and body.probes is None and body.mmr_lambda is None:
+        return None
+    return SearchOptions(ef_search=body.ef_search, probes=body.probes, mmr_lambda=body.mmr_lambda)
+
+
+def _to_item(r: SearchResult, fields: str = "full") -> SearchResultItem:
+    if fields == "ids":
+        return SearchResultItem(
+            chunk_id=r.chunk_id,
+            position=r.position,
+            score=r.score,
+            confidence=r.confidence,
+            distance=r.distance,
+            version=r.version,
+            neighbor_of=r.neighbor_of,
+        )
+    return SearchResultItem(
+        chunk_id=r.chunk_id,
+        text=r.text,
+        source=r.source,
+        document_title=r.document_title,
+        section_title=r.section_title,
+        position=r.position,
+        score=r.score,
+        confidence=r.confidence,
+        distance=r.distance,
+        version=r.version,
+        neighbor_of=r.neighbor_of,
+    )
 
 
 @router.post("/search", response_model=SearchResponse)  # POST /search for orchestrator
 async def search(body: SearchRequest, request: Request) -> SearchResponse:
     service: SearchService = request.app.state.search_service
     results = await service.search(
-        body.query, top_k=body.top_k, version=body.version
+        body.query,
+        top_k=body.top_k,
+        version=body.version,
+        options=_options(body),
+        expand_neighbors=body.expand_neighbors,
     )
     return SearchResponse(
+        results=[_to_item(r, body.fields) for r in results],
+        kb_generation=request.app.state.kb_generation.generation,
+    )
+
+
+@router.post("/search/explain", response_model=SearchExplainResponse)
+async def search_explain(body: ExplainRequest, request: Request) -> SearchExplainResponse:
+    """One uncached search with stage timings, SQL plans and per-result score components."""
+    service: SearchService = request.app.state.search_service
+    t0 = time.perf_counter()
+    results, trace = await service.explain(
+        body.query,
+        top_k=body.top_k,
+        version=body.version,
+        options=_options(body),
+        analyze=body.analyze,
+    )
+    total_ms = (time.perf_counter() - t0) * 1000
+    return SearchExplainResponse(
         results=[
-            {
-                "chunk_id": r.chunk_id,
-                "text": r.text,
-                "source": r.source,
-                "document_title": r.document_title,
-                "section_title": r.section_title,
-                "position": r.position,
-                "score": r.score,
-                "confidence": r.confidence,
-                "distance": r.distance,
-                "version": r.version,
-            }
+            ExplainResultItem(
+                **_to_item(r, body.fields).model_dump(),
+                vector_score=trace.scores.get(r.chunk_id, {}).get("vector"),
+                keyword_score=trace.scores.get(r.chunk_id, {}).get("keyword"),
+            )
             for r in results
+        ],
+        backend=trace.backend,
+        mode=trace.mode,
+        total_ms=round(total_ms, 3),
+        stages_ms={name: round(ms, 3) for name, ms in trace.stages_ms.items()},
+        candidates=trace.candidates,
+        passed_min_score=trace.passed_min_score,
+        refetches=trace.refetches,
+        ann_index_used=any(p.ann_index_used for p in trace.plans) if trace.plans else None,
+        plans=[PlanSummaryItem(**asdict(p)) for p in trace.plans],
+        error=trace.error,
+    )
+
+
+@router.post("/search/batch", response_model=BatchSearchResponse)
+async def search_batch(body: BatchSearchRequest, request: Request) -> BatchSearchResponse:
+    """N queries in one call (one embedder pass, one DB session); results in request order."""
+    service: SearchService = request.app.state.search_service
+    batches = await service.search_many(
+        [
+            SearchQuery(
+                query=q.query,
+                top_k=q.top_k,
+                version=q.version,
+                options=_options(q),
+                expand_neighbors=q.expand_neighbors,
+            )
+            for q in body.queries
         ]
     )
+    generation = request.app.state.kb_generation.generation
+    return BatchSearchResponse(
+        results=[
+            SearchResponse(results=[_to_item(r, q.fields) for r in rs], kb_generation=generation)
+            for q, rs in zip(body.queries, batches)
+        ]
+    )
+
+
+def _split_ids(values: list[str]) -> list[str]:
+    """?ids=a,b&ids=c -> [a, b, c], before the max_length check."""
+    return [i.strip() for value in values for i in value.split(",") if i.strip()]
+
+
+@router.get("/chunks", response_model=ChunksResponse)
+async def chunks(
+    request: Request,
+    ids: Annotated[list[str], BeforeValidator(_split_ids), Query(max_length=CHUNKS_MAX_IDS)],
+) -> ChunksResponse:
+    """Texts of fields="ids" results (?ids=a,b or ?ids=a&ids=b); unknown ids are omitted."""
+    reader: ChunkReader = request.app.state.chunk_reader
+    kb_generation: KbGenerationWatcher = request.app.state.kb_generation
+    return ChunksResponse(
+        chunks=[_to_item(r) for r in await reader.get_many(ids)],
+        kb_generation=kb_generation.generation,
+    )
+
+
+@router.get("/stats", response_model=KbStatsResponse)
+async def kb_stats(request: Request, refresh: bool = False) -> KbStatsResponse:
+    """KB statistics collected in background; ?refresh=true re-collects now."""
+    collector: KbStatsCollector = request.app.state.kb_stats
+    kb_generation: KbGenerationWatcher = request.app.state.kb_generation
+    stats = await collector.refresh() if refresh else collector.stats
+    return KbStatsResponse(**stats.as_dict(), kb_generation=kb_generation.generation)
+
+
+@admin_router.get("/embedding-cache", response_model=EmbeddingCacheStats)
+async def embedding_cache_stats(request: Request) -> EmbeddingCacheStats:
+    cache: QueryEmbeddingCache = request.app.state.embedding_cache
+    return EmbeddingCacheStats(**cache.stats())
+
+
+@admin_router.delete("/embedding-cache", response_model=CacheFlushResponse)
+async def embedding_cache_flush(request: Request) -> CacheFlushResponse:
+    cache: QueryEmbeddingCache = request.app.state.embedding_cache
+    return CacheFlushResponse(flushed=cache.clear())
+
+
+@admin_router.get("/result-cache", response_model=ResultCacheStats)
+async def result_cache_stats(request: Request) -> ResultCacheStats:
+    cache: SearchResultCache = request.app.state.result_cache
+    kb_generation: KbGenerationWatcher = request.app.state.kb_generation
+    return ResultCacheStats(**cache.stats(), kb_generation=kb_generation.generation)
+
+
+@admin_router.delete("/result-cache", response_model=CacheFlushResponse)
+async def result_cache_flush(request: Request) -> CacheFlushResponse:
+    cache: SearchResultCache = request.app.state.result_cache
+    return CacheFlushResponse(flushed=cache.clear())
+
+
+@admin_router.get("/semantic-cache", response_model=SemanticCacheStats)
+async def semantic_cache_stats(request: Request) -> SemanticCacheStats:
+    cache: SemanticResultCache = request.app.state.semantic_cache
+    return SemanticCacheStats(**cache.stats())
+
+
+@admin_router.delete("/semantic-cache", response_model=CacheFlushResponse)
+async def semantic_cache_flush(request: Request) -> CacheFlushResponse:
+    cache: SemanticResultCache = request.app.state.semantic_cache
+    return CacheFlushResponse(flushed=cache.clear())
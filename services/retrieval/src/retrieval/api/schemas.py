@@ -1,4 +1,6 @@
 """API request/response schemas."""
+from typing import Literal
+
 from pydantic import BaseModel, Field
 
 
@@ -6,12 +8,29 @@ class SearchRequest(BaseModel):
     query: str = Field(..., min_length=1)
     top_k: int = Field(default=5, ge=1, le=20)
     version: str | None = None
+    ef_search: int | None = Field(default=None, ge=1, le=1000)  # overrides RETRIEVAL_HNSW_EF_SEARCH
+    probes: int | None = Field(default=None, ge=1, le=1000)  # overrides RETRIEVAL_IVFFLAT_PROBES
+    expand_neighbors: int = Field(default=0, ge=0, le=3)  # ±n adjacent chunks per hit
+    mmr_lambda: float | None = Field(default=None, ge=0.0, le=1.0)  # overrides RETRIEVAL_MMR_LAMBDA
+    # "ids": chunk ids, scores and positions only; texts via GET /chunks
+    fields: Literal["full", "ids"] = "full"
+
+
+class ExplainRequest(SearchRequest):
+    analyze: bool = True  # EXPLAIN (ANALYZE, BUFFERS): every statement runs a second time
+
+
+BATCH_MAX_QUERIES = 64
+
+
+class BatchSearchRequest(BaseModel):
+    queries: list[SearchRequest] = Field(..., min_length=1, max_length=BATCH_MAX_QUERIES)
 
 
 class SearchResultItem(BaseModel):
     chunk_id: str
-    text: str
-    source: str
+    text: str | None = None  # None in fields="ids" mode
+    source: str | None = None
     document_title: str | None = None
     section_title: str | None = None
     position: int = 0
@@ -19,7 +38,115 @@ class SearchResultItem(BaseModel):
     confidence: float | None = None
     distance: float | None = None
     version: str | None = None
+    neighbor_of: str | None = None  # set on chunks added by expand_neighbors
+
+
+class ExplainResultItem(SearchResultItem):
+    # Parts of score as computed by the backend: weighted confidence / keyword overlap (vector),
+    # each list's scaled RRF term (hybrid), similarity (text); None if the backend does not report them
+    vector_score: float | None = None
+    keyword_score: float | None = None
+
+
+class PlanSummaryItem(BaseModel):
+    statement: str  # ann | hierarchical | lexical | phrase | words
+    nodes: list[str]
+    indexes: list[str]
+    ann_index_used: bool
+    planning_ms: float | None = None
+    execution_ms: float | None = None
+    rows: int | None = None
+    shared_hit_blocks: int | None = None
+    shared_read_blocks: int | None = None
+
+
+class SearchExplainResponse(BaseModel):
+    results: list[ExplainResultItem]
+    backend: str
+    mode: str
+    total_ms: float
+    stages_ms: dict[str, float]  # embedding, sql, sql_lexical, decode, scoring, sort (in-memory: search)
+    candidates: int | None = None  # rows returned by SQL (after its min_score filter)
+    passed_min_score: int | None = None
+    refetches: int = 0
+    ann_index_used: bool | None = None  # None when no plan was taken
+    plans: list[PlanSummaryItem] = []
+    error: str | None = None
 
 
 class SearchResponse(BaseModel):
     results: list[SearchResultItem]
+    kb_generation: int = 0  # texts cached by chunk id are valid while this is unchanged
+
+
+CHUNKS_MAX_IDS = 200
+
+
+class ChunksResponse(BaseModel):
+    chunks: list[SearchResultItem]
+    kb_generation: int = 0
+
+
+class BatchSearchResponse(BaseModel):
+    results: list[SearchResponse]
+
+
+class EmbeddingCacheStats(BaseModel):
+    model: str
+    dim: int
+    size: int
+    max_size: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+    hit_ratio: float
+
+
+class ResultCacheStats(BaseModel):
+    size: int
+    max_size: int
+    ttl_seconds: float
+    bytes: int
+    hits: int
+    misses: int
+    hit_ratio: float
+    kb_generation: int = 0
+
+
+class SemanticCacheStats(BaseModel):
+    size: int
+    max_size: int
+    ttl_seconds: float
+    threshold: float
+    scopes: int
+    hits: int
+    misses: int
+    hit_ratio: float
+
+
+class CacheFlushResponse(BaseModel):
+    flushed: int
+
+
+class VersionStatsItem(BaseModel):
+    version: str
+    documents: int
+    chunks: int
+    chunks_with_embedding: int
+    coverage: float
+
+
+class IndexInfoItem(BaseModel):
+    name: str
+    method: str
+
+
+class KbStatsResponse(BaseModel):
+    versions: list[VersionStatsItem]
+    indexes: list[IndexInfoItem]
+    ann_index_present: bool
+    total_chunks: int
+    refreshed_at: float | None = None
+    refresh_ms: int = 0
+    error: str | None = None
+    kb_generation: int = 0
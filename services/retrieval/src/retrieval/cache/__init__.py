@@ -0,0 +1,7 @@
+"""In-process caches for retrieval hot path."""
+from retrieval.cache.embedding_cache import QueryEmbeddingCache
+from retrieval.cache.keys import normalize_query
+from retrieval.cache.result_cache import SearchResultCache
+from retrieval.cache.semantic_cache import SemanticResultCache
+
+__all__ = ["QueryEmbeddingCache", "SearchResultCache", "SemanticResultCache", "normalize_query"]
@@ -0,0 +1,96 @@
+"""Bounded LRU + TTL cache of query embeddings (in-process)."""
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from retrieval.cache.keys import normalize_query
+from retrieval.metrics import (
+    EMBEDDING_CACHE_EVICTIONS,
+    EMBEDDING_CACHE_HITS,
+    EMBEDDING_CACHE_MISSES,
+    EMBEDDING_CACHE_SIZE,
+)
+
+
+class QueryEmbeddingCache:
+    """Query vectors keyed by (model, dim, normalized query). max_size=0 disables caching.
+
+    Not thread-safe: used from the event loop only.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 2048,
+        ttl_seconds: float = 3600.0,
+        model_name: str = "",
+        dim: int = 384,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._max_size = max(0, max_size)
+        self._ttl = ttl_seconds
+        self._model_name = model_name
+        self._dim = dim
+        self._clock = clock
+        self._entries: OrderedDict[tuple[str, int, str], tuple[float, list[float]]] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_size > 0
+
+    def _key(self, query: str) -> tuple[str, int, str]:
+        return (self._model_name, self._dim, normalize_query(query))
+
+    def get(self, query: str) -> list[float] | None:
+        if not self.enabled:
+            return None
+        key = self._key(query)
+        entry = self._entries.get(key)
+        if entry is not None:
+            stored_at, vector = entry
+            if self._ttl > 0 and self._clock() - stored_at > self._ttl:
+                del self._entries[key]
+                EMBEDDING_CACHE_EVICTIONS.labels(reason="ttl").inc()
+                EMBEDDING_CACHE_SIZE.set(len(self._entries))
+            else:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                EMBEDDING_CACHE_HITS.inc()
+                return vector
+        self._misses += 1
+        EMBEDDING_CACHE_MISSES.inc()
+        return None
+
+    def put(self, query: str, vector: list[float]) -> None:
+        if not self.enabled:
+            return
+        key = self._key(query)
+        self._entries[key] = (self._clock(), vector)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+            EMBEDDING_CACHE_EVICTIONS.labels(reason="size").inc()
+        EMBEDDING_CACHE_SIZE.set(len(self._entries))
+
+    def clear(self) -> int:
+        """Drop all entries; returns number of entries removed."""
+        n = len(self._entries)
+        self._entries.clear()
+        if n:
+            EMBEDDING_CACHE_EVICTIONS.labels(reason="flush").inc(n)
+        EMBEDDING_CACHE_SIZE.set(0)
+        return n
+
+    def stats(self) -> dict:
+        total = self._hits + self._misses
+        return {
+            "model": self._model_name,
+            "dim": self._dim,
+            "size": len(self._entries),
+            "max_size": self._max_size,
+            "ttl_seconds": self._ttl,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_ratio": (self._hits / total) if total else 0.0,
+        }
@@ -0,0 +1,8 @@
+"""Cache key helpers."""
+import unicodedata
+
+
+def normalize_query(query: str) -> str:
+    """Normalize query text for cache keys: NFKC, casefold, collapse whitespace."""
+    text = unicodedata.normalize("NFKC", query or "")
+    return " ".join(text.casefold().split())
@@ -0,0 +1,147 @@
+"""Search result cache keyed by (query, version, top_k, mode), stamped with KB generation."""
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Hashable
+
+from retrieval.cache.keys import normalize_query
+from retrieval.metrics import (
+    RESULT_CACHE_BYTES,
+    RESULT_CACHE_ENTRIES,
+    RESULT_CACHE_HIT_RATIO,
+    RESULT_CACHE_HITS,
+    RESULT_CACHE_INVALIDATIONS,
+    RESULT_CACHE_MISSES,
+)
+from retrieval.storage.base import SearchResult
+
+# Rough per-object overhead of a SearchResult (dataclass + short strings), bytes
+_RESULT_OVERHEAD = 400
+
+
+def estimate_results_size(results: list[SearchResult]) -> int:
+    """Approximate memory footprint of a result list (text dominates)."""
+    size = sys.getsizeof(results)
+    for r in results:
+        size += _RESULT_OVERHEAD + len(r.text.encode("utf-8"))
+    return size
+
+
+@dataclass
+class _Entry:
+    results: list[SearchResult]
+    generation: int
+    stored_at: float
+    size: int
+
+
+class SearchResultCache:
+    """LRU of final SearchResult lists. max_entries=0 disables caching.
+
+    Entries carry the KB generation of their version: a lookup with a newer generation
+    is a miss, and KbGenerationWatcher drops entries of changed versions eagerly.
+    Empty result lists are not cached (storage returns [] on DB errors too).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._max_entries = max(0, max_entries)
+        self._ttl = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[tuple, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_entries > 0
+
+    @staticmethod
+    def make_key(
+        query: str, version: str | None, top_k: int, mode: str, extra: Hashable = None
+    ) -> tuple:
+        return (normalize_query(query), version, top_k, mode, extra)
+
+    def get(self, key: tuple, generation: int) -> list[SearchResult] | None:
+        if not self.enabled:
+            return None
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.generation != generation:
+                self._drop(key, "generation")
+            elif self._ttl > 0 and self._clock() - entry.stored_at > self._ttl:
+                self._drop(key, "ttl")
+            else:
+                self._entries.move_to_end(key)
+                self._record(hit=True)
+                return list(entry.results)
+        self._record(hit=False)
+        return None
+
+    def put(self, key: tuple, generation: int, results: list[SearchResult]) -> None:
+        if not self.enabled or not results:
+            return
+        if key in self._entries:
+            self._drop(key, None)
+        entry = _Entry(list(results), generation, self._clock(), estimate_results_size(results))
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while len(self._entries) > self._max_entries:
+            oldest = next(iter(self._entries))
+            self._drop(oldest, "size")
+        self._update_gauges()
+
+    def invalidate_versions(self, versions: set[str]) -> int:
+        """Drop entries for the given KB versions (key[1] is the version)."""
+        keys = [k for k in self._entries if k[1] in versions]
+        for k in keys:
+            self._drop(k, "generation")
+        self._update_gauges()
+        return len(keys)
+
+    def clear(self) -> int:
+        n = len(self._entries)
+        if n:
+            RESULT_CACHE_INVALIDATIONS.labels(reason="flush").inc(n)
+        self._entries.clear()
+        self._bytes = 0
+        self._update_gauges()
+        return n
+
+    def stats(self) -> dict:
+        total = self._hits + self._misses
+        return {
+            "size": len(self._entries),
+            "max_size": self._max_entries,
+            "ttl_seconds": self._ttl,
+            "bytes": self._bytes,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_ratio": (self._hits / total) if total else 0.0,
+        }
+
+    def _drop(self, key: tuple, reason: str | None) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        if reason:
+            RESULT_CACHE_INVALIDATIONS.labels(reason=reason).inc()
+        self._update_gauges()
+
+    def _record(self, hit: bool) -> None:
+        if hit:
+            self._hits += 1
+            RESULT_CACHE_HITS.inc()
+        else:
+            self._misses += 1
+            RESULT_CACHE_MISSES.inc()
+        RESULT_CACHE_HIT_RATIO.set(self._hits / (self._hits + self._misses))
+
+    def _update_gauges(self) -> None:
+        RESULT_CACHE_ENTRIES.set(len(self._entries))
+        RESULT_CACHE_BYTES.set(self._bytes)
@@ -0,0 +1,179 @@
+"""Near-duplicate query cache: reuse results of a recent query with a very similar embedding."""
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Sequence
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from retrieval.metrics import (
+    SEMANTIC_CACHE_ENTRIES,
+    SEMANTIC_CACHE_HITS,
+    SEMANTIC_CACHE_INVALIDATIONS,
+    SEMANTIC_CACHE_MISSES,
+    SEMANTIC_CACHE_SIMILARITY,
+)
+from retrieval.storage.base import SearchResult
+
+
+@dataclass
+class _Entry:
+    results: list[SearchResult]
+    generation: int
+    stored_at: float
+
+
+@dataclass
+class _Scope:
+    """Unit query vectors of one scope in a growable matrix; free rows are zero (similarity 0)."""
+
+    vectors: np.ndarray
+    entries: dict[int, _Entry] = field(default_factory=dict)
+    free: list[int] = field(default_factory=list)
+
+    def add(self, vector: np.ndarray, entry: _Entry) -> int:
+        if not self.free:
+            n = len(self.vectors)
+            grown = np.zeros((max(8, 2 * n), self.vectors.shape[1]), dtype=np.float32)
+            grown[:n] = self.vectors
+            self.vectors = grown
+            self.free = list(range(len(grown) - 1, n - 1, -1))
+        slot = self.free.pop()
+        self.vectors[slot] = vector
+        self.entries[slot] = entry
+        return slot
+
+    def remove(self, slot: int) -> None:
+        del self.entries[slot]
+        self.vectors[slot] = 0.0
+        self.free.append(slot)
+
+
+class SemanticResultCache:
+    """LRU of SearchResult lists looked up by query embedding. max_entries=0 disables caching.
+
+    Entries live in scopes (version, top_k, mode, options), so results are only reused for
+    an equivalent request. A lookup is one matmul against the scope's cached unit vectors;
+    the best match is a hit if its cosine similarity is >= threshold. Entries carry the KB
+    generation of their version like SearchResultCache, and invalidate_versions drops whole
+    scopes (subscribe it to KbGenerationWatcher). The best similarity of every lookup goes
+    to retrieval_semantic_cache_similarity, labelled hit / miss, for tuning the threshold.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        threshold: float = 0.97,
+        ttl_seconds: float = 600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._max_entries = max(0, max_entries)
+        self._threshold = threshold
+        self._ttl = ttl_seconds
+        self._clock = clock
+        self._scopes: dict[tuple, _Scope] = {}
+        self._lru: OrderedDict[tuple[tuple, int], None] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_entries > 0
+
+    @staticmethod
+    def make_scope(version: str | None, top_k: int, mode: str, extra: Hashable = None) -> tuple:
+        return (version, top_k, mode, extra)
+
+    @staticmethod
+    def _unit(vector: Sequence[float]) -> np.ndarray:
+        v = np.asarray(vector, dtype=np.float32)
+        return v / max(float(np.linalg.norm(v)), 1e-12)
+
+    def get(self, scope: tuple, vector: Sequence[float], generation: int) -> list[SearchResult] | None:
+        if not self.enabled:
+            return None
+        s = self._scopes.get(scope)
+        if s is not None and s.entries:
+            sims = s.vectors @ self._unit(vector)
+            slot = int(np.argmax(sims))
+            similarity = float(sims[slot])
+            entry = s.entries.get(slot)
+            if entry is not None and similarity >= self._threshold:
+                if entry.generation != generation:
+                    self._drop(scope, slot, "generation")
+                elif self._ttl > 0 and self._clock() - entry.stored_at > self._ttl:
+                    self._drop(scope, slot, "ttl")
+                else:
+                    self._lru.move_to_end((scope, slot))
+                    self._record(similarity, hit=True)
+                    return list(entry.results)
+            self._record(similarity, hit=False)
+            return None
+        self._record(None, hit=False)
+        return None
+
+    def put(
+        self, scope: tuple, vector: Sequence[float], generation: int, results: list[SearchResult]
+    ) -> None:
+        if not self.enabled or not results:
+            return
+        unit = self._unit(vector)
+        s = self._scopes.get(scope)
+        if s is None:
+            s = self._scopes[scope] = _Scope(np.zeros((0, len(unit)), dtype=np.float32))
+        slot = s.add(unit, _Entry(list(results), generation, self._clock()))
+        self._lru[(scope, slot)] = None
+        while len(self._lru) > self._max_entries:
+            oldest_scope, oldest_slot = next(iter(self._lru))
+            self._drop(oldest_scope, oldest_slot, "size")
+        SEMANTIC_CACHE_ENTRIES.set(len(self._lru))
+
+    def invalidate_versions(self, versions: set[str]) -> int:
+        """Drop the scopes of the given KB versions (scope[0] is the version)."""
+        n = 0
+        for scope in [sc for sc in self._scopes if sc[0] in versions]:
+            for slot in list(self._scopes[scope].entries):
+                self._drop(scope, slot, "generation")
+                n += 1
+        return n
+
+    def clear(self) -> int:
+        n = len(self._lru)
+        if n:
+            SEMANTIC_CACHE_INVALIDATIONS.labels(reason="flush").inc(n)
+        self._scopes.clear()
+        self._lru.clear()
+        SEMANTIC_CACHE_ENTRIES.set(0)
+        return n
+
+    def stats(self) -> dict:
+        total = self._hits + self._misses
+        return {
+            "size": len(self._lru),
+            "max_size": self._max_entries,
+            "ttl_seconds": self._ttl,
+            "threshold": self._threshold,
+            "scopes": len(self._scopes),
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_ratio": (self._hits / total) if total else 0.0,
+        }
+
+    def _drop(self, scope: tuple, slot: int, reason: str) -> None:
+        s = self._scopes[scope]
+        s.remove(slot)
+        if not s.entries:
+            del self._scopes[scope]
+        del self._lru[(scope, slot)]
+        SEMANTIC_CACHE_INVALIDATIONS.labels(reason=reason).inc()
+        SEMANTIC_CACHE_ENTRIES.set(len(self._lru))
+
+    def _record(self, similarity: float | None, hit: bool) -> None:
+        if hit:
+            self._hits += 1
+            SEMANTIC_CACHE_HITS.inc()
+        else:
+            self._misses += 1
+            SEMANTIC_CACHE_MISSES.inc()
+        if similarity is not None:
+            SEMANTIC_CACHE_SIMILARITY.labels(result="hit" if hit else "miss").observe(similarity)
@@ -0,0 +1,4 @@
+"""Offline quality checks for retrieval indexes."""
+from retrieval.eval.recall import recall_at_k, recall_report
+
+__all__ = ["recall_at_k", "recall_report"]
@@ -0,0 +1,114 @@
+"""NumPy model of compact vector representations: search functions for recall_report and storage size.
+
+halfvec rounds every component to float16; binary keeps one bit per component (x > 0, as
+pgvector binary_quantize) and ranks by Hamming distance; pca<d> projects onto the top d
+principal axes (shared.pca, as fitted by ingest). Rescoring re-ranks the best
+k * rescore_factor candidates by the float32 distance, as PgVectorStorage does in SQL.
+"""
+import numpy as np
+
+from shared.pca import PcaProjection
+
+from retrieval.eval.recall import SearchFn
+from retrieval.storage.vector_index import VersionIndex, distances, top_k
+
+MODES = ("none", "halfvec", "binary")
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+# pgvector on-disk header: vector/halfvec 4 (varlena) + 2 (dim) + 2 (unused); bit 4 (varlena) + 4 (length)
+_HEADER_BYTES = 8
+
+
+def bytes_per_vector(mode: str, dim: int) -> int:
+    """Stored size of one embedding in the given representation (heap tuple / index element)."""
+    if mode == "halfvec":
+        return _HEADER_BYTES + 2 * dim
+    if mode == "binary":
+        return _HEADER_BYTES + (dim + 7) // 8
+    if mode.startswith("pca"):
+        return _HEADER_BYTES + 4 * int(mode[3:])
+    return _HEADER_BYTES + 4 * dim
+
+
+def extra_bytes_per_vector(mode: str, dim: int) -> int:
+    """Storage a mode adds per row next to the float4 embedding, which ingest keeps for rescoring.
+
+    halfvec / binary: ingest writes both compact columns (migration 011) plus the HNSW index
+    element of the scanned one; pca<d>: embedding_pca and its index. The float4 column and
+    its index are counted as kept, so this is never a saving.
+    """
+    if mode in ("halfvec", "binary"):
+        columns = bytes_per_vector("halfvec", dim) + bytes_per_vector("binary", dim)
+        return columns + bytes_per_vector(mode, dim)
+    if mode.startswith("pca"):
+        return 2 * bytes_per_vector(mode, dim)
+    return 0
+
+
+def _rescore(base: VersionIndex, queries: np.ndarray, candidates: np.ndarray, k: int, distance: str) -> np.ndarray:
+    out = np.full((len(queries), k), -1, dtype=np.int64)
+    for qi, rows in enumerate(candidates):
+        dist = distances(queries[qi:qi + 1], base.matrix[rows], base.sq_norms[rows], distance)
+        idx, _ = top_k(dist, k)
+        out[qi, :idx.shape[1]] = rows[idx[0]]
+    return out
+
+
+def halfvec_search(base: VersionIndex, distance: str = "l2", rescore_factor: int = 1) -> SearchFn:
+    half = np.asarray(base.matrix, dtype=np.float16).astype(np.float32)
+    half_sq = np.einsum("ij,ij->i", half, half)
+
+    def search(queries: np.ndarray, k: int) -> np.ndarray:
+        q = queries.astype(np.float16).astype(np.float32)
+        idx, _ = top_k(distances(q, half, half_sq, distance), k * max(1, rescore_factor))
+        return _rescore(base, queries, idx, k, distance) if rescore_factor > 1 else idx
+
+    return search
+
+
+def binary_search(base: VersionIndex, distance: str = "l2", rescore_factor: int = 1) -> SearchFn:
+    codes = np.packbits(np.asarray(base.matrix) > 0, axis=1)
+
+    def search(queries: np.ndarray, k: int) -> np.ndarray:
+        q_codes = np.packbits(queries > 0, axis=1)
+        hamming = np.stack([_POPCOUNT[codes ^ q].sum(axis=1, dtype=np.int32) for q in q_codes])
+        idx, _ = top_k(hamming, k * max(1, rescore_factor))
+        return _rescore(base, queries, idx, k, distance) if rescore_factor > 1 else idx
+
+    return search
+
+
+def pca_search(
+    base: VersionIndex, projection: PcaProjection, distance: str = "l2", rescore_factor: int = 1
+) -> SearchFn:
+    reduced = projection.transform(base.matrix)
+    reduced_sq = np.einsum("ij,ij->i", reduced, reduced)
+
+    def search(queries: np.ndarray, k: int) -> np.ndarray:
+        dist = distances(projection.transform(queries), reduced, reduced_sq, distance)
+        idx, _ = top_k(dist, k * max(1, rescore_factor))
+        return _rescore(base, queries, idx, k, distance) if rescore_factor > 1 else idx
+
+    return search
+
+
+def quantization_searches(
+    base: VersionIndex,
+    distance: str = "l2",
+    rescore_factors: tuple[int, ...] = (1, 4, 10),
+    pca_dims: tuple[int, ...] = (),
+) -> dict[str, SearchFn]:
+    """Named searches for recall_report: each mode (halfvec, binary, pca<d>) without and with rescoring.
+
+    PCA is fitted once per dimension and shared by its rescore factors.
+    """
+    searches: dict[str, SearchFn] = {}
+    pca_dims = tuple(d for d in pca_dims if 0 < d < base.matrix.shape[1] and d < base.size)
+    projections = {d: PcaProjection.fit(base.matrix, d) for d in pca_dims}
+    for factor in rescore_factors:
+        suffix = "" if factor <= 1 else f"+rescore x{factor}"
+        searches[f"halfvec{suffix}"] = halfvec_search(base, distance, factor)
+        searches[f"binary{suffix}"] = binary_search(base, distance, factor)
+        for dim_out in pca_dims:
+            projection = projections[dim_out]
+            searches[f"pca{dim_out}{suffix}"] = pca_search(base, projection, distance, factor)
+    return searches
@@ -0,0 +1,45 @@
+"""recall@k of approximate search against exact search over the same VersionIndex."""
+import time
+from typing import Callable
+
+import numpy as np
+
+from retrieval.storage.vector_index import VersionIndex, nearest
+
+# queries (m, dim), k -> (m, k) row indices into VersionIndex.rows, -1 = no result
+SearchFn = Callable[[np.ndarray, int], np.ndarray]
+
+
+def recall_at_k(approx: np.ndarray, exact: np.ndarray) -> float:
+    """Mean fraction of each exact top-k row found in the approximate top-k."""
+    if exact.size == 0:
+        return 1.0
+    hits = sum(len(set(a.tolist()) & set(e.tolist())) for a, e in zip(approx, exact))
+    return hits / exact.size
+
+
+def sample_queries(base: VersionIndex, n: int = 200, seed: int = 0) -> np.ndarray:
+    """Chunk vectors as queries (self-queries): realistic distribution without an embedder."""
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(base.size, size=min(n, base.size), replace=False)
+    return np.asarray(base.matrix[np.sort(rows)], dtype=np.float32)
+
+
+def recall_report(
+    base: VersionIndex,
+    queries: np.ndarray,
+    searches: dict[str, SearchFn],
+    k: int = 10,
+    distance: str = "l2",
+) -> list[dict]:
+    """One row per named search: recall@k vs exact, mean latency per query (ms)."""
+    t0 = time.perf_counter()
+    exact, _ = nearest(base, queries, k, distance)
+    exact_ms = (time.perf_counter() - t0) * 1000 / max(1, len(queries))
+    report = [{"name": "exact", "recall": 1.0, "ms_per_query": round(exact_ms, 3)}]
+    for name, search in searches.items():
+        t0 = time.perf_counter()
+        approx = search(queries, k)
+        ms = (time.perf_counter() - t0) * 1000 / max(1, len(queries))
+        report.append({"name": name, "recall": round(recall_at_k(approx, exact), 4), "ms_per_query": round(ms, 3)})
+    return report
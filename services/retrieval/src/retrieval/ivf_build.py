@@ -0,0 +1,86 @@
+"""Build IVF indexes offline from retrieval.chunks and report recall@k against exact search.
+
+    python -m retrieval.ivf_build                       # all versions, RETRIEVAL_IVF_NLIST lists
+    python -m retrieval.ivf_build --version "6.1 (latest)" --nlist 512 --nprobe 1,4,8,16,32
+"""
+import argparse
+import asyncio
+import json
+import sys
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from retrieval.config import RetrievalSettings
+from retrieval.eval.recall import recall_report, sample_queries
+from retrieval.service.kb_generation import KbGenerationWatcher
+from retrieval.storage.ivf import IvfIndex, IvfStore
+from retrieval.storage.numpy_storage import NumpyStorage
+
+
+def _ivf_search(ivf: IvfIndex, positions: np.ndarray, nprobe: int, distance: str):
+    """recall_report search function: IVF ids mapped back to positions in the exact index."""
+
+    def search(queries: np.ndarray, k: int) -> np.ndarray:
+        idx, _ = ivf.search(queries, k, nprobe, distance)
+        return np.where(idx >= 0, positions[np.maximum(idx, 0)], -1)
+
+    return search
+
+
+async def build(args: argparse.Namespace, settings: RetrievalSettings) -> int:
+    engine = create_async_engine(settings.database_url)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        generations = await KbGenerationWatcher(session_factory, poll_seconds=0).fetch()
+        storage = NumpyStorage(session_factory, dim=settings.embedding_dim)
+        await storage.load()
+    finally:
+        await engine.dispose()
+    store = IvfStore(settings.ivf_dir, model_name=settings.embedder_model_name, dim=settings.embedding_dim)
+    versions = args.version or sorted(storage.versions)
+    nprobes = [int(p) for p in args.nprobe.split(",") if p]
+    for version in versions:
+        base = storage.get_index(version)
+        if base is None or not base.size:
+            print(f"{version}: no embedded chunks, skipped", file=sys.stderr)
+            continue
+        if version not in generations:
+            print(f"{version}: not in retrieval.kb_generation, skipped", file=sys.stderr)
+            continue
+        ivf = await asyncio.to_thread(IvfIndex.train, base, args.nlist or settings.ivf_nlist, args.iters)
+        path = store.save(ivf, generations[version])
+        print(f"{version}: {base.size} rows, {ivf.nlist} lists -> {path}", file=sys.stderr)
+        if args.k:
+            positions = ivf.base_positions(base)
+            report = recall_report(
+                base,
+                sample_queries(base, args.queries),
+                {
+                    f"nprobe={p}": _ivf_search(ivf, positions, p, settings.vector_distance)
+                    for p in nprobes
+                },
+                k=args.k,
+                distance=settings.vector_distance,
+            )
+            print(json.dumps({"version": version, "k": args.k, "report": report}, ensure_ascii=False))
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--version", action="append", help="KB version (repeatable; default: all)")
+    parser.add_argument("--nlist", type=int, default=0, help="lists (default RETRIEVAL_IVF_NLIST, 0 = 4*sqrt(n))")
+    parser.add_argument("--iters", type=int, default=20, help="k-means iterations")
+    parser.add_argument("--k", type=int, default=10, help="recall@k check (0 = skip)")
+    parser.add_argument("--nprobe", default="1,4,8,16,32", help="nprobe values for the recall check")
+    parser.add_argument("--queries", type=int, default=200, help="sampled chunk vectors used as queries")
+    args = parser.parse_args()
+    settings = RetrievalSettings()
+    if not settings.ivf_dir:
+        parser.error("RETRIEVAL_IVF_DIR is not set")
+    sys.exit(asyncio.run(build(args, settings)))
+
+
+if __name__ == "__main__":
+    main()
@@ -14,10 +14,25 @@ from shared.schemas import HealthResponse
 
 from shared.embedder import Embedder
 
-from retrieval.api.routes import router
+from retrieval.api.routes import admin_router, router
+from retrieval.cache import QueryEmbeddingCache, SearchResultCache, SemanticResultCache
 from retrieval.config import RetrievalSettings
-from retrieval.service import SearchService
+from retrieval.service import (
+    KbGenerationWatcher,
+    KbStatsCollector,
+    MicroBatchEmbeddingExecutor,
+    QueryEncoder,
+    SearchService,
+)
+from retrieval.storage.bm25 import Bm25Storage
+from retrieval.storage.chunks import ChunkReader
+from retrieval.storage.ivf import IvfStore
+from retrieval.storage.ivf_storage import IvfStorage
+from retrieval.storage.neighbors import NeighborExpander
+from retrieval.storage.numpy_storage import NumpyStorage
+from retrieval.storage.snapshot import SnapshotStore
 from retrieval.storage.pgvector_storage import PgVectorStorage
+from retrieval.storage.replicas import Replica, ReplicaRouter
 
 _settings: RetrievalSettings | None = None
 _app: FastAPI | None = None
@@ -76,16 +91,190 @@ async def lifespan(app: FastAPI):
         model_name=settings.embedder_model_name,
         dim=settings.embedding_dim,
     )
-    storage = PgVectorStorage(
-        session_factory,
-        embedder=embedder,
+    embedding_cache = QueryEmbeddingCache(
+        max_size=settings.embedding_cache_size,
+        ttl_seconds=settings.embedding_cache_ttl_seconds,
+        model_name=settings.embedder_model_name,
+        dim=settings.embedding_dim,
+    )
+    embedding_executor: MicroBatchEmbeddingExecutor | None = None
+    if settings.embedding_executor_enabled:
+        embedding_executor = MicroBatchEmbeddingExecutor(
+            embedder,
+            max_batch_size=settings.embedding_max_batch_size,
+            max_wait_ms=settings.embedding_max_wait_ms,
+            workers=settings.embedding_workers,
+        )
+        await embedding_executor.start()
+    kb_generation = KbGenerationWatcher(
+        session_factory, poll_seconds=settings.kb_generation_poll_seconds
+    )
+    query_encoder = QueryEncoder(embedder, cache=embedding_cache, executor=embedding_executor)
+    storage: PgVectorStorage | ReplicaRouter | NumpyStorage | Bm25Storage
+    replica_router: ReplicaRouter | None = None
+    replica_engines = []
+    backend = settings.storage_backend.lower()
+    if settings.retrieval_mode.lower() == "bm25":
+        storage = Bm25Storage(
+            session_factory,
+            kb_latest_version=settings.kb_latest_version,
+            min_score=settings.bm25_min_score,
+            k1=settings.bm25_k1,
+            b=settings.bm25_b,
+        )
+    elif backend in ("numpy", "ivf"):
+        if settings.retrieval_mode.lower() != "vector":
+            log.warning(
+                "in_memory_backend_vector_only",
+                msg=f"RETRIEVAL_MODE={settings.retrieval_mode} ignored: {backend} backend does vector search only.",
+            )
+        in_memory_kwargs = dict(
+            min_score=settings.min_score,
+            kb_latest_version=settings.kb_latest_version,
+            query_encoder=query_encoder,
+            vector_distance=settings.vector_distance,
+            dim=settings.embedding_dim,
+            mmr_lambda=settings.mmr_lambda,
+            mmr_candidates=settings.mmr_candidates,
+            snapshot=(
+                SnapshotStore(
+                    settings.snapshot_dir,
+                    model_name=settings.embedder_model_name,
+                    dim=settings.embedding_dim,
+                )
+                if settings.snapshot_dir
+                else None
+            ),
+            kb_generation=kb_generation,
+        )
+        if backend == "ivf":
+            if not settings.ivf_dir:
+                raise RuntimeError("RETRIEVAL_STORAGE_BACKEND=ivf requires RETRIEVAL_IVF_DIR")
+            storage = IvfStorage(
+                session_factory,
+                ivf_store=IvfStore(
+                    settings.ivf_dir,
+                    model_name=settings.embedder_model_name,
+                    dim=settings.embedding_dim,
+                ),
+                nprobe=settings.ivf_nprobe,
+                nlist=settings.ivf_nlist,
+                build_missing=settings.ivf_build_missing,
+                **in_memory_kwargs,
+            )
+        else:
+            storage = NumpyStorage(session_factory, **in_memory_kwargs)
+    else:
+        pg_kwargs = dict(
+            embedder=embedder,
+            retrieval_mode=settings.retrieval_mode,
+            min_score=settings.min_score,
+            kb_latest_version=settings.kb_latest_version,
+            query_encoder=query_encoder,
+            text_search_config=settings.text_search_config,
+            hybrid_vector_weight=settings.hybrid_vector_weight,
+            hybrid_lexical_weight=settings.hybrid_lexical_weight,
+            hybrid_rrf_k=settings.hybrid_rrf_k,
+            hybrid_candidates=settings.hybrid_candidates,
+            vector_distance=settings.vector_distance,
+            hnsw_ef_search=settings.hnsw_ef_search,
+            ivfflat_probes=settings.ivfflat_probes,
+            word_similarity_threshold=settings.text_word_similarity,
+            per_version_indexes=settings.per_version_indexes,
+            quantization=settings.vector_quantization,
+            rescore_factor=settings.quantization_rescore_factor,
+            pca=settings.pca_search,
+            hierarchical=settings.hierarchical,
+            hierarchical_top_n=settings.hierarchical_top_n,
+            overfetch=settings.overfetch,
+            overfetch_max=settings.overfetch_max,
+            mmr_lambda=settings.mmr_lambda,
+            mmr_candidates=settings.mmr_candidates,
+        )
+        storage = PgVectorStorage(session_factory, **pg_kwargs)
+        if settings.replica_urls:
+            replicas = []
+            for i, url in enumerate(settings.replica_urls):
+                replica_engine = create_async_engine(url, echo=False)
+                replica_engines.append(replica_engine)
+                replica_sessions = async_sessionmaker(
+                    replica_engine, class_=AsyncSession, expire_on_commit=False
+                )
+                replicas.append(
+                    Replica(
+                        name=f"replica{i}",
+                        storage=PgVectorStorage(replica_sessions, raise_on_error=True, **pg_kwargs),
+                        generations=KbGenerationWatcher(replica_sessions, poll_seconds=0),
+                    )
+                )
+            replica_router = ReplicaRouter(
+                storage,
+                replicas,
+                kb_generation=kb_generation,
+                kb_latest_version=settings.kb_latest_version,
+                policy=settings.replica_policy,
+                poll_seconds=settings.replica_poll_seconds,
+                retry_seconds=settings.replica_retry_seconds,
+            )
+            storage = replica_router
+    if settings.replica_urls and replica_router is None:
+        log.warning(
+            "replica_urls_ignored",
+            msg=f"RETRIEVAL_REPLICA_URLS ignored: {backend} backend / {settings.retrieval_mode} mode do not query the DB per search.",
+        )
+    result_cache = SearchResultCache(
+        max_entries=settings.result_cache_size,
+        ttl_seconds=settings.result_cache_ttl_seconds,
+    )
+    semantic_cache = SemanticResultCache(
+        max_entries=settings.semantic_cache_size,
+        threshold=settings.semantic_cache_threshold,
+        ttl_seconds=settings.semantic_cache_ttl_seconds,
+    )
+    kb_stats = KbStatsCollector(
+        session_factory, refresh_seconds=settings.kb_stats_refresh_seconds
+    )
+    # Subscribed first: caches are invalidated only after the new indexes / projections are in place
+    kb_generation.subscribe(storage.reload)
+    kb_generation.subscribe(result_cache.invalidate_versions)
+    kb_generation.subscribe(semantic_cache.invalidate_versions)
+    kb_generation.subscribe(kb_stats.refresh)
+    await kb_generation.start()
+    if replica_router is not None:
+        await replica_router.start()
+    if isinstance(storage, (NumpyStorage, Bm25Storage)) and not storage.versions:
+        # kb_generation missing or empty: initial refresh loaded nothing
+        await storage.load()
+    await kb_stats.start()
+    app.state.search_service = SearchService(
+        storage,
+        result_cache=result_cache,
+        kb_generation=kb_generation,
         retrieval_mode=settings.retrieval_mode,
-        min_score=settings.min_score,
-        kb_latest_version=settings.kb_latest_version,
+        default_version=settings.kb_latest_version,
+        neighbor_expander=NeighborExpander(session_factory),
+        version_fallback=settings.version_fallback,
+        version_fallback_penalty=settings.version_fallback_penalty,
+        semantic_cache=semantic_cache,
+        # Query vectors are computed anyway in vector / hybrid modes only
+        query_encoder=query_encoder if settings.retrieval_mode.lower() in ("vector", "hybrid") else None,
     )
-    app.state.search_service = SearchService(storage)
+    app.state.embedding_cache = embedding_cache
+    app.state.result_cache = result_cache
+    app.state.semantic_cache = semantic_cache
+    app.state.chunk_reader = ChunkReader(session_factory)
+    app.state.kb_generation = kb_generation
+    app.state.kb_stats = kb_stats
     app.state.engine = engine
     yield
+    await kb_stats.stop()
+    await kb_generation.stop()
+    if replica_router is not None:
+        await replica_router.stop()
+    if embedding_executor is not None:
+        await embedding_executor.stop()
+    for replica_engine in replica_engines:
+        await replica_engine.dispose()
     await engine.dispose()
 
 
@@ -96,6 +285,7 @@ def create_app() -> FastAPI:
     app.add_middleware(RequestIdMiddleware)
 
     app.include_router(router)
+    app.include_router(admin_router)
 
     metrics_app = make_asgi_app()
     app.mount("/metrics", metrics_app)
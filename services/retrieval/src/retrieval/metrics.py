@@ -0,0 +1,186 @@
+"""Prometheus metrics for retrieval service (exposed on /metrics)."""
+from prometheus_client import Counter, Gauge, Histogram
+
+EMBEDDING_CACHE_HITS = Counter(
+    "retrieval_embedding_cache_hits_total",
+    "Query embedding cache hits",
+)
+EMBEDDING_CACHE_MISSES = Counter(
+    "retrieval_embedding_cache_misses_total",
+    "Query embedding cache misses (model forward pass required)",
+)
+EMBEDDING_CACHE_EVICTIONS = Counter(
+    "retrieval_embedding_cache_evictions_total",
+    "Query embedding cache evictions",
+    ["reason"],  # size | ttl | flush
+)
+EMBEDDING_CACHE_SIZE = Gauge(
+    "retrieval_embedding_cache_entries",
+    "Number of query vectors currently cached",
+)
+
+RESULT_CACHE_HITS = Counter(
+    "retrieval_result_cache_hits_total",
+    "Search result cache hits",
+)
+RESULT_CACHE_MISSES = Counter(
+    "retrieval_result_cache_misses_total",
+    "Search result cache misses",
+)
+RESULT_CACHE_INVALIDATIONS = Counter(
+    "retrieval_result_cache_invalidations_total",
+    "Search result cache entries dropped",
+    ["reason"],  # generation | size | ttl | flush
+)
+RESULT_CACHE_ENTRIES = Gauge(
+    "retrieval_result_cache_entries",
+    "Number of cached search result lists",
+)
+RESULT_CACHE_BYTES = Gauge(
+    "retrieval_result_cache_bytes",
+    "Approximate memory held by cached search results",
+)
+RESULT_CACHE_HIT_RATIO = Gauge(
+    "retrieval_result_cache_hit_ratio",
+    "Result cache hit ratio since process start",
+)
+
+SEMANTIC_CACHE_HITS = Counter(
+    "retrieval_semantic_cache_hits_total",
+    "Searches answered from a cached near-duplicate query",
+)
+SEMANTIC_CACHE_MISSES = Counter(
+    "retrieval_semantic_cache_misses_total",
+    "Semantic cache lookups without a similar enough cached query",
+)
+SEMANTIC_CACHE_INVALIDATIONS = Counter(
+    "retrieval_semantic_cache_invalidations_total",
+    "Semantic cache entries dropped",
+    ["reason"],  # generation | size | ttl | flush
+)
+SEMANTIC_CACHE_ENTRIES = Gauge(
+    "retrieval_semantic_cache_entries",
+    "Query embeddings held by the semantic cache",
+)
+SEMANTIC_CACHE_SIMILARITY = Histogram(
+    "retrieval_semantic_cache_similarity",
+    "Cosine similarity of the nearest cached query per lookup",
+    ["result"],  # hit | miss
+    buckets=(0.5, 0.7, 0.8, 0.85, 0.9, 0.92, 0.94, 0.95, 0.96, 0.97, 0.98, 0.99, 1.0),
+)
+
+KB_CHUNKS = Gauge(
+    "retrieval_kb_chunks",
+    "Chunks in knowledge base per version",
+    ["version"],
+)
+KB_CHUNKS_EMBEDDED = Gauge(
+    "retrieval_kb_chunks_embedded",
+    "Chunks with embedding per version",
+    ["version"],
+)
+KB_EMBEDDING_COVERAGE = Gauge(
+    "retrieval_kb_embedding_coverage",
+    "Share of chunks with embedding per version (0..1)",
+    ["version"],
+)
+KB_INDEX_PRESENT = Gauge(
+    "retrieval_kb_index_present",
+    "Index on retrieval.chunks present (1) by name and access method",
+    ["index", "method"],
+)
+KB_ANN_INDEX_PRESENT = Gauge(
+    "retrieval_kb_ann_index_present",
+    "Approximate nearest neighbour index (ivfflat/hnsw) on chunks.embedding present",
+)
+
+EMBEDDING_QUEUE_DEPTH = Histogram(
+    "retrieval_embedding_queue_depth",
+    "Texts waiting for the embedding executor, observed on each enqueue and each batch taken",
+    buckets=(0, 1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+EMBEDDING_BATCH_SIZE = Histogram(
+    "retrieval_embedding_batch_size",
+    "Texts per embedder call made by the micro-batching executor",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+EMBEDDING_WAIT_SECONDS = Histogram(
+    "retrieval_embedding_wait_seconds",
+    "Time a text waited in the queue before its batch started",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+EMBEDDING_ENCODE_SECONDS = Histogram(
+    "retrieval_embedding_encode_seconds",
+    "Embedder call duration per micro-batch",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+NUMPY_INDEX_ROWS = Gauge(
+    "retrieval_numpy_index_rows",
+    "Chunks held in the in-memory vector index (storage_backend=numpy)",
+    ["version"],
+)
+NUMPY_INDEX_BYTES = Gauge(
+    "retrieval_numpy_index_bytes",
+    "Memory held by in-memory vector matrices",
+    ["version"],
+)
+NUMPY_INDEX_LOADS = Counter(
+    "retrieval_numpy_index_loads_total",
+    "Per-version in-memory index loads",
+    ["source"],  # snapshot (memory-mapped file) | db (built from Postgres)
+)
+IVF_INDEX_PRESENT = Gauge(
+    "retrieval_ivf_index_present",
+    "1 if the version is served by an IVF index of its current generation, 0 if exact fallback",
+    ["version"],
+)
+
+BM25_INDEX_DOCS = Gauge(
+    "retrieval_bm25_index_docs",
+    "Chunks in the in-memory BM25 index (RETRIEVAL_MODE=bm25)",
+    ["version"],
+)
+BM25_INDEX_TERMS = Gauge(
+    "retrieval_bm25_index_terms",
+    "Distinct terms in the in-memory BM25 index",
+    ["version"],
+)
+
+SEARCH_ROWS_FETCHED = Histogram(
+    "retrieval_search_rows_fetched",
+    "Candidate rows read from Postgres per search (all fetch rounds)",
+    ["mode"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+SEARCH_ROWS_RETURNED = Histogram(
+    "retrieval_search_rows_returned",
+    "Results returned per search after min_score and top_k",
+    ["mode"],
+    buckets=(0, 1, 2, 3, 5, 10, 20),
+)
+SEARCH_REFETCHES = Counter(
+    "retrieval_search_refetches_total",
+    "Vector searches re-queried with a larger LIMIT because too few rows passed min_score",
+)
+
+REPLICA_SEARCHES = Counter(
+    "retrieval_replica_searches_total",
+    "Storage searches by database that served them",
+    ["target"],  # primary | replica name
+)
+REPLICA_FALLBACKS = Counter(
+    "retrieval_replica_fallbacks_total",
+    "Searches sent to the primary although replicas are configured",
+    ["reason"],  # lag | unavailable | error
+)
+REPLICA_LAG = Gauge(
+    "retrieval_replica_lag_generations",
+    "KB generations the replica is behind the primary (sum over versions)",
+    ["replica"],
+)
+REPLICA_UP = Gauge(
+    "retrieval_replica_up",
+    "1 if the replica is reachable and not in its post-failure cooldown",
+    ["replica"],
+)
@@ -0,0 +1,73 @@
+"""Report storage added and recall@k lost by halfvec / binary quantization and PCA, per KB version.
+
+    python -m retrieval.quantization_report                        # all versions
+    python -m retrieval.quantization_report --version "6.1 (latest)" --rescore 1,4,10 --pca-dims 64,128 --k 10
+
+Vectors are loaded from retrieval.chunks; each representation is modelled in NumPy
+(retrieval.eval.quantization), without building pgvector indexes. extra_mb is the storage
+the mode adds (compact columns and the index on them): ingest keeps writing the float4
+embedding for rescoring, so no mode frees space.
+"""
+import argparse
+import asyncio
+import json
+import sys
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from retrieval.config import RetrievalSettings
+from retrieval.eval.quantization import (
+    bytes_per_vector,
+    extra_bytes_per_vector,
+    quantization_searches,
+)
+from retrieval.eval.recall import recall_report, sample_queries
+from retrieval.storage.numpy_storage import NumpyStorage
+
+
+async def report(args: argparse.Namespace, settings: RetrievalSettings) -> int:
+    engine = create_async_engine(settings.database_url)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        storage = NumpyStorage(session_factory, dim=settings.embedding_dim)
+        await storage.load()
+    finally:
+        await engine.dispose()
+    factors = tuple(int(f) for f in args.rescore.split(",") if f)
+    pca_dims = tuple(int(d) for d in args.pca_dims.split(",") if d)
+    dim = settings.embedding_dim
+    for version in args.version or sorted(storage.versions):
+        base = storage.get_index(version)
+        if base is None or not base.size:
+            print(f"{version}: no embedded chunks, skipped", file=sys.stderr)
+            continue
+        rows = recall_report(
+            base,
+            sample_queries(base, args.queries),
+            quantization_searches(base, settings.vector_distance, factors, pca_dims),
+            k=args.k,
+            distance=settings.vector_distance,
+        )
+        for row in rows:
+            mode = row["name"].split("+", 1)[0]
+            mode = mode if mode != "exact" else "none"
+            row["bytes_per_vector"] = bytes_per_vector(mode, dim)
+            row["extra_mb"] = round(extra_bytes_per_vector(mode, dim) * base.size / 2**20, 2)
+            row["recall_lost"] = round(1.0 - row["recall"], 4)
+        print(json.dumps({"version": version, "rows": base.size, "k": args.k, "report": rows}, ensure_ascii=False))
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--version", action="append", help="KB version (repeatable; default: all)")
+    parser.add_argument("--k", type=int, default=10, help="recall@k")
+    parser.add_argument("--rescore", default="1,4,10", help="rescore factors (1 = quantized order only)")
+    parser.add_argument("--pca-dims", default="64,128", help="PCA target dims to compare (empty = none)")
+    parser.add_argument("--queries", type=int, default=200, help="sampled chunk vectors used as queries")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(report(args, RetrievalSettings())))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,13 @@
+from retrieval.service.embedding_executor import MicroBatchEmbeddingExecutor
+from retrieval.service.kb_generation import KbGenerationWatcher
+from retrieval.service.kb_stats import KbStatsCollector
+from retrieval.service.query_encoder import QueryEncoder
 from retrieval.service.search_service import SearchService
 
-__all__ = ["SearchService"]
+__all__ = [
+    "KbGenerationWatcher",
+    "KbStatsCollector",
+    "MicroBatchEmbeddingExecutor",
+    "QueryEncoder",
+    "SearchService",
+]
@@ -0,0 +1,135 @@
+"""Micro-batching embedding executor: runs the blocking embedder off the event loop."""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from retrieval.metrics import (
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_ENCODE_SECONDS,
+    EMBEDDING_QUEUE_DEPTH,
+    EMBEDDING_WAIT_SECONDS,
+)
+
+_Item = tuple[str, asyncio.Future, float]
+
+
+class MicroBatchEmbeddingExecutor:
+    """Coalesces concurrent embed requests into batches run in a thread pool.
+
+    A batch is dispatched when it reaches max_batch_size or when its first text has
+    waited max_wait_ms. At most `workers` batches run at once.
+    """
+
+    def __init__(
+        self,
+        embedder: Any,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        workers: int = 1,
+    ) -> None:
+        self._embedder = embedder
+        self._max_batch_size = max(1, max_batch_size)
+        self._max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._workers = max(1, workers)
+        self._pool = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="embed")
+        self._queue: asyncio.Queue[_Item] | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._task: asyncio.Task | None = None
+        self._inflight: set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self._workers)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, fut, _ = self._queue.get_nowait()
+                if not fut.done():
+                    fut.set_exception(RuntimeError("embedding executor stopped"))
+        self._pool.shutdown(wait=False)
+
+    async def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        """Same contract as Embedder.embed_texts, but awaitable and batched with other callers."""
+        if not texts:
+            return []
+        if self._task is None:
+            await self.start()
+        loop = asyncio.get_running_loop()
+        now = time.perf_counter()
+        futures = []
+        for text in texts:
+            fut = loop.create_future()
+            self._queue.put_nowait((text, fut, now))  # type: ignore[union-attr]
+            futures.append(fut)
+        EMBEDDING_QUEUE_DEPTH.observe(self._queue.qsize())  # type: ignore[union-attr]
+        return list(await asyncio.gather(*futures))
+
+    async def _run(self) -> None:
+        queue = self._queue
+        assert queue is not None and self._slots is not None
+        while True:
+            batch = [await queue.get()]
+            try:
+                deadline = batch[0][2] + self._max_wait
+                while len(batch) < self._max_batch_size:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        while len(batch) < self._max_batch_size and not queue.empty():
+                            batch.append(queue.get_nowait())
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+                    except asyncio.TimeoutError:
+                        break
+                EMBEDDING_QUEUE_DEPTH.observe(queue.qsize())
+                await self._slots.acquire()
+            except BaseException:
+                # Cancelled (stop()) while the batch was taken off the queue but not dispatched
+                _fail(batch, RuntimeError("embedding executor stopped"))
+                raise
+            task = asyncio.create_task(self._encode(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _encode(self, batch: list[_Item]) -> None:
+        try:
+            started = time.perf_counter()
+            for _, _, enqueued in batch:
+                EMBEDDING_WAIT_SECONDS.observe(started - enqueued)
+            EMBEDDING_BATCH_SIZE.observe(len(batch))
+            texts = [text for text, _, _ in batch]
+            loop = asyncio.get_running_loop()
+            try:
+                vectors = await loop.run_in_executor(self._pool, self._embedder.embed_texts, texts)
+            except asyncio.CancelledError:
+                _fail(batch, RuntimeError("embedding executor stopped"))
+                raise
+            except Exception as e:
+                _fail(batch, e)
+                return
+            EMBEDDING_ENCODE_SECONDS.observe(time.perf_counter() - started)
+            for (_, fut, _), vec in zip(batch, vectors):
+                if not fut.done():
+                    fut.set_result(vec)
+        finally:
+            self._slots.release()  # type: ignore[union-attr]
+
+
+def _fail(batch: list[_Item], error: BaseException) -> None:
+    """Resolve every still-pending future of the batch with error (callers must never hang)."""
+    for _, fut, _ in batch:
+        if not fut.done():
+            fut.set_exception(error)
@@ -0,0 +1,112 @@
+"""KB generation watcher: polls retrieval.kb_generation and notifies subscribers on change."""
+import asyncio
+import inspect
+from typing import Awaitable, Callable
+
+import structlog
+from sqlalchemy import select
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from retrieval.storage.models import KbGeneration
+
+Subscriber = Callable[[set[str]], Awaitable[None] | None]
+
+
+class KbGenerationWatcher:
+    """Keeps the last seen generation per KB version; ingest bumps it after every run.
+
+    Subscribers are called with the set of versions whose generation changed.
+    """
+
+    def __init__(self, session_factory: type[AsyncSession], poll_seconds: float = 5.0) -> None:
+        self._session_factory = session_factory
+        self._poll_seconds = poll_seconds
+        self._versions: dict[str, int] = {}
+        self._subscribers: list[Subscriber] = []
+        self._task: asyncio.Task | None = None
+        self._warned_missing = False
+
+    @property
+    def versions(self) -> dict[str, int]:
+        return dict(self._versions)
+
+    @property
+    def generation(self) -> int:
+        """Global generation: grows whenever any version is re-ingested."""
+        return sum(self._versions.values())
+
+    def generation_for(self, version: str | None) -> int:
+        return self._versions.get(version or "", 0)
+
+    def subscribe(self, callback: Subscriber) -> None:
+        self._subscribers.append(callback)
+
+    async def fetch(self) -> dict[str, int]:
+        async with self._session_factory() as session:
+            result = await session.execute(
+                select(KbGeneration.version, KbGeneration.generation)
+            )
+            return {row[0]: int(row[1]) for row in result.all()}
+
+    async def refresh(self) -> set[str]:
+        """Re-read generations; notify subscribers and return changed versions."""
+        try:
+            current = await self.fetch()
+        except ProgrammingError as e:
+            if "does not exist" in str(e) and not self._warned_missing:
+                self._warned_missing = True
+                structlog.get_logger().warning(
+                    "kb_generation_missing",
+                    msg="Table retrieval.kb_generation not found; caches rely on TTL only. Apply migrations.",
+                )
+            return set()
+        changed = {
+            v for v in set(current) | set(self._versions)
+            if current.get(v) != self._versions.get(v)
+        }
+        self._versions = current
+        if changed:
+            await self._notify(changed)
+        return changed
+
+    async def _notify(self, changed: set[str]) -> None:
+        log = structlog.get_logger()
+        log.info("kb_generation_changed", versions=sorted(changed), generation=self.generation)
+        for callback in self._subscribers:
+            try:
+                res = callback(set(changed))
+                if inspect.isawaitable(res):
+                    await res
+            except Exception as e:
+                log.warning("kb_generation_subscriber_failed", exc_type=type(e).__name__, exc_msg=str(e)[:200])
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._poll_seconds)
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                structlog.get_logger().warning(
+                    "kb_generation_poll_failed", exc_type=type(e).__name__, exc_msg=str(e)[:200]
+                )
+
+    async def start(self) -> None:
+        """Initial read (errors tolerated, DB may be down at startup) and background polling."""
+        try:
+            await self.refresh()
+        except Exception:
+            pass
+        if self._poll_seconds > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,169 @@
+"""Background KB statistics: chunks per version, embedding coverage, index presence."""
+import asyncio
+import re
+import time
+from dataclasses import asdict, dataclass, field
+
+import structlog
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from retrieval.metrics import (
+    KB_ANN_INDEX_PRESENT,
+    KB_CHUNKS,
+    KB_CHUNKS_EMBEDDED,
+    KB_EMBEDDING_COVERAGE,
+    KB_INDEX_PRESENT,
+)
+from retrieval.storage.models import Chunk, Document
+
+ANN_METHODS = ("hnsw", "ivfflat")
+
+_INDEXES_SQL = text("""
+    SELECT indexname, indexdef FROM pg_indexes
+    WHERE schemaname = 'retrieval' AND tablename = 'chunks'
+""")
+
+
+@dataclass
+class VersionStats:
+    version: str
+    documents: int
+    chunks: int
+    chunks_with_embedding: int
+
+    @property
+    def coverage(self) -> float:
+        return (self.chunks_with_embedding / self.chunks) if self.chunks else 0.0
+
+
+@dataclass
+class IndexInfo:
+    name: str
+    method: str
+
+
+@dataclass
+class KbStats:
+    versions: list[VersionStats] = field(default_factory=list)
+    indexes: list[IndexInfo] = field(default_factory=list)
+    refreshed_at: float | None = None
+    refresh_ms: int = 0
+    error: str | None = None
+
+    @property
+    def ann_index_present(self) -> bool:
+        return any(ix.method in ANN_METHODS for ix in self.indexes)
+
+    def as_dict(self) -> dict:
+        return {
+            "versions": [dict(asdict(v), coverage=round(v.coverage, 4)) for v in self.versions],
+            "indexes": [asdict(ix) for ix in self.indexes],
+            "ann_index_present": self.ann_index_present,
+            "total_chunks": sum(v.chunks for v in self.versions),
+            "refreshed_at": self.refreshed_at,
+            "refresh_ms": self.refresh_ms,
+            "error": self.error,
+        }
+
+
+def _index_method(indexdef: str) -> str:
+    m = re.search(r"\bUSING\s+(\w+)", indexdef, re.IGNORECASE)
+    return m.group(1).lower() if m else "unknown"
+
+
+class KbStatsCollector:
+    """Collects KB statistics off the search path: periodically and after ingest (via subscribe)."""
+
+    def __init__(self, session_factory: type[AsyncSession], refresh_seconds: float = 300.0) -> None:
+        self._session_factory = session_factory
+        self._refresh_seconds = refresh_seconds
+        self._stats = KbStats()
+        self._task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def stats(self) -> KbStats:
+        return self._stats
+
+    async def collect(self) -> KbStats:
+        async with self._session_factory() as session:
+            result = await session.execute(
+                select(
+                    Document.version,
+                    func.count(func.distinct(Document.id)),
+                    func.count(Chunk.id),
+                    func.count(Chunk.embedding),
+                )
+                .select_from(Document)
+                .outerjoin(Chunk, Chunk.document_id == Document.id)
+                .group_by(Document.version)
+                .order_by(Document.version)
+            )
+            versions = [
+                VersionStats(
+                    version=row[0],
+                    documents=int(row[1] or 0),
+                    chunks=int(row[2] or 0),
+                    chunks_with_embedding=int(row[3] or 0),
+                )
+                for row in result.all()
+            ]
+            ix_result = await session.execute(_INDEXES_SQL)
+            indexes = [IndexInfo(name=row[0], method=_index_method(row[1])) for row in ix_result.all()]
+        return KbStats(versions=versions, indexes=indexes)
+
+    async def refresh(self, *_: object) -> KbStats:
+        """Re-collect stats and publish gauges. Accepts (and ignores) watcher's changed-versions arg."""
+        async with self._lock:
+            t0 = time.perf_counter()
+            try:
+                stats = await self.collect()
+            except Exception as e:
+                structlog.get_logger().warning(
+                    "kb_stats_refresh_failed", exc_type=type(e).__name__, exc_msg=str(e)[:200]
+                )
+                self._stats.error = f"{type(e).__name__}: {str(e)[:200]}"
+                return self._stats
+            stats.refreshed_at = time.time()
+            stats.refresh_ms = int((time.perf_counter() - t0) * 1000)
+            self._publish(stats)
+            self._stats = stats
+            return stats
+
+    def _publish(self, stats: KbStats) -> None:
+        old_versions = {v.version for v in self._stats.versions}
+        new_versions = {v.version for v in stats.versions}
+        for version in old_versions - new_versions:
+            for gauge in (KB_CHUNKS, KB_CHUNKS_EMBEDDED, KB_EMBEDDING_COVERAGE):
+                gauge.remove(version)
+        for v in stats.versions:
+            KB_CHUNKS.labels(version=v.version).set(v.chunks)
+            KB_CHUNKS_EMBEDDED.labels(version=v.version).set(v.chunks_with_embedding)
+            KB_EMBEDDING_COVERAGE.labels(version=v.version).set(v.coverage)
+        old_indexes = {(ix.name, ix.method) for ix in self._stats.indexes}
+        new_indexes = {(ix.name, ix.method) for ix in stats.indexes}
+        for name, method in old_indexes - new_indexes:
+            KB_INDEX_PRESENT.remove(name, method)
+        for name, method in new_indexes:
+            KB_INDEX_PRESENT.labels(index=name, method=method).set(1)
+        KB_ANN_INDEX_PRESENT.set(1 if stats.ann_index_present else 0)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._refresh_seconds)
+            await self.refresh()
+
+    async def start(self) -> None:
+        await self.refresh()
+        if self._refresh_seconds > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
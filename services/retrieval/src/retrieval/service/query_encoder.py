@@ -0,0 +1,53 @@
+"""Query encoder: embedding cache in front of the embedder (or its micro-batching executor)."""
+from typing import Any
+
+from retrieval.cache.embedding_cache import QueryEmbeddingCache
+from retrieval.service.embedding_executor import MicroBatchEmbeddingExecutor
+
+
+class QueryEncoder:
+    """Turn search queries into vectors; cached queries skip the model forward pass.
+
+    With an executor, misses are embedded in a thread pool and batched with concurrent
+    requests; without one, the embedder is called inline.
+    """
+
+    def __init__(
+        self,
+        embedder: Any,
+        cache: QueryEmbeddingCache | None = None,
+        executor: MicroBatchEmbeddingExecutor | None = None,
+    ) -> None:
+        self._embedder = embedder
+        self._cache = cache
+        self._executor = executor
+
+    @property
+    def cache(self) -> QueryEmbeddingCache | None:
+        return self._cache
+
+    async def encode(self, queries: list[str]) -> list[list[float]]:
+        """Return one vector per query (same order). Misses are embedded in one batch."""
+        out: list[list[float] | None] = [None] * len(queries)
+        missing: dict[str, list[int]] = {}
+        for i, q in enumerate(queries):
+            vec = self._cache.get(q) if self._cache is not None else None
+            if vec is not None:
+                out[i] = vec
+            else:
+                missing.setdefault(q, []).append(i)
+        if missing:
+            texts = list(missing)
+            if self._executor is not None:
+                vectors = await self._executor.embed_texts(texts)
+            else:
+                vectors = self._embedder.embed_texts(texts)
+            for text, vec in zip(texts, vectors):
+                if self._cache is not None:
+                    self._cache.put(text, vec)
+                for i in missing[text]:
+                    out[i] = vec
+        return out  # type: ignore[return-value]
+
+    async def encode_one(self, query: str) -> list[float]:
+        return (await self.encode([query]))[0]
@@ -1,12 +1,216 @@
-"""Search service - delegates to Storage."""
-from retrieval.storage.base import SearchResult, Storage
+"""Search service - delegates to Storage, with optional result cache."""
+import asyncio
+from dataclasses import replace
+
+from retrieval.cache.result_cache import SearchResultCache
+from retrieval.cache.semantic_cache import SemanticResultCache
+from retrieval.service.kb_generation import KbGenerationWatcher
+from retrieval.service.query_encoder import QueryEncoder
+from retrieval.storage.base import SearchOptions, SearchQuery, SearchResult, SearchTrace, Storage
+from retrieval.storage.neighbors import NeighborExpander
 
 
 class SearchService:
-    def __init__(self, storage: Storage) -> None:
+    def __init__(
+        self,
+        storage: Storage,
+        result_cache: SearchResultCache | None = None,
+        kb_generation: KbGenerationWatcher | None = None,
+        retrieval_mode: str = "vector",
+        default_version: str | None = None,
+        neighbor_expander: NeighborExpander | None = None,
+        version_fallback: dict[str, list[str]] | None = None,
+        version_fallback_penalty: float = 0.05,
+        semantic_cache: SemanticResultCache | None = None,
+        query_encoder: QueryEncoder | None = None,
+    ) -> None:
         self._storage = storage
+        self._result_cache = result_cache
+        self._kb_generation = kb_generation
+        self._retrieval_mode = (retrieval_mode or "vector").lower()
+        self._default_version = default_version
+        self._neighbor_expander = neighbor_expander
+        self._version_fallback = version_fallback or {}
+        self._version_fallback_penalty = version_fallback_penalty
+        # Near-duplicate lookup needs the query vector; the encoder's embedding cache makes the
+        # storage's own encode of the same query free
+        self._semantic_cache = semantic_cache if query_encoder is not None else None
+        self._query_encoder = query_encoder
+
+    def _generation(self, version: str | None) -> int:
+        if self._kb_generation is None:
+            return 0
+        return self._kb_generation.generation_for(version)
+
+    def _cache_key(
+        self, query: str, top_k: int, version: str | None, options: SearchOptions | None
+    ) -> tuple[tuple, int]:
+        effective_version = version if version is not None else self._default_version
+        key = self._result_cache.make_key(
+            query, effective_version, top_k, self._retrieval_mode, extra=options
+        )
+        return key, self._generation(effective_version)
+
+    def _chain(self, version: str | None) -> list[str | None]:
+        """`version`, then the versions searched when it is thin ("*" = fallbacks of any version)."""
+        effective_version = version if version is not None else self._default_version
+        fallbacks = self._version_fallback.get(effective_version or "", self._version_fallback.get("*", []))
+        chain: list[str | None] = [version]
+        for v in fallbacks:
+            if v != effective_version and v not in chain:
+                chain.append(v)
+        return chain
+
+    def _merge_chain(self, batches: list[list[SearchResult]], top_k: int) -> list[SearchResult]:
+        """Fallback step i costs i * penalty of score; a text already found in an earlier version is skipped."""
+        seen: set[str] = set()
+        merged: list[SearchResult] = []
+        for step, results in enumerate(batches):
+            for r in results:
+                if r.text in seen:
+                    continue
+                seen.add(r.text)
+                if step:
+                    r = replace(r, score=max(0.0, r.score - step * self._version_fallback_penalty))
+                merged.append(r)
+        merged.sort(key=lambda r: -r.score)  # stable: ties keep the more specific version first
+        return merged[:top_k]
 
     async def search(
-        self, query: str, top_k: int = 5, version: str | None = None
+        self,
+        query: str,
+        top_k: int = 5,
+        version: str | None = None,
+        options: SearchOptions | None = None,
+        expand_neighbors: int = 0,
+    ) -> list[SearchResult]:
+        results = await self._search(query, top_k, version, options)
+        chain = self._chain(version)
+        if len(chain) > 1 and len(results) < top_k:
+            # Only a thin version pays for its fallbacks; they are searched concurrently
+            # (own sessions, shared query embedding)
+            fallbacks = await asyncio.gather(
+                *(self._search(query, top_k, v, options) for v in chain[1:])
+            )
+            results = self._merge_chain([results, *fallbacks], top_k)
+        if expand_neighbors > 0 and self._neighbor_expander is not None and results:
+            return await self._neighbor_expander.expand(results, expand_neighbors)
+        return results
+
+    async def explain(
+        self,
+        query: str,
+        top_k: int = 5,
+        version: str | None = None,
+        options: SearchOptions | None = None,
+        analyze: bool = True,
+    ) -> tuple[list[SearchResult], SearchTrace]:
+        """Storage search with a stage trace; bypasses caches, version fallback and neighbors."""
+        return await self._storage.explain(
+            query, top_k=top_k, version=version, options=options, analyze=analyze
+        )
+
+    async def _search(
+        self, query: str, top_k: int, version: str | None, options: SearchOptions | None
     ) -> list[SearchResult]:
-        return await self._storage.search(query, top_k=top_k, version=version)
+        cache = self._result_cache
+        if cache is None or not cache.enabled:
+            return await self._fetch(query, top_k, version, options)
+        key, generation = self._cache_key(query, top_k, version, options)
+        cached = cache.get(key, generation)
+        if cached is not None:
+            return cached
+        results = await self._fetch(query, top_k, version, options)
+        cache.put(key, generation, results)
+        return results
+
+    def _semantic_scope(
+        self, top_k: int, version: str | None, options: SearchOptions | None
+    ) -> tuple[tuple, int]:
+        effective_version = version if version is not None else self._default_version
+        scope = SemanticResultCache.make_scope(effective_version, top_k, self._retrieval_mode, options)
+        return scope, self._generation(effective_version)
+
+    async def _fetch(
+        self, query: str, top_k: int, version: str | None, options: SearchOptions | None
+    ) -> list[SearchResult]:
+        """Storage search behind the semantic (near-duplicate query) cache."""
+        semantic = self._semantic_cache
+        if semantic is None or not semantic.enabled:
+            return await self._storage.search(query, top_k=top_k, version=version, options=options)
+        vector = await self._query_encoder.encode_one(query)
+        scope, generation = self._semantic_scope(top_k, version, options)
+        cached = semantic.get(scope, vector, generation)
+        if cached is not None:
+            return cached
+        results = await self._storage.search(query, top_k=top_k, version=version, options=options)
+        semantic.put(scope, vector, generation, results)
+        return results
+
+    async def _fetch_many(self, queries: list[SearchQuery]) -> list[list[SearchResult]]:
+        """Batch variant of _fetch: one encode call, only semantic misses go to storage."""
+        semantic = self._semantic_cache
+        if semantic is None or not semantic.enabled:
+            return await self._storage.search_many(queries)
+        vectors = await self._query_encoder.encode([q.query for q in queries])
+        scopes = [self._semantic_scope(q.top_k, q.version, q.options) for q in queries]
+        out: list[list[SearchResult] | None] = [
+            semantic.get(scope, vector, generation) for (scope, generation), vector in zip(scopes, vectors)
+        ]
+        pending = [i for i, results in enumerate(out) if results is None]
+        if pending:
+            fetched = await self._storage.search_many([queries[i] for i in pending])
+            for i, results in zip(pending, fetched):
+                scope, generation = scopes[i]
+                semantic.put(scope, vectors[i], generation, results)
+                out[i] = results
+        return out  # type: ignore[return-value]
+
+    async def search_many(self, queries: list[SearchQuery]) -> list[list[SearchResult]]:
+        """Batch search in request order; neighbors of all queries are fetched in one query.
+
+        Fallback versions of the queries whose own version returned fewer than top_k results
+        are searched in a second storage batch and merged per query.
+        """
+        batches = await self._search_many(queries)
+        thin = [
+            (i, fallbacks)
+            for i, q in enumerate(queries)
+            if len(batches[i]) < q.top_k and (fallbacks := self._chain(q.version)[1:])
+        ]
+        if thin:
+            flat = [replace(queries[i], version=v) for i, fallbacks in thin for v in fallbacks]
+            flat_batches = await self._search_many(flat)
+            offset = 0
+            for i, fallbacks in thin:
+                part = flat_batches[offset:offset + len(fallbacks)]
+                offset += len(fallbacks)
+                batches[i] = self._merge_chain([batches[i], *part], queries[i].top_k)
+        ns = [q.expand_neighbors for q in queries]
+        if self._neighbor_expander is not None and any(n > 0 for n in ns):
+            return await self._neighbor_expander.expand_many(batches, ns)
+        return batches
+
+    async def _search_many(self, queries: list[SearchQuery]) -> list[list[SearchResult]]:
+        """Cached queries are not sent to storage; repeated queries in the batch are sent once."""
+        cache = self._result_cache
+        if cache is None or not cache.enabled:
+            return await self._fetch_many(queries)
+        out: list[list[SearchResult] | None] = [None] * len(queries)
+        keys = [self._cache_key(q.query, q.top_k, q.version, q.options) for q in queries]
+        pending: dict[tuple, list[int]] = {}
+        for i, (key, generation) in enumerate(keys):
+            if key in pending:
+                pending[key].append(i)
+                continue
+            out[i] = cache.get(key, generation)
+            if out[i] is None:
+                pending[key] = [i]
+        if pending:
+            fetched = await self._fetch_many([queries[ix[0]] for ix in pending.values()])
+            for ix, results in zip(pending.values(), fetched):
+                key, generation = keys[ix[0]]
+                cache.put(key, generation, results)
+                for i in ix:
+                    out[i] = results
+        return out  # type: ignore[return-value]
@@ -1,4 +1,4 @@
 """Storage layer."""
-from retrieval.storage.models import Base, Chunk, Document
+from retrieval.storage.models import Base, Chunk, Document, KbGeneration, Projection, Section
 
-__all__ = ["Base", "Chunk", "Document"]
+__all__ = ["Base", "Chunk", "Document", "KbGeneration", "Projection", "Section"]
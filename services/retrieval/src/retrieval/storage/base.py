@@ -1,6 +1,9 @@
 """Storage abstraction for retrieval - can be swapped for different backends."""
+import time
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Iterator
 from uuid import UUID
 
 
@@ -16,6 +19,53 @@ class SearchResult:
     document_title: str | None = None
     section_title: str | None = None
     position: int = 0
+    neighbor_of: str | None = None  # chunk_id of the hit this adjacent chunk was added for
+
+
+@dataclass(frozen=True)
+class SearchOptions:
+    """Per-request search tuning. Hashable: part of result cache keys."""
+
+    ef_search: int | None = None  # hnsw.ef_search
+    probes: int | None = None  # ivfflat.probes
+    mmr_lambda: float | None = None  # MMR diversification of the top-k (1 = relevance only)
+
+
+@dataclass(frozen=True)
+class SearchQuery:
+    """One query of a batch search."""
+
+    query: str
+    top_k: int = 5
+    version: str | None = None
+    options: SearchOptions | None = None
+    expand_neighbors: int = 0  # ±n adjacent chunks per hit (SearchService, not storage)
+
+
+@dataclass
+class SearchTrace:
+    """Per-stage timings and diagnostics of one search (POST /search/explain)."""
+
+    backend: str
+    mode: str = ""
+    stages_ms: dict[str, float] = field(default_factory=dict)  # summed over refetches
+    candidates: int | None = None  # rows returned by SQL, i.e. after its min_score filter
+    passed_min_score: int | None = None
+    refetches: int = 0
+    plans: list[Any] = field(default_factory=list)  # PlanSummary per executed statement
+    error: str | None = None
+    analyze: bool = True  # EXPLAIN ANALYZE (statements run twice) vs plain EXPLAIN
+    # chunk_id -> {"vector": ..., "keyword": ...}: parts of its score as the backend computed them
+    scores: dict[str, dict[str, float]] = field(default_factory=dict)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - t0) * 1000
+            self.stages_ms[name] = self.stages_ms.get(name, 0.0) + elapsed
 
 
 class Storage(ABC):
@@ -23,7 +73,32 @@ class Storage(ABC):
 
     @abstractmethod
     async def search(
-        self, query: str, top_k: int = 5, version: str | None = None
+        self,
+        query: str,
+        top_k: int = 5,
+        version: str | None = None,
+        options: SearchOptions | None = None,
     ) -> list[SearchResult]:
         """Search for relevant chunks. Returns list ordered by relevance (score)."""
         ...
+
+    async def search_many(self, queries: list[SearchQuery]) -> list[list[SearchResult]]:
+        """Batch search; results in request order. Backends may override to share work."""
+        return [
+            await self.search(q.query, top_k=q.top_k, version=q.version, options=q.options)
+            for q in queries
+        ]
+
+    async def explain(
+        self,
+        query: str,
+        top_k: int = 5,
+        version: str | None = None,
+        options: SearchOptions | None = None,
+        analyze: bool = True,
+    ) -> tuple[list[SearchResult], SearchTrace]:
+        """search() with a trace; backends without stage timings report a single "search" stage."""
+        trace = SearchTrace(backend=type(self).__name__)
+        with trace.stage("search"):
+            results = await self.search(query, top_k=top_k, version=version, options=options)
+        return results, trace
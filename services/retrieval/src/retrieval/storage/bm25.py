@@ -0,0 +1,207 @@
+"""In-memory BM25 retrieval (RETRIEVAL_MODE=bm25): inverted index per KB version, no DB per query."""
+import asyncio
+import heapq
+import math
+import time
+from collections.abc import Collection
+from dataclasses import dataclass
+
+import numpy as np
+import structlog
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared.tokenize import term_frequencies
+
+from retrieval.metrics import BM25_INDEX_DOCS, BM25_INDEX_TERMS
+from retrieval.storage.base import SearchOptions, SearchQuery, SearchResult, Storage
+from retrieval.storage.models import Chunk, Document
+from retrieval.storage.scoring import query_terms, row_result
+
+
+@dataclass
+class Bm25Index:
+    """Inverted index of one KB version.
+
+    postings[term] = (doc ids, weights); weight = idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl)),
+    precomputed at build time, so a query is a sum of posting weights.
+    """
+
+    version: str
+    rows: list[tuple]  # (id, text, source, version, section_title, document_title, position)
+    postings: dict[str, tuple[np.ndarray, np.ndarray]]
+    idf: dict[str, float]
+    k1: float
+
+    @classmethod
+    def build(
+        cls,
+        version: str,
+        rows: list[tuple],
+        features: list[tuple[Collection[str], Collection[int], int]],
+        k1: float = 1.2,
+        b: float = 0.75,
+    ) -> "Bm25Index":
+        """features[i] = (terms, term frequencies, length) of rows[i] (chunks.lexical_* columns)."""
+        n = len(rows)
+        lengths = np.array([f[2] for f in features], dtype=np.float32)
+        avgdl = float(lengths.mean()) if n and lengths.sum() else 1.0
+        doc_ids: dict[str, list[int]] = {}
+        tfs: dict[str, list[int]] = {}
+        for i, (terms, tf, _) in enumerate(features):
+            for term, count in zip(terms, tf):
+                doc_ids.setdefault(term, []).append(i)
+                tfs.setdefault(term, []).append(count)
+        norm = k1 * (1.0 - b + b * lengths / avgdl)
+        postings: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        idf: dict[str, float] = {}
+        for term, ids in doc_ids.items():
+            df = len(ids)
+            idf[term] = math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+            ids_arr = np.array(ids, dtype=np.int32)
+            tf_arr = np.array(tfs[term], dtype=np.float32)
+            postings[term] = (ids_arr, idf[term] * tf_arr * (k1 + 1.0) / (tf_arr + norm[ids_arr]))
+        return cls(version, rows, postings, idf, k1)
+
+    @property
+    def size(self) -> int:
+        return len(self.rows)
+
+    def top_k(self, q_terms: Collection[str], k: int) -> list[tuple[int, float]]:
+        """(row, score) of the k best rows, score normalized to [0, 1] by the query's upper bound."""
+        matched = [t for t in q_terms if t in self.postings]
+        if not matched:
+            return []
+        # Upper bound: every query term known to the index with tf -> inf. Terms absent from the
+        # version (typos, greetings) carry no evidence and are left out; partial matches score lower.
+        bound = sum(self.idf[t] for t in matched) * (self.k1 + 1.0)
+        scores = np.zeros(self.size, dtype=np.float32)
+        for term in matched:
+            ids, weights = self.postings[term]
+            scores[ids] += weights
+        candidates = np.unique(np.concatenate([self.postings[t][0] for t in matched]))
+        best = heapq.nlargest(k, candidates.tolist(), key=scores.__getitem__)
+        return [(i, float(scores[i]) / bound) for i in best]
+
+
+class Bm25Storage(Storage):
+    """Keyword search over per-version BM25 indexes built from chunks.lexical_* columns.
+
+    reload(versions) rebuilds only changed versions; subscribe it to KbGenerationWatcher.
+    """
+
+    def __init__(
+        self,
+        session_factory: type[AsyncSession],
+        kb_latest_version: str = "6.1 (latest)",
+        min_score: float = 0.0,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ) -> None:
+        self._session_factory = session_factory
+        self._kb_latest_version = kb_latest_version
+        self._min_score = min_score
+        self._k1 = k1
+        self._b = b
+        self._indexes: dict[str, Bm25Index] = {}
+        self._published: set[str] = set()
+        self._lock = asyncio.Lock()
+
+    @property
+    def versions(self) -> dict[str, int]:
+        return {v: ix.size for v, ix in self._indexes.items()}
+
+    async def load(self) -> None:
+        await self._reload(None)
+
+    async def reload(self, versions: set[str]) -> None:
+        if versions:
+            await self._reload(set(versions))
+
+    async def _reload(self, versions: set[str] | None) -> None:
+        log = structlog.get_logger()
+        async with self._lock:
+            t0 = time.perf_counter()
+            try:
+                grouped = await self._fetch(versions)
+            except Exception as e:
+                log.warning("bm25_index_load_failed", exc_type=type(e).__name__, exc_msg=str(e)[:200])
+                return
+            built = {
+                version: await asyncio.to_thread(Bm25Index.build, version, rows, features, self._k1, self._b)
+                for version, (rows, features) in grouped.items()
+            }
+            indexes = dict(self._indexes) if versions is not None else {}
+            for version in versions or ():
+                indexes.pop(version, None)
+            indexes.update(built)
+            self._indexes = indexes
+            self._publish()
+            log.info(
+                "bm25_index_loaded",
+                versions=sorted(built),
+                docs=sum(ix.size for ix in built.values()),
+                ms=int((time.perf_counter() - t0) * 1000),
+            )
+
+    async def _fetch(self, versions: set[str] | None) -> dict[str, tuple[list[tuple], list[tuple]]]:
+        stmt = (
+            select(
+                Chunk.id,
+                Chunk.text,
+                Document.source,
+                Document.version,
+                Chunk.section_title,
+                Chunk.document_title,
+                Chunk.position,
+                Chunk.lexical_terms,
+                Chunk.lexical_tf,
+                Chunk.lexical_len,
+            )
+            .join(Document, Chunk.document_id == Document.id)
+            .order_by(Document.version, Chunk.id)
+        )
+        if versions is not None:
+            stmt = stmt.where(Document.version.in_(sorted(versions)))
+        grouped: dict[str, tuple[list[tuple], list[tuple]]] = {}
+        async with self._session_factory() as session:
+            result = await session.execute(stmt)
+            for row in result.all():
+                rows, features = grouped.setdefault(row[3], ([], []))
+                rows.append(tuple(row[:7]))
+                if row[7] is None or row[8] is None:
+                    features.append(term_frequencies(row[1] or ""))  # not re-ingested since migration 008
+                else:
+                    features.append((row[7], row[8], int(row[9] or sum(row[8]))))
+        return grouped
+
+    def _publish(self) -> None:
+        for version in self._published - set(self._indexes):
+            BM25_INDEX_DOCS.remove(version)
+            BM25_INDEX_TERMS.remove(version)
+        for version, ix in self._indexes.items():
+            BM25_INDEX_DOCS.labels(version=version).set(ix.size)
+            BM25_INDEX_TERMS.labels(version=version).set(len(ix.postings))
+        self._published = set(self._indexes)
+
+    async def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        version: str | None = None,
+        options: SearchOptions | None = None,
+    ) -> list[SearchResult]:
+        effective_version = version if version is not None else self._kb_latest_version
+        index = self._indexes.get(effective_version)
+        if index is None:
+            return []
+        out = []
+        for i, score in index.top_k(query_terms(query), top_k):
+            if score < self._min_score:
+                break
+            out.append(row_result(index.rows[i], score))
+        return out
+
+    async def search_many(self, queries: list[SearchQuery]) -> list[list[SearchResult]]:
+        return [await self.search(q.query, q.top_k, q.version, q.options) for q in queries]
+
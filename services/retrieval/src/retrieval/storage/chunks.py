@@ -0,0 +1,42 @@
+"""Chunk texts by id, for clients that search in compact (ids-only) mode and cache texts."""
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from retrieval.storage.base import SearchResult
+from retrieval.storage.models import Chunk, Document
+from retrieval.storage.scoring import row_result
+
+
+class ChunkReader:
+    """Bulk primary-key lookup of chunks; unknown or malformed ids are skipped."""
+
+    def __init__(self, session_factory: type[AsyncSession]) -> None:
+        self._session_factory = session_factory
+
+    async def get_many(self, ids: list[str]) -> list[SearchResult]:
+        uuids = []
+        for value in dict.fromkeys(ids):
+            try:
+                uuids.append(UUID(value))
+            except ValueError:
+                continue
+        if not uuids:
+            return []
+        stmt = (
+            select(
+                Chunk.id,
+                Chunk.text,
+                Document.source,
+                Document.version,
+                Chunk.section_title,
+                Chunk.document_title,
+                Chunk.position,
+            )
+            .join(Document, Chunk.document_id == Document.id)
+            .where(Chunk.id.in_(uuids))
+        )
+        async with self._session_factory() as session:
+            rows = (await session.execute(stmt)).all()
+        return [row_result(row, 0.0) for row in rows]
@@ -0,0 +1,71 @@
+"""EXPLAIN of SQLAlchemy statements and a compact summary of the JSON plan."""
+import json
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) of a statement; with analyze also ANALYZE, BUFFERS (the statement runs).
+
+    Bind parameters stay those of the wrapped statement: session.execute(Explain(stmt), params).
+    """
+
+    inherit_cache = False
+
+    def __init__(self, statement: ClauseElement, analyze: bool = True) -> None:
+        self.statement = statement
+        self.analyze = analyze
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler, **kw) -> str:
+    options = "ANALYZE, BUFFERS, FORMAT JSON" if element.analyze else "FORMAT JSON"
+    return f"EXPLAIN ({options}) " + compiler.process(element.statement, **kw)
+
+
+@dataclass
+class PlanSummary:
+    statement: str  # which query of the search: ann | hierarchical | lexical | phrase | words
+    nodes: list[str] = field(default_factory=list)  # "Index Scan using ix on chunks", depth-first
+    indexes: list[str] = field(default_factory=list)
+    ann_index_used: bool = False  # an index scan ordered by a distance operator (HNSW / IVFFlat)
+    planning_ms: float | None = None  # ANALYZE only from here on
+    execution_ms: float | None = None
+    rows: int | None = None
+    shared_hit_blocks: int | None = None
+    shared_read_blocks: int | None = None
+
+    @classmethod
+    def from_json(cls, statement: str, raw: Any) -> "PlanSummary":
+        """raw = the single value EXPLAIN (FORMAT JSON) returns (JSON text or already decoded)."""
+        doc = json.loads(raw) if isinstance(raw, (str, bytes)) else raw
+        if isinstance(doc, list):
+            doc = doc[0] if doc else {}
+        top = doc.get("Plan", {})
+        summary = cls(
+            statement=statement,
+            planning_ms=doc.get("Planning Time"),
+            execution_ms=doc.get("Execution Time"),
+            rows=top.get("Actual Rows"),
+            shared_hit_blocks=top.get("Shared Hit Blocks"),
+            shared_read_blocks=top.get("Shared Read Blocks"),
+        )
+        stack = [top] if top else []
+        while stack:
+            node = stack.pop()
+            label = node.get("Node Type", "?")
+            index = node.get("Index Name")
+            if index:
+                label += f" using {index}"
+                if index not in summary.indexes:
+                    summary.indexes.append(index)
+                if "Order By" in node:
+                    summary.ann_index_used = True
+            if node.get("Relation Name"):
+                label += f" on {node['Relation Name']}"
+            summary.nodes.append(label)
+            stack.extend(reversed(node.get("Plans", [])))
+        return summary
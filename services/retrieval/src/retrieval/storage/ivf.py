@@ -0,0 +1,207 @@
+"""Pure-NumPy IVF index: k-means coarse quantizer + inverted lists, persisted per (version, generation).
+
+Vectors are stored grouped by list (list l is rows offsets[l]:offsets[l+1]), so probing
+a list reads one contiguous block. Layout under the IVF dir:
+
+    <version-slug>/g<generation>/   centroids.npy, offsets.npy, matrix.npy, sq_norms.npy, meta.json
+
+A generation directory is written under a temporary name and renamed into place, so
+readers never see a partial index. Arrays are opened with mmap_mode="r".
+"""
+import contextlib
+import json
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from retrieval.storage.snapshot import version_slug
+from retrieval.storage.vector_index import VersionIndex, distances, finish_distances, top_k
+
+IVF_FORMAT = 1
+_ASSIGN_CHUNK = 8192
+
+
+def default_nlist(n: int) -> int:
+    """Rule of thumb: ~4 * sqrt(n) lists."""
+    return max(1, min(n, int(4 * np.sqrt(n))))
+
+
+def _assign(x: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Nearest centroid (L2) per row, in chunks to bound the (chunk, nlist) distance matrix."""
+    c_sq = np.einsum("ij,ij->i", centroids, centroids)
+    out = np.empty(len(x), dtype=np.int64)
+    for start in range(0, len(x), _ASSIGN_CHUNK):
+        block = np.asarray(x[start:start + _ASSIGN_CHUNK], dtype=np.float32)
+        out[start:start + len(block)] = np.argmin(c_sq[None, :] - 2.0 * block @ centroids.T, axis=1)
+    return out
+
+
+def kmeans(x: np.ndarray, k: int, iters: int = 20, seed: int = 0) -> np.ndarray:
+    """Lloyd's k-means (L2); empty clusters are re-seeded from random points. Returns (k, dim) float32."""
+    rng = np.random.default_rng(seed)
+    n = len(x)
+    centroids = np.array(x[rng.choice(n, size=k, replace=False)], dtype=np.float32)
+    for _ in range(iters):
+        assign = _assign(x, centroids)
+        counts = np.bincount(assign, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, x)
+        nonempty = counts > 0
+        centroids[nonempty] = sums[nonempty] / counts[nonempty, None]
+        empty = np.flatnonzero(~nonempty)
+        if len(empty):
+            centroids[empty] = x[rng.choice(n, size=len(empty), replace=False)]
+    return centroids
+
+
+@dataclass
+class IvfIndex:
+    """Inverted-file index over one KB version; row_ids are chunk ids in list order."""
+
+    version: str
+    centroids: np.ndarray  # (nlist, dim)
+    offsets: np.ndarray  # (nlist + 1,) int64
+    row_ids: list[str]
+    matrix: np.ndarray  # (n, dim) float32, grouped by list
+    sq_norms: np.ndarray  # (n,)
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    @property
+    def size(self) -> int:
+        return len(self.row_ids)
+
+    @classmethod
+    def train(
+        cls,
+        base: VersionIndex,
+        nlist: int = 0,
+        iters: int = 20,
+        seed: int = 0,
+        max_train_points: int = 256,
+    ) -> "IvfIndex":
+        """k-means on a sample (at most max_train_points per list), then assign every row."""
+        n = base.size
+        nlist = min(nlist or default_nlist(n), n)
+        rng = np.random.default_rng(seed)
+        sample_size = min(n, nlist * max_train_points)
+        sample = base.matrix[np.sort(rng.choice(n, size=sample_size, replace=False))]
+        centroids = kmeans(np.asarray(sample, dtype=np.float32), nlist, iters=iters, seed=seed)
+        assign = _assign(base.matrix, centroids)
+        order = np.argsort(assign, kind="stable")
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assign, minlength=nlist), out=offsets[1:])
+        return cls(
+            version=base.version,
+            centroids=centroids,
+            offsets=offsets,
+            row_ids=[str(base.rows[i][0]) for i in order],
+            matrix=np.ascontiguousarray(base.matrix[order], dtype=np.float32),
+            sq_norms=np.asarray(base.sq_norms[order], dtype=np.float32),
+        )
+
+    def base_positions(self, base: VersionIndex) -> np.ndarray | None:
+        """Row of `base` for each IVF position (matched by chunk id); None if the chunk sets differ."""
+        if self.size != base.size:
+            return None
+        by_id = {str(row[0]): i for i, row in enumerate(base.rows)}
+        try:
+            return np.fromiter((by_id[cid] for cid in self.row_ids), dtype=np.int64, count=self.size)
+        except KeyError:
+            return None
+
+    def search(
+        self, queries: np.ndarray, k: int, nprobe: int, distance: str = "l2"
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Approximate k-NN: scan the nprobe nearest lists per query.
+
+        Returns (positions, distances), (m, k); positions index row_ids/matrix, padded
+        with -1 / inf when the probed lists hold fewer than k rows.
+        """
+        nprobe = max(1, min(nprobe, self.nlist))
+        c_sq = np.einsum("ij,ij->i", self.centroids, self.centroids)
+        probes, _ = top_k(c_sq[None, :] - 2.0 * queries @ self.centroids.T, nprobe)
+        out_idx = np.full((len(queries), k), -1, dtype=np.int64)
+        out_dist = np.full((len(queries), k), np.inf, dtype=np.float32)
+        for qi, lists in enumerate(probes):
+            candidates = np.concatenate(
+                [np.arange(self.offsets[li], self.offsets[li + 1]) for li in lists]
+            )
+            if not len(candidates):
+                continue
+            dist = distances(
+                queries[qi:qi + 1], self.matrix[candidates], self.sq_norms[candidates], distance
+            )
+            idx, d = top_k(dist, k)
+            out_idx[qi, :idx.shape[1]] = candidates[idx[0]]
+            out_dist[qi, :idx.shape[1]] = finish_distances(d[0], distance)
+        return out_idx, out_dist
+
+
+class IvfStore:
+    """Saves and memory-maps IvfIndex files; an index is valid only for its exact generation and model."""
+
+    def __init__(self, directory: str | os.PathLike, model_name: str = "", dim: int = 384) -> None:
+        self._dir = Path(directory)
+        self._model_name = model_name
+        self._dim = dim
+
+    def _path(self, version: str, generation: int) -> Path:
+        return self._dir / version_slug(version) / f"g{generation}"
+
+    def save(self, index: IvfIndex, generation: int) -> Path:
+        target = self._path(index.version, generation)
+        tmp = target.with_name(f".{target.name}.{os.getpid()}.{time.monotonic_ns()}")
+        tmp.mkdir(parents=True)
+        np.save(tmp / "centroids.npy", index.centroids)
+        np.save(tmp / "offsets.npy", index.offsets)
+        np.save(tmp / "matrix.npy", index.matrix)
+        np.save(tmp / "sq_norms.npy", index.sq_norms)
+        meta = {
+            "format": IVF_FORMAT,
+            "version": index.version,
+            "generation": generation,
+            "model": self._model_name,
+            "dim": self._dim,
+            "nlist": index.nlist,
+            "row_ids": index.row_ids,
+        }
+        (tmp / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+        if target.exists():
+            shutil.rmtree(target)
+        os.replace(tmp, target)
+        for old in target.parent.glob("g*"):
+            if old != target:
+                shutil.rmtree(old, ignore_errors=True)
+        return target
+
+    def open(self, version: str, generation: int) -> IvfIndex | None:
+        path = self._path(version, generation)
+        try:
+            meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if (
+            meta.get("format") != IVF_FORMAT
+            or meta.get("version") != version
+            or meta.get("generation") != generation
+            or meta.get("model") != self._model_name
+            or meta.get("dim") != self._dim
+        ):
+            return None
+        with contextlib.suppress(OSError, ValueError):
+            return IvfIndex(
+                version=version,
+                centroids=np.load(path / "centroids.npy"),
+                offsets=np.load(path / "offsets.npy"),
+                row_ids=meta["row_ids"],
+                matrix=np.load(path / "matrix.npy", mmap_mode="r"),
+                sq_norms=np.load(path / "sq_norms.npy", mmap_mode="r"),
+            )
+        return None
@@ -0,0 +1,81 @@
+"""Approximate in-memory vector search: NumpyStorage + per-version IVF indexes built offline."""
+import asyncio
+from typing import Any
+
+import numpy as np
+import structlog
+
+from retrieval.metrics import IVF_INDEX_PRESENT
+from retrieval.storage.base import SearchOptions
+from retrieval.storage.ivf import IvfIndex, IvfStore
+from retrieval.storage.numpy_storage import NumpyStorage
+from retrieval.storage.vector_index import VersionIndex
+
+
+class IvfStorage(NumpyStorage):
+    """Searches the nprobe nearest inverted lists instead of the whole version matrix.
+
+    IVF indexes are built offline (python -m retrieval.ivf_build) for the current KB
+    generation and loaded from disk on reload. A version without a matching index, or
+    whose index does not cover the loaded chunks, falls back to exact search; with
+    build_missing=True the index is trained in a thread on reload instead.
+    SearchOptions.probes overrides nprobe per request.
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        ivf_store: IvfStore,
+        nprobe: int = 8,
+        nlist: int = 0,
+        build_missing: bool = False,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self._ivf_store = ivf_store
+        self._nprobe = nprobe
+        self._nlist = nlist
+        self._build_missing = build_missing
+        # version -> (IVF index, base row index for each IVF position)
+        self._ivf: dict[str, tuple[IvfIndex, np.ndarray]] = {}
+
+    @property
+    def ivf_versions(self) -> dict[str, int]:
+        """Versions served by IVF and their list counts."""
+        return {v: ivf.nlist for v, (ivf, _) in self._ivf.items()}
+
+    async def _on_loaded(self, built: dict[str, VersionIndex], indexes: dict[str, VersionIndex]) -> None:
+        log = structlog.get_logger()
+        ivf = {v: entry for v, entry in self._ivf.items() if v in indexes and v not in built}
+        for version, base in built.items():
+            generation = self._kb_generation.versions.get(version) if self._kb_generation else None
+            if generation is None:
+                continue
+            index = self._ivf_store.open(version, generation)
+            if index is None and self._build_missing and base.size:
+                index = await asyncio.to_thread(IvfIndex.train, base, self._nlist)
+                await asyncio.to_thread(self._ivf_store.save, index, generation)
+                index = self._ivf_store.open(version, generation) or index
+            if index is None:
+                log.warning("ivf_index_missing", version=version, generation=generation, fallback="exact")
+                continue
+            positions = index.base_positions(base)
+            if positions is None:
+                log.warning("ivf_index_stale", version=version, generation=generation, fallback="exact")
+                continue
+            ivf[version] = (index, positions)
+        self._ivf = ivf
+        for version in indexes:
+            IVF_INDEX_PRESENT.labels(version=version).set(1 if version in ivf else 0)
+
+    def _nearest(
+        self, index: VersionIndex, queries: np.ndarray, k: int, options: SearchOptions | None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        entry = self._ivf.get(index.version)
+        if entry is None:
+            return super()._nearest(index, queries, k, options)
+        ivf, positions = entry
+        nprobe = (options.probes if options else None) or self._nprobe
+        idx, dist = ivf.search(queries, k, nprobe, self._vector_distance)
+        return np.where(idx >= 0, positions[np.maximum(idx, 0)], -1), dist
+
@@ -0,0 +1,31 @@
+"""Maximal Marginal Relevance: diversified top-k over candidates with their embeddings."""
+import numpy as np
+
+
+def mmr(relevance: np.ndarray, vectors: np.ndarray, k: int, lambda_: float) -> list[int]:
+    """Indices of k candidates in MMR pick order.
+
+    Each step takes argmax of lambda * relevance - (1 - lambda) * max cosine similarity to
+    the already picked candidates; lambda = 1 is plain relevance order. The (n, n) similarity
+    matrix is one matmul and the running max is updated in place, so a pick is O(n).
+    """
+    n = len(relevance)
+    if n == 0 or k <= 0:
+        return []
+    rel = np.asarray(relevance, dtype=np.float32)
+    v = np.asarray(vectors, dtype=np.float32)
+    v = v / np.maximum(np.linalg.norm(v, axis=1, keepdims=True), 1e-12)
+    sim = v @ v.T
+    first = int(np.argmax(rel))
+    picked = [first]
+    taken = np.zeros(n, dtype=bool)
+    taken[first] = True
+    max_sim = sim[first].copy()
+    for _ in range(min(k, n) - 1):
+        gain = lambda_ * rel - (1.0 - lambda_) * max_sim
+        gain[taken] = -np.inf
+        j = int(np.argmax(gain))
+        picked.append(j)
+        taken[j] = True
+        np.maximum(max_sim, sim[j], out=max_sim)
+    return picked
@@ -2,24 +2,32 @@
 from datetime import datetime
 from uuid import uuid4
 
-from sqlalchemy import DateTime, Float, ForeignKey, Integer, String, Text
-from sqlalchemy.dialects.postgresql import ARRAY, UUID, JSONB
+from sqlalchemy import REAL, BigInteger, DateTime, FetchedValue, Float, ForeignKey, Integer, String, Text
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, TSVECTOR, UUID
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 try:
-    from pgvector.sqlalchemy import Vector
+    from pgvector.sqlalchemy import BIT, HALFVEC, Vector
     HAS_VECTOR = True
 except ImportError:
+    from sqlalchemy.dialects.postgresql import BIT
     HAS_VECTOR = False
 
 
-def _embedding_column_type(dim: int = 384):
+def _embedding_column_type(dim: int | None = 384):
     """Column type for embedding: Vector when pgvector available, else ARRAY(Float) for tests."""
     if HAS_VECTOR:
         return Vector(dim)
     return ARRAY(Float)
 
 
+def _halfvec_column_type(dim: int = 384):
+    """halfvec(dim) when pgvector available, else ARRAY(Float) for tests."""
+    if HAS_VECTOR:
+        return HALFVEC(dim)
+    return ARRAY(Float)
+
+
 class Base(DeclarativeBase):
     pass
 
@@ -33,6 +41,8 @@ class Document(Base):
     path: Mapped[str] = mapped_column(String(1024), nullable=False)
     meta: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
     version: Mapped[str] = mapped_column(Text, nullable=False)
+    # Mean of the document's chunk embeddings (migration 013), first stage of hierarchical search
+    embedding: Mapped[list[float] | None] = mapped_column(_embedding_column_type(384), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
 
     chunks: Mapped[list["Chunk"]] = relationship("Chunk", back_populates="document")
@@ -47,6 +57,11 @@ class Chunk(Base):
         UUID(as_uuid=True), ForeignKey("retrieval.documents.id"), nullable=False
     )
     text: Mapped[str] = mapped_column(Text, nullable=False)
+    # Copy of documents.version (migration 010): vector search filters chunks without the join
+    version: Mapped[str] = mapped_column(Text, nullable=False)
+    section_id: Mapped[uuid4] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("retrieval.sections.id", ondelete="SET NULL"), nullable=True
+    )
     index_in_doc: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     section_title: Mapped[str | None] = mapped_column(Text, nullable=True)
     document_title: Mapped[str | None] = mapped_column(String(512), nullable=True)
@@ -55,6 +70,65 @@ class Chunk(Base):
     embedding: Mapped[list[float] | None] = mapped_column(
         _embedding_column_type(384), nullable=True
     )
+    # Quantized copies written by ingest (migration 011): compact ANN prefilter, embedding rescores
+    embedding_half: Mapped[list[float] | None] = mapped_column(_halfvec_column_type(384), nullable=True)
+    embedding_bin: Mapped[str | None] = mapped_column(BIT(384), nullable=True)
+    # PCA-reduced embedding (migration 012, dimension RETRIEVAL_PCA_DIM); projection in pca_projections
+    embedding_pca: Mapped[list[float] | None] = mapped_column(_embedding_column_type(None), nullable=True)
+    # Written by ingest (shared.tokenize.term_frequencies, migration 008): keyword scoring without re-tokenizing
+    lexical_terms: Mapped[list[str] | None] = mapped_column(ARRAY(Text), nullable=True)
+    lexical_tf: Mapped[list[int] | None] = mapped_column(ARRAY(Integer), nullable=True)
+    lexical_len: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # Generated column owned by migration 006 (dictionary: RETRIEVAL_TEXT_SEARCH_CONFIG at
+    # migration time); FetchedValue only tells the ORM never to write it
+    tsv: Mapped[str | None] = mapped_column(
+        TSVECTOR, FetchedValue(), server_onupdate=FetchedValue(), nullable=True
+    )
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
 
     document: Mapped["Document"] = relationship("Document", back_populates="chunks")
+
+
+class Section(Base):
+    """Markdown section of a document: chunks from one header to the next (migration 013)."""
+
+    __tablename__ = "sections"
+    __table_args__ = {"schema": "retrieval"}
+
+    id: Mapped[uuid4] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    document_id: Mapped[uuid4] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("retrieval.documents.id", ondelete="CASCADE"), nullable=False
+    )
+    version: Mapped[str] = mapped_column(Text, nullable=False)
+    section_key: Mapped[str] = mapped_column(Text, nullable=False)
+    section_title: Mapped[str | None] = mapped_column(Text, nullable=True)
+    chunk_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Mean of the section's chunk embeddings, first stage of hierarchical search
+    embedding: Mapped[list[float] | None] = mapped_column(_embedding_column_type(384), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+
+
+class KbGeneration(Base):
+    """Per-version KB generation counter; ingest bumps it after every run."""
+
+    __tablename__ = "kb_generation"
+    __table_args__ = {"schema": "retrieval"}
+
+    version: Mapped[str] = mapped_column(Text, primary_key=True)
+    generation: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+
+
+class Projection(Base):
+    """PCA projection fitted by ingest for one KB version (shared.pca.PcaProjection)."""
+
+    __tablename__ = "pca_projections"
+    __table_args__ = {"schema": "retrieval"}
+
+    version: Mapped[str] = mapped_column(Text, primary_key=True)
+    dim_in: Mapped[int] = mapped_column(Integer, nullable=False)
+    dim_out: Mapped[int] = mapped_column(Integer, nullable=False)
+    mean: Mapped[list[float]] = mapped_column(ARRAY(REAL), nullable=False)
+    components: Mapped[list[float]] = mapped_column(ARRAY(REAL), nullable=False)
+    explained_variance: Mapped[float] = mapped_column(Float, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
@@ -0,0 +1,106 @@
+"""Neighbor expansion: the ±n chunks around each hit (same document, adjacent position) in one query."""
+from dataclasses import replace
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import and_, bindparam, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from retrieval.storage.base import SearchResult
+from retrieval.storage.models import Chunk, Document
+
+
+def _uuid(value: str) -> UUID | None:
+    try:
+        return UUID(value)
+    except ValueError:
+        return None
+
+
+class NeighborExpander:
+    """Adds adjacent chunks of each hit, flagged with SearchResult.neighbor_of.
+
+    One self-join of retrieval.chunks per call, driven by the (document_id, position)
+    unique index. A neighbor inherits the score of its hit, so score-ordered consumers
+    keep it next to the hit; chunks already in the results are never repeated.
+    """
+
+    def __init__(self, session_factory: type[AsyncSession]) -> None:
+        self._session_factory = session_factory
+
+    async def expand(self, results: list[SearchResult], n: int) -> list[SearchResult]:
+        return (await self.expand_many([results], [n]))[0]
+
+    async def expand_many(self, batches: list[list[SearchResult]], ns: list[int]) -> list[list[SearchResult]]:
+        """Expand several result lists with one query; batches[i] gets ±ns[i] neighbors per hit."""
+        wanted = {r.chunk_id for rs, n in zip(batches, ns) if n > 0 for r in rs}
+        ids = [u for u in map(_uuid, wanted) if u is not None]
+        if not ids:
+            return batches
+        rows = await self._fetch(ids, max(ns))
+        by_hit: dict[str, list[Any]] = {}
+        for row in rows:
+            by_hit.setdefault(str(row[0]), []).append(row)
+        return [self._interleave(rs, by_hit, n) if n > 0 else rs for rs, n in zip(batches, ns)]
+
+    async def _fetch(self, ids: list[UUID], n: int) -> list[Any]:
+        hit = aliased(Chunk, name="hit")
+        stmt = (
+            select(
+                hit.id,
+                hit.position,
+                Chunk.id,
+                Chunk.text,
+                Document.source,
+                Document.version,
+                Chunk.section_title,
+                Chunk.document_title,
+                Chunk.position,
+            )
+            .select_from(hit)
+            .join(
+                Chunk,
+                and_(
+                    Chunk.document_id == hit.document_id,
+                    Chunk.position.between(hit.position - bindparam("n"), hit.position + bindparam("n")),
+                    Chunk.position != hit.position,
+                ),
+            )
+            .join(Document, Document.id == Chunk.document_id)
+            .where(hit.id.in_(ids))
+            .order_by(hit.id, Chunk.position)
+        )
+        async with self._session_factory() as session:
+            return (await session.execute(stmt, {"n": n})).all()
+
+    @staticmethod
+    def _interleave(results: list[SearchResult], by_hit: dict[str, list[Any]], n: int) -> list[SearchResult]:
+        """Each hit surrounded by its neighbors in position order; hit order is kept."""
+        seen = {r.chunk_id for r in results}
+        out: list[SearchResult] = []
+        for r in results:
+            before: list[SearchResult] = []
+            after: list[SearchResult] = []
+            for row in by_hit.get(r.chunk_id, ()):
+                hit_position, chunk_id, position = row[1], str(row[2]), int(row[8] or 0)
+                if chunk_id in seen or abs(position - hit_position) > n:
+                    continue
+                seen.add(chunk_id)
+                neighbor = replace(
+                    r,
+                    chunk_id=chunk_id,
+                    text=row[3] or "",
+                    source=row[4] or "",
+                    distance=None,
+                    version=row[5],
+                    document_title=(row[7] or row[4] or "").strip() or None,
+                    section_title=(row[6] or "").strip() if row[6] else None,
+                    position=position,
+                    neighbor_of=r.chunk_id,
+                )
+                (before if position < hit_position else after).append(neighbor)
+            out.extend(before)
+            out.append(r)
+            out.extend(after)
+        return out
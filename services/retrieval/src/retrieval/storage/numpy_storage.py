@@ -0,0 +1,257 @@
+"""In-memory exact vector search: per-version float32 matrices, no DB round trip per query."""
+import asyncio
+import time
+from typing import Any
+
+import numpy as np
+import structlog
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared.tokenize import tokenize
+
+from retrieval.metrics import NUMPY_INDEX_BYTES, NUMPY_INDEX_LOADS, NUMPY_INDEX_ROWS
+from retrieval.service.kb_generation import KbGenerationWatcher
+from retrieval.service.query_encoder import QueryEncoder
+from retrieval.storage.base import SearchOptions, SearchQuery, SearchResult, Storage
+from retrieval.storage.mmr import mmr
+from retrieval.storage.models import Chunk, Document
+from retrieval.storage.scoring import build_result, cosine_to_l2, query_terms, rank_key
+from retrieval.storage.snapshot import SnapshotStore
+from retrieval.storage.vector_index import VersionIndex, nearest
+
+__all__ = ["NumpyStorage", "VersionIndex", "nearest"]
+
+
+class NumpyStorage(Storage):
+    """Vector search over embeddings held in RAM, loaded from Postgres per KB version.
+
+    Each version is one contiguous float32 matrix; a query is a single matmul plus
+    argpartition (exact, no ANN recall loss). reload(versions) rebuilds only the given
+    versions and swaps them in atomically; subscribe it to KbGenerationWatcher.
+    Scoring (confidence, keyword boost, min_score, MMR) matches PgVectorStorage vector mode.
+
+    With a SnapshotStore and KbGenerationWatcher, versions are memory-mapped from the
+    snapshot of their current generation; a missing snapshot is built from Postgres once
+    (under a per-host file lock) and then shared by all workers.
+    """
+
+    def __init__(
+        self,
+        session_factory: type[AsyncSession],
+        embedder: Any | None = None,
+        min_score: float = 0.35,
+        kb_latest_version: str = "6.1 (latest)",
+        query_encoder: QueryEncoder | None = None,
+        vector_distance: str = "l2",
+        dim: int = 384,
+        mmr_lambda: float | None = None,
+        mmr_candidates: int = 4,
+        snapshot: SnapshotStore | None = None,
+        kb_generation: KbGenerationWatcher | None = None,
+    ) -> None:
+        self._session_factory = session_factory
+        self._query_encoder = query_encoder or (QueryEncoder(embedder) if embedder is not None else None)
+        self._min_score = min_score
+        self._kb_latest_version = kb_latest_version
+        self._vector_distance = (vector_distance or "l2").lower()
+        self._dim = dim
+        self._mmr_lambda = mmr_lambda
+        self._mmr_candidates = max(2, mmr_candidates)
+        self._snapshot = snapshot
+        self._kb_generation = kb_generation
+        self._indexes: dict[str, VersionIndex] = {}
+        self._published: set[str] = set()
+        self._lock = asyncio.Lock()
+
+    @property
+    def versions(self) -> dict[str, int]:
+        """Loaded versions and their chunk counts."""
+        return {v: ix.size for v, ix in self._indexes.items()}
+
+    def get_index(self, version: str) -> VersionIndex | None:
+        return self._indexes.get(version)
+
+    def set_index(self, index: VersionIndex) -> None:
+        self._indexes = {**self._indexes, index.version: index}
+        self._publish()
+
+    async def load(self) -> None:
+        """Load all versions (startup). DB errors are logged; the index stays as it was."""
+        await self._reload(None)
+
+    async def reload(self, versions: set[str]) -> None:
+        """Rebuild the given versions (KbGenerationWatcher subscriber); versions without chunks are dropped."""
+        if versions:
+            await self._reload(set(versions))
+
+    async def _reload(self, versions: set[str] | None) -> None:
+        log = structlog.get_logger()
+        async with self._lock:
+            t0 = time.perf_counter()
+            try:
+                if versions is None or self._snapshot is None or self._kb_generation is None:
+                    built = await self._fetch(versions)
+                    NUMPY_INDEX_LOADS.labels(source="db").inc(len(built))
+                else:
+                    built = await self._load_snapshots(versions)
+            except Exception as e:
+                log.warning("numpy_index_load_failed", exc_type=type(e).__name__, exc_msg=str(e)[:200])
+                return
+            indexes = dict(self._indexes) if versions is not None else {}
+            for version in versions or ():
+                indexes.pop(version, None)
+            indexes.update(built)
+            await self._on_loaded(built, indexes)
+            self._indexes = indexes
+            self._publish()
+            log.info(
+                "numpy_index_loaded",
+                versions=sorted(built),
+                rows=sum(ix.size for ix in built.values()),
+                ms=int((time.perf_counter() - t0) * 1000),
+            )
+
+    async def _on_loaded(self, built: dict[str, VersionIndex], indexes: dict[str, VersionIndex]) -> None:
+        """Hook for subclasses: runs before `indexes` replaces the live set (built = reloaded versions)."""
+
+    async def _load_snapshots(self, versions: set[str]) -> dict[str, VersionIndex]:
+        assert self._snapshot is not None and self._kb_generation is not None
+        snapshot = self._snapshot
+        built: dict[str, VersionIndex] = {}
+        for version in sorted(versions):
+            generation = self._kb_generation.versions.get(version)
+            if generation is None:
+                # Unknown to kb_generation: nothing to check a snapshot against
+                fetched = await self._fetch({version})
+                NUMPY_INDEX_LOADS.labels(source="db").inc(len(fetched))
+                built.update(fetched)
+                continue
+            index = snapshot.open(version, generation)
+            if index is None:
+                async with snapshot.build_lock(version):
+                    index = snapshot.open(version, generation)  # another worker may have built it
+                    if index is None:
+                        fetched = (await self._fetch({version})).get(version)
+                        if fetched is None:
+                            continue
+                        await asyncio.to_thread(snapshot.write, fetched, generation)
+                        NUMPY_INDEX_LOADS.labels(source="db").inc()
+                        index = snapshot.open(version, generation) or fetched
+                    else:
+                        NUMPY_INDEX_LOADS.labels(source="snapshot").inc()
+            else:
+                NUMPY_INDEX_LOADS.labels(source="snapshot").inc()
+            if index.size:
+                built[version] = index
+        return built
+
+    async def _fetch(self, versions: set[str] | None) -> dict[str, VersionIndex]:
+        stmt = (
+            select(
+                Chunk.id,
+                Chunk.text,
+                Document.source,
+                Document.version,
+                Chunk.section_title,
+                Chunk.document_title,
+                Chunk.position,
+                Chunk.lexical_terms,
+                Chunk.embedding,
+            )
+            .join(Document, Chunk.document_id == Document.id)
+            .where(Chunk.embedding.isnot(None))
+            .order_by(Document.version, Chunk.id)
+        )
+        if versions is not None:
+            stmt = stmt.where(Document.version.in_(sorted(versions)))
+        async with self._session_factory() as session:
+            result = await session.execute(stmt)
+            grouped: dict[str, tuple[list[tuple], list[Any]]] = {}
+            for row in result.all():
+                rows, vectors = grouped.setdefault(row[3], ([], []))
+                # Term set precomputed once per load: keyword scoring is a set intersection
+                terms = frozenset(row[7]) if row[7] is not None else frozenset(tokenize(row[1] or ""))
+                rows.append((*row[:7], terms))
+                vectors.append(row[8])
+        return {
+            version: VersionIndex.build(version, rows, vectors, self._dim)
+            for version, (rows, vectors) in grouped.items()
+        }
+
+    def _publish(self) -> None:
+        for version in self._published - set(self._indexes):
+            NUMPY_INDEX_ROWS.remove(version)
+            NUMPY_INDEX_BYTES.remove(version)
+        for version, ix in self._indexes.items():
+            NUMPY_INDEX_ROWS.labels(version=version).set(ix.size)
+            NUMPY_INDEX_BYTES.labels(version=version).set(ix.nbytes)
+        self._published = set(self._indexes)
+
+    async def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        version: str | None = None,
+        options: SearchOptions | None = None,
+    ) -> list[SearchResult]:
+        return (await self.search_many([SearchQuery(query, top_k, version, options)]))[0]
+
+    async def search_many(self, queries: list[SearchQuery]) -> list[list[SearchResult]]:
+        """One encode call for the batch, one matmul per (version, top_k, options) group."""
+        if not queries:
+            return []
+        if self._query_encoder is None:
+            raise RuntimeError("NumpyStorage requires an embedder or query encoder")
+        embeddings = np.asarray(
+            await self._query_encoder.encode([q.query for q in queries]), dtype=np.float32
+        )
+        groups: dict[tuple[str, int, SearchOptions | None], list[int]] = {}
+        for i, q in enumerate(queries):
+            version = q.version if q.version is not None else self._kb_latest_version
+            groups.setdefault((version, q.top_k, q.options), []).append(i)
+        out: list[list[SearchResult]] = [[] for _ in queries]
+        for (version, top_k, options), members in groups.items():
+            index = self._indexes.get(version)
+            if index is None:
+                continue
+            lam = options.mmr_lambda if options and options.mmr_lambda is not None else self._mmr_lambda
+            k = top_k * (self._mmr_candidates if lam is not None else 2)
+            idx, dist = self._nearest(index, embeddings[members], k, options)
+            for row_i, i in enumerate(members):
+                out[i] = self._to_results(
+                    queries[i].query, index, idx[row_i], dist[row_i], top_k, lam
+                )
+        return out
+
+    def _nearest(
+        self, index: VersionIndex, queries: np.ndarray, k: int, options: SearchOptions | None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Row indices into index.rows and distances; exact here, options are ignored."""
+        return nearest(index, queries, k, self._vector_distance)
+
+    def _to_results(
+        self,
+        query: str,
+        index: VersionIndex,
+        idx: np.ndarray,
+        dist: np.ndarray,
+        top_k: int,
+        mmr_lambda: float | None = None,
+    ) -> list[SearchResult]:
+        q_terms = query_terms(query)
+        scored: list[tuple[SearchResult, int]] = []
+        for j, d in zip(idx.tolist(), dist.tolist()):
+            if j < 0:  # padding from approximate search
+                continue
+            distance = cosine_to_l2(d) if self._vector_distance == "cosine" else d
+            row = index.rows[j]
+            r = build_result(q_terms, row, distance, row[7] if len(row) > 7 else None)
+            if r.score >= self._min_score:
+                scored.append((r, j))
+        scored.sort(key=lambda p: rank_key(p[0]))
+        if mmr_lambda is None or len(scored) <= 1:
+            return [r for r, _ in scored[:top_k]]
+        relevance = np.array([r.score for r, _ in scored])
+        picked = mmr(relevance, index.matrix[[j for _, j in scored]], top_k, mmr_lambda)
+        return [scored[i][0] for i in picked]
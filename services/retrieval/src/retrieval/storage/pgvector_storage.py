@@ -1,16 +1,39 @@
 """PgVector storage: vector search (pgvector), optional text/hybrid fallback."""
+import asyncio
+import contextlib
 import json
 import os
-import re
 import time
 from typing import Any
 
-from sqlalchemy import bindparam, func, or_, select
+import numpy as np
+from sqlalchemy import Float, Text, any_, bindparam, case, cast, func, literal_column, select, text
+from sqlalchemy.dialects.postgresql import ARRAY, TSQUERY
 from sqlalchemy.exc import ProgrammingError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from retrieval.storage.base import SearchResult, Storage
-from retrieval.storage.models import Chunk, Document
+from shared.pca import PcaProjection
+
+from retrieval.metrics import SEARCH_REFETCHES, SEARCH_ROWS_FETCHED, SEARCH_ROWS_RETURNED
+from retrieval.service.query_encoder import QueryEncoder
+from retrieval.storage.base import SearchOptions, SearchQuery, SearchResult, SearchTrace, Storage
+from retrieval.storage.explain import Explain, PlanSummary
+from retrieval.storage.mmr import mmr
+from retrieval.storage.models import Chunk, Document, Projection, Section
+from retrieval.storage.scoring import (
+    VECTOR_WEIGHT,
+    build_result,
+    cosine_to_l2,
+    min_score_params,
+    query_terms,
+    rank_key,
+    row_result,
+)
+
+try:
+    from pgvector.sqlalchemy import BIT, HALFVEC, Vector
+except ImportError:  # vector and hybrid modes return [] without pgvector
+    Vector = None
 
 # #region agent log
 def _dlog(msg: str, data: dict, hypothesis_id: str) -> None:
@@ -23,23 +46,36 @@ def _dlog(msg: str, data: dict, hypothesis_id: str) -> None:
 # #endregion
 
 
-def _query_word_overlap(query: str, text: str) -> int:
-    """Number of query words (len>=2) that appear in text. For tie-break when distances are equal."""
-    q_words = {w for w in re.findall(r"\w+", query.lower()) if len(w) >= 2}
-    if not q_words:
-        return 0
-    text_words = {w for w in re.findall(r"\w+", (text or "").lower()) if len(w) >= 2}
-    return len(q_words & text_words)
+def _rrf_fuse(rankings: list[list[str]], weights: list[float], k: int = 60) -> dict[str, float]:
+    """Weighted reciprocal rank fusion: sum of weight / (k + rank) over rankings (rank from 1)."""
+    fused: dict[str, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, item in enumerate(ranking, start=1):
+            fused[item] = fused.get(item, 0.0) + weight / (k + rank)
+    return fused
+
+
+# session.info key: ivfflat.probes was SET LOCAL in the session's transaction
+_PROBES_SET = "retrieval_probes_set"
+# pgvector's default hnsw.ef_search, used when neither the request nor the settings give one
+_HNSW_EF_SEARCH = 40
+# pgvector accepts hnsw.ef_search in 1..1000; ANN scan LIMITs are capped to the same value
+_HNSW_EF_SEARCH_MAX = 1000
+
 
+def _stage(trace: SearchTrace | None, name: str):
+    return trace.stage(name) if trace is not None else contextlib.nullcontext()
 
-def _keyword_score(query: str, text: str) -> float:
-    """BM25-like simplified: fraction of query words found in text, in [0, 1]."""
-    q_words = [w for w in re.findall(r"\w+", query.lower()) if len(w) >= 2]
-    if not q_words:
-        return 0.0
-    text_lower = (text or "").lower()
-    hits = sum(1 for w in q_words if w in text_lower)
-    return min(1.0, hits / len(q_words))
+
+def _trace_keyword_scores(trace: SearchTrace | None, results: list[SearchResult]) -> None:
+    """Text search: the whole score is trigram similarity, i.e. keyword relevance."""
+    if trace is not None:
+        for r in results:
+            trace.scores[r.chunk_id] = {"vector": 0.0, "keyword": r.score}
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
 
 
 def _get_embedder():  # lazy import to avoid loading sentence_transformers at import time
@@ -57,54 +93,253 @@ class PgVectorStorage(Storage):
         retrieval_mode: str = "vector",
         min_score: float = 0.35,
         kb_latest_version: str = "6.1 (latest)",
+        query_encoder: QueryEncoder | None = None,
+        text_search_config: str = "russian",
+        hybrid_vector_weight: float = 1.0,
+        hybrid_lexical_weight: float = 1.0,
+        hybrid_rrf_k: int = 60,
+        hybrid_candidates: int = 4,
+        vector_distance: str = "l2",
+        hnsw_ef_search: int | None = None,
+        ivfflat_probes: int | None = None,
+        word_similarity_threshold: float | None = 0.3,
+        per_version_indexes: bool = True,
+        quantization: str = "none",
+        rescore_factor: int = 4,
+        pca: bool = False,
+        hierarchical: str = "none",
+        hierarchical_top_n: int = 10,
+        overfetch: int = 2,
+        overfetch_max: int = 16,
+        mmr_lambda: float | None = None,
+        mmr_candidates: int = 4,
+        raise_on_error: bool = False,
     ) -> None:
         self._session_factory = session_factory
         self._embedder = embedder
+        self._query_encoder = query_encoder
         self._retrieval_mode = (retrieval_mode or "vector").lower()
         self._min_score = min_score
         self._kb_latest_version = kb_latest_version
+        self._text_search_config = text_search_config
+        self._hybrid_vector_weight = hybrid_vector_weight
+        self._hybrid_lexical_weight = hybrid_lexical_weight
+        self._hybrid_rrf_k = hybrid_rrf_k
+        self._hybrid_candidates = hybrid_candidates
+        self._vector_distance = (vector_distance or "l2").lower()
+        self._hnsw_ef_search = hnsw_ef_search
+        self._ivfflat_probes = ivfflat_probes
+        self._word_similarity_threshold = word_similarity_threshold
+        self._per_version_indexes = per_version_indexes
+        self._quantization = (quantization or "none").lower()
+        self._rescore_factor = max(1, rescore_factor)
+        self._pca = pca
+        self._projections: dict[str, PcaProjection | None] = {}
+        self._hierarchical = (hierarchical or "none").lower()
+        self._hierarchical_top_n = hierarchical_top_n
+        self._overfetch = max(1, overfetch)
+        self._overfetch_max = max(self._overfetch, overfetch_max)
+        self._mmr_lambda = mmr_lambda
+        self._mmr_candidates = max(2, mmr_candidates)
+        # Vector / hybrid errors propagate instead of returning [] (ReplicaRouter falls back on them)
+        self._raise_on_error = raise_on_error
+
+    def set_projection(self, version: str, projection: PcaProjection | None) -> None:
+        self._projections[version] = projection
+
+    async def reload(self, versions: set[str]) -> None:
+        """Forget cached PCA projections of re-ingested versions (KbGenerationWatcher subscriber)."""
+        for version in versions:
+            self._projections.pop(version, None)
+
+    async def _projection(self, version: str) -> PcaProjection | None:
+        """PCA projection of the version (migration 012), cached until the version is re-ingested."""
+        if not self._pca:
+            return None
+        if version in self._projections:
+            return self._projections[version]
+        stmt = select(
+            Projection.mean, Projection.components, Projection.dim_out, Projection.explained_variance
+        ).where(Projection.version == version)
+        try:
+            async with self._session_factory() as session:
+                row = (await session.execute(stmt)).first()
+        except ProgrammingError as e:
+            if "does not exist" not in str(e):
+                raise
+            row = None  # migration 012 not applied: full-dimension search
+        projection = PcaProjection.from_flat(row[0], row[1], row[2], row[3]) if row else None
+        self._projections[version] = projection
+        return projection
 
     async def search(
-        self, query: str, top_k: int = 5, version: str | None = None
+        self,
+        query: str,
+        top_k: int = 5,
+        version: str | None = None,
+        options: SearchOptions | None = None,
     ) -> list[SearchResult]:
         effective_version = version if version is not None else self._kb_latest_version
         # #region agent log
         _dlog("search entry", {"query": query[:50], "top_k": top_k, "version": effective_version}, "H1")
         # #endregion
         async with self._session_factory() as session:
-            if self._retrieval_mode == "text":
-                return await self._text_search(session, query, top_k, effective_version)
-            if self._retrieval_mode in ("vector", "hybrid"):
-                try:
+            return await self._search_in_session(
+                session, query, top_k, effective_version, options=options
+            )
+
+    async def search_many(self, queries: list[SearchQuery]) -> list[list[SearchResult]]:
+        """Batch search: all query vectors in one embedder call, lookups in one session."""
+        if not queries:
+            return []
+        embeddings: list[list[float] | None] = [None] * len(queries)
+        if self._retrieval_mode in ("vector", "hybrid"):
+            try:
+                embeddings = list(
+                    await self._get_query_encoder().encode([q.query for q in queries])
+                )
+            except Exception as e:
+                # #region agent log
+                _dlog("search_many embed exception", {"exc_type": type(e).__name__, "exc_msg": str(e)[:250]}, "H3")
+                # #endregion
+                return [[] for _ in queries]
+        out: list[list[SearchResult]] = []
+        async with self._session_factory() as session:
+            for q, emb in zip(queries, embeddings):
+                effective_version = q.version if q.version is not None else self._kb_latest_version
+                out.append(
+                    await self._search_in_session(
+                        session,
+                        q.query,
+                        q.top_k,
+                        effective_version,
+                        query_embedding=emb,
+                        options=q.options,
+                    )
+                )
+        return out
+
+    async def explain(
+        self,
+        query: str,
+        top_k: int = 5,
+        version: str | None = None,
+        options: SearchOptions | None = None,
+        analyze: bool = True,
+    ) -> tuple[list[SearchResult], SearchTrace]:
+        """One search with per-stage timings and the EXPLAIN of every statement it ran.
+
+        Statements are EXPLAINed right after they run, so with analyze the plan's timings and
+        buffers are those of a second, warm execution. Errors are reported in trace.error;
+        with raise_on_error they are raised instead, so a ReplicaRouter falls back.
+        """
+        effective_version = version if version is not None else self._kb_latest_version
+        trace = SearchTrace(backend="pgvector", mode=self._retrieval_mode, analyze=analyze)
+        results: list[SearchResult] = []
+        try:
+            async with self._session_factory() as session:
+                if self._retrieval_mode == "text":
+                    results = await self._text_search(session, query, top_k, effective_version, trace)
+                elif self._retrieval_mode == "hybrid":
+                    results = await self._hybrid_search(
+                        query, top_k, effective_version, options=options, trace=trace
+                    )
+                elif self._retrieval_mode == "vector":
+                    results = await self._vector_search(
+                        session, query, top_k, effective_version, options=options, trace=trace
+                    )
+        except Exception as e:
+            if self._raise_on_error:
+                raise
+            trace.error = f"{type(e).__name__}: {str(e)[:200]}"
+        return results, trace
+
+    async def _execute_rows(
+        self,
+        session: AsyncSession,
+        stmt,
+        params: dict[str, Any],
+        trace: SearchTrace | None = None,
+        statement: str = "",
+        stage: str = "sql",
+    ) -> list[Any]:
+        """All rows of stmt; with a trace the execution is timed as `stage` and then EXPLAINed."""
+        if trace is None:
+            return (await session.execute(stmt, params)).all()
+        with trace.stage(stage):
+            rows = (await session.execute(stmt, params)).all()
+        plan = (await session.execute(Explain(stmt, trace.analyze), params)).scalar()
+        trace.plans.append(PlanSummary.from_json(statement, plan))
+        return rows
+
+    async def _search_in_session(
+        self,
+        session: AsyncSession,
+        query: str,
+        top_k: int,
+        version: str,
+        query_embedding: list[float] | None = None,
+        options: SearchOptions | None = None,
+    ) -> list[SearchResult]:
+        if self._retrieval_mode == "text":
+            try:
+                return await self._text_search(session, query, top_k, version)
+            except ProgrammingError as e:
+                # pg_trgm operators/functions missing: migration 009 not applied
+                if "does not exist" in str(e) and not self._raise_on_error:
+                    await session.rollback()
+                    return []
+                raise
+        if self._retrieval_mode in ("vector", "hybrid"):
+            try:
+                if self._retrieval_mode == "hybrid":
+                    out = await self._hybrid_search(
+                        query, top_k, version, query_embedding=query_embedding, options=options
+                    )
+                else:
                     out = await self._vector_search(
-                        session, query, top_k, effective_version
+                        session,
+                        query,
+                        top_k,
+                        version,
+                        query_embedding=query_embedding,
+                        options=options,
                     )
-                    top_score = max((r.score for r in out), default=0.0)
-                    try:
-                        import structlog
-                        structlog.get_logger().info(
-                            "retrieval_search",
-                            query=query[:100],
-                            top_score=round(top_score, 4),
-                            retrieved_count=len(out),
-                        )
-                    except Exception:
-                        _dlog("search result", {"top_score": top_score, "retrieved_count": len(out)}, "H1")
-                    return out
-                except ProgrammingError as e:
-                    # #region agent log
-                    _dlog("vector_search ProgrammingError", {"exc_msg": str(e)[:250]}, "H1")
-                    # #endregion
-                    if "does not exist" in str(e):
-                        return []
-                    raise
-                except Exception as e:
-                    # #region agent log
-                    _dlog("vector_search exception", {"exc_type": type(e).__name__, "exc_msg": str(e)[:250]}, "H3")
-                    # #endregion
+                top_score = max((r.score for r in out), default=0.0)
+                try:
+                    import structlog
+                    structlog.get_logger().info(
+                        "retrieval_search",
+                        query=query[:100],
+                        top_score=round(top_score, 4),
+                        retrieved_count=len(out),
+                    )
+                except Exception:
+                    _dlog("search result", {"top_score": top_score, "retrieved_count": len(out)}, "H1")
+                return out
+            except ProgrammingError as e:
+                # #region agent log
+                _dlog("vector_search ProgrammingError", {"exc_msg": str(e)[:250]}, "H1")
+                # #endregion
+                if "does not exist" in str(e) and not self._raise_on_error:
                     await session.rollback()
                     return []
-            return []
+                raise
+            except Exception as e:
+                # #region agent log
+                _dlog("vector_search exception", {"exc_type": type(e).__name__, "exc_msg": str(e)[:250]}, "H3")
+                # #endregion
+                if self._raise_on_error:
+                    raise
+                await session.rollback()
+                return []
+        return []
+
+    def _get_query_encoder(self) -> QueryEncoder:
+        if self._query_encoder is None:
+            embedder = self._embedder if self._embedder is not None else _get_embedder()()
+            self._query_encoder = QueryEncoder(embedder)
+        return self._query_encoder
 
     async def _text_search(
         self,
@@ -112,11 +347,20 @@ class PgVectorStorage(Storage):
         query: str,
         top_k: int,
         version: str | None = None,
+        trace: SearchTrace | None = None,
     ) -> list[SearchResult]:
-        """ILIKE + word-based fallback; no q_any. Returns [] when nothing matches."""
+        """Trigram text search (pg_trgm GIN index, migration 009). Returns [] when nothing matches.
+
+        Phrase hits (ILIKE, index-assisted) come first, ranked by similarity to the query;
+        otherwise chunks containing words similar to the query (word_similarity, <%) are
+        ranked by that similarity, which is also their score.
+        """
         # #region agent log
         _dlog("_text_search execute", {"query": query[:30]}, "H3")
         # #endregion
+        if not query.strip():
+            return []
+        q_text = bindparam("q_text")
         base = (
             select(
                 Chunk.id,
@@ -128,157 +372,491 @@ class PgVectorStorage(Storage):
                 Chunk.position,
             )
             .join(Document, Chunk.document_id == Document.id)
-            .where(Document.version == version)
+            .where(Chunk.version == bindparam("version"))
+        )
+        params = {"q_text": query, "version": version, "pattern": f"%{_escape_like(query)}%"}
+        phrase = (
+            base.where(Chunk.text.ilike(bindparam("pattern"), escape="\\"))
+            .order_by(func.similarity(Chunk.text, q_text).desc())
+            .limit(top_k)
         )
-        q = base.where(Chunk.text.ilike(f"%{query}%")).limit(top_k * 2)
-        result = await session.execute(q)
-        rows = result.all()
-        out: list[SearchResult] = []
-        for i, row in enumerate(rows[:top_k]):
-            chunk_id, text_val, source, doc_version = row[0], row[1], row[2], row[3]
-            section_title = row[4] if len(row) > 4 else None
-            document_title = row[5] if len(row) > 5 else None
-            position = int(row[6]) if len(row) > 6 else 0
-            doc_title = (document_title or source or "").strip() or None
-            out.append(
-                SearchResult(
-                    chunk_id=str(chunk_id),
-                    text=text_val or "",
-                    source=source or "",
-                    score=1.0 - (i * 0.05),
-                    confidence=1.0 - (i * 0.05),
-                    version=doc_version,
-                    document_title=doc_title,
-                    section_title=(section_title or "").strip() if section_title else None,
-                    position=position,
+        rows = await self._execute_rows(session, phrase, params, trace, "phrase")
+        if rows:
+            out = [row_result(row, 1.0 - i * 0.05) for i, row in enumerate(rows)]
+            _trace_keyword_scores(trace, out)
+            return out
+        if self._word_similarity_threshold is not None:
+            await session.execute(
+                text(
+                    "SET LOCAL pg_trgm.word_similarity_threshold = "
+                    f"{float(self._word_similarity_threshold):.3f}"
                 )
             )
-        if not out and query.strip():
-            words = [w for w in re.split(r"\W+", query) if len(w) >= 2][:6]
-            if words:
-                q_words = base.where(
-                    or_(*[Chunk.text.ilike(f"%{w}%") for w in words])
-                ).limit(top_k * 2)
-                r_words = await session.execute(q_words)
-                seen = set()
-                for row in r_words.all():
-                    chunk_id, text_val, source, doc_version = row[0], row[1], row[2], row[3]
-                    section_title = row[4] if len(row) > 4 else None
-                    document_title = row[5] if len(row) > 5 else None
-                    position = int(row[6]) if len(row) > 6 else 0
-                    doc_title = (document_title or source or "").strip() or None
-                    if chunk_id not in seen and len(out) < top_k:
-                        seen.add(chunk_id)
-                        out.append(
-                            SearchResult(
-                                chunk_id=str(chunk_id),
-                                text=text_val or "",
-                                source=source or "",
-                                score=0.7,
-                                confidence=0.7,
-                                version=doc_version,
-                                document_title=doc_title,
-                                section_title=(section_title or "").strip() if section_title else None,
-                                position=position,
-                            )
-                        )
+        sim = func.word_similarity(q_text, Chunk.text)
+        words = (
+            base.add_columns(sim.label("sim"))
+            .where(q_text.op("<%")(Chunk.text))
+            .order_by(sim.desc())
+            .limit(top_k)
+        )
+        rows = await self._execute_rows(session, words, params, trace, "words")
+        out = [row_result(row, float(row[7])) for row in rows]
+        _trace_keyword_scores(trace, out)
         return out
 
+    def _distance_expr(self):
+        # Use l2_distance()/cosine_distance() so return_type=Float is set; operator must
+        # match the ANN index opclass (migration 007) for the index to be used
+        q_emb = bindparam("q_emb", type_=Vector(384))
+        if self._vector_distance == "cosine":
+            return Chunk.embedding.cosine_distance(q_emb)
+        return Chunk.embedding.l2_distance(q_emb)
+
+    def _prefilter_expr(self, dist_col, projection: PcaProjection | None = None):
+        """ANN ordering: PCA-reduced column (012) or quantized column (011) when enabled, else the exact distance."""
+        if projection is not None:
+            q_pca = bindparam("q_pca", type_=Vector(projection.dim_out))
+            if self._vector_distance == "cosine":
+                return Chunk.embedding_pca.cosine_distance(q_pca)
+            return Chunk.embedding_pca.l2_distance(q_pca)
+        if self._quantization == "halfvec":
+            q_half = cast(bindparam("q_emb", type_=Vector(384)), HALFVEC(384))
+            if self._vector_distance == "cosine":
+                return Chunk.embedding_half.cosine_distance(q_half)
+            return Chunk.embedding_half.l2_distance(q_half)
+        if self._quantization == "binary":
+            q_bin = func.binary_quantize(bindparam("q_emb", type_=Vector(384)), type_=BIT(384))
+            return Chunk.embedding_bin.hamming_distance(q_bin)
+        return dist_col
+
+    def _ann_candidates(self, limit: int, projection: PcaProjection | None = None) -> int:
+        """Rows fetched by the ANN scan; quantized / PCA search over-fetches and rescores.
+
+        Never more than HNSW can return (_HNSW_EF_SEARCH_MAX).
+        """
+        if projection is not None or self._quantization != "none":
+            limit *= self._rescore_factor
+        return min(limit, _HNSW_EF_SEARCH_MAX)
+
+    @staticmethod
+    def _ann_params(
+        query_embedding: list[float], version: str | None, projection: PcaProjection | None
+    ) -> dict[str, Any]:
+        params: dict[str, Any] = {"q_emb": query_embedding, "version": version}
+        if projection is not None:
+            params["q_pca"] = projection.transform(np.asarray([query_embedding]))[0].tolist()
+        return params
+
+    def _cutoff_params(self, q_terms: frozenset[str]) -> dict[str, Any]:
+        """Parameters of the SQL min_score filter (_cutoff); {} when min_score is off."""
+        return min_score_params(self._min_score, q_terms)
+
+    def _cutoff(self, dist_col):
+        """build_result's score >= min_score as a SQL predicate over a chunks row.
+
+        Same formula as scoring.build_result: vector part from the (L2-equivalent) distance,
+        keyword part from the query terms found in chunks.lexical_terms.
+        """
+        l2 = dist_col
+        if self._vector_distance == "cosine":
+            l2 = func.sqrt(func.greatest(literal_column("2.0") * dist_col, literal_column("0.0")))  # cosine_to_l2
+        terms = func.unnest(bindparam("q_terms", type_=ARRAY(Text))).table_valued("term").render_derived()
+        matched = (
+            select(func.count())
+            .select_from(terms)
+            .where(terms.c.term == any_(Chunk.lexical_terms))
+            .scalar_subquery()
+        )
+        keyword = case(
+            (Chunk.lexical_terms.is_(None), bindparam("kw_max", type_=Float)),
+            else_=bindparam("kw_per_term", type_=Float) * matched,
+        )
+        vector = literal_column(repr(VECTOR_WEIGHT)) / (literal_column("1.0") + l2)
+        return vector + keyword >= bindparam("min_score", type_=Float)
+
+    async def _apply_index_params(
+        self, session: AsyncSession, options: SearchOptions | None, limit: int
+    ) -> None:
+        """SET LOCAL hnsw.ef_search / ivfflat.probes for this transaction (request overrides settings).
+
+        hnsw.ef_search is set on every scan: HNSW returns at most ef_search rows (server default
+        40), so it is raised to the scan's LIMIT (pgvector's maximum is 1000), or over-fetch,
+        rescoring and hybrid candidate lists would be silently capped. search_many runs a whole
+        batch in one transaction: once a probes override was set there, later queries without
+        one reset it to DEFAULT.
+        """
+        ef_search = (options.ef_search if options else None) or self._hnsw_ef_search or _HNSW_EF_SEARCH
+        ef_search = min(max(int(ef_search), limit), _HNSW_EF_SEARCH_MAX)
+        await session.execute(text(f"SET LOCAL hnsw.ef_search = {ef_search}"))
+        probes = (options.probes if options else None) or self._ivfflat_probes
+        if probes:
+            await session.execute(text(f"SET LOCAL ivfflat.probes = {int(probes)}"))
+        elif session.info.get(_PROBES_SET, False):
+            await session.execute(text("SET LOCAL ivfflat.probes = DEFAULT"))
+        # A rollback undoes SET LOCAL but not this flag: at worst one redundant reset
+        session.info[_PROBES_SET] = bool(probes)
+
+    def _version_param(self):
+        """:version of the chunk scans; rendered as a literal with per-version indexes.
+
+        A partial index (WHERE version = '...') only matches a plan built for the literal
+        version; a generic plan of the prepared statement would fall back to the global index.
+        """
+        return bindparam("version", literal_execute=self._per_version_indexes)
+
+    def _candidate_select(self, dist_col, with_embedding: bool = False):
+        columns = [
+            Chunk.id,
+            Chunk.text,
+            Document.source,
+            Document.version,
+            Chunk.section_title,
+            Chunk.document_title,
+            Chunk.position,
+            dist_col.label("distance"),
+            Chunk.lexical_terms,
+        ]
+        if with_embedding:
+            columns.append(Chunk.embedding)  # row[9], for MMR
+        return (
+            select(*columns)
+            .join(Document, Chunk.document_id == Document.id)
+            .where(Chunk.version == self._version_param())
+        )
+
+    def _ann_select(
+        self,
+        dist_col,
+        limit: int,
+        projection: PcaProjection | None = None,
+        cutoff: bool = False,
+        with_embedding: bool = False,
+    ):
+        """Nearest `limit` chunks of one version, same columns as _candidate_select.
+
+        The ANN scan runs on retrieval.chunks alone (filter on chunks.version, migration 010),
+        so the planner can use the version's partial HNSW index; documents are joined to
+        the LIMIT rows only. With PCA or quantization the scan orders by the reduced /
+        compact column and fetches _ann_candidates(limit) rows, re-ranked here by the
+        float4 distance. cutoff drops rows below min_score (see _cutoff);
+        with_embedding adds chunks.embedding as the last column.
+        """
+        prefilter = self._prefilter_expr(dist_col, projection)
+        extra = [Chunk.embedding] if with_embedding else []
+        ann = (
+            select(
+                Chunk.id,
+                Chunk.document_id,
+                Chunk.text,
+                Chunk.version,
+                Chunk.section_title,
+                Chunk.document_title,
+                Chunk.position,
+                dist_col.label("distance"),
+                Chunk.lexical_terms,
+                *extra,
+            )
+            .where(Chunk.version == self._version_param(), Chunk.embedding.isnot(None))
+            .order_by(prefilter)
+            .limit(self._ann_candidates(limit, projection))
+        )
+        if cutoff:
+            ann = ann.where(self._cutoff(dist_col))
+        ann = ann.cte("ann")
+        return (
+            select(
+                ann.c.id,
+                ann.c.text,
+                Document.source,
+                ann.c.version,
+                ann.c.section_title,
+                ann.c.document_title,
+                ann.c.position,
+                ann.c.distance,
+                ann.c.lexical_terms,
+                *([ann.c.embedding] if with_embedding else []),
+            )
+            .join(Document, ann.c.document_id == Document.id)
+            .order_by(ann.c.distance)
+            .limit(limit)
+        )
+
+    def _decode_row(self, row: Any) -> tuple[Any, float | None, Any]:
+        """Row (id, text, source, version, section, doc_title, position, distance, lexical_terms)
+        -> (row, L2 distance, lexical_terms), the inputs of build_result."""
+        distance = float(row[7]) if row[7] is not None else None
+        if distance is not None and self._vector_distance == "cosine":
+            # Report L2-equivalent distance so confidence/min_score keep the same scale in both modes
+            distance = cosine_to_l2(distance)
+        return row, distance, row[8] if len(row) > 8 else None
+
+    def _hierarchical_select(
+        self, dist_col, limit: int, cutoff: bool = False, with_embedding: bool = False
+    ):
+        """Two-stage candidates: the hierarchical_top_n nearest documents or sections of the
+        version (mean-pooled embeddings, migration 013), then exact distance over their chunks.
+
+        The chunks are gathered in a MATERIALIZED CTE, so the planner ranks only them instead
+        of walking the chunk ANN index and filtering.
+        """
+        q_emb = bindparam("q_emb", type_=Vector(384))
+        if self._hierarchical == "section":
+            group, chunk_group = Section, Chunk.section_id
+        else:
+            group, chunk_group = Document, Chunk.document_id
+        if self._vector_distance == "cosine":
+            group_dist = group.embedding.cosine_distance(q_emb)
+        else:
+            group_dist = group.embedding.l2_distance(q_emb)
+        groups = (
+            select(group.id)
+            .where(group.version == bindparam("version"), group.embedding.isnot(None))
+            .order_by(group_dist)
+            .limit(self._hierarchical_top_n)
+            .scalar_subquery()
+        )
+        candidates = self._candidate_select(dist_col, with_embedding).where(
+            chunk_group.in_(groups), Chunk.embedding.isnot(None)
+        )
+        if cutoff:
+            candidates = candidates.where(self._cutoff(dist_col))
+        candidates = candidates.cte("candidates").prefix_with("MATERIALIZED")
+        return select(*candidates.c).order_by(candidates.c.distance).limit(limit)
+
+    async def _fetch_vector_rows(
+        self,
+        session: AsyncSession,
+        dist_col,
+        limit: int,
+        params: dict[str, Any],
+        options: SearchOptions | None,
+        projection: PcaProjection | None,
+        with_embedding: bool = False,
+        trace: SearchTrace | None = None,
+    ) -> list[Any]:
+        """Nearest `limit` chunk rows: hierarchical when enabled and populated, else the ANN scan.
+
+        With "min_score" in params, rows below min_score are filtered in SQL.
+        """
+        cutoff = "min_score" in params
+        if self._hierarchical in ("document", "section"):
+            try:
+                stmt = self._hierarchical_select(dist_col, limit, cutoff, with_embedding)
+                rows = await self._execute_rows(session, stmt, params, trace, "hierarchical")
+            except ProgrammingError as e:
+                if "does not exist" not in str(e):
+                    raise
+                await session.rollback()  # migration 013 not applied
+                rows = []
+            if rows:
+                return rows
+            # No document / section embeddings for this version yet: flat search
+        await self._apply_index_params(session, options, self._ann_candidates(limit, projection))
+        stmt = self._ann_select(dist_col, limit, projection, cutoff, with_embedding)
+        return await self._execute_rows(session, stmt, params, trace, "ann")
+
     async def _vector_search(
         self,
         session: AsyncSession,
         query: str,
         top_k: int,
         version: str | None = None,
+        query_embedding: list[float] | None = None,
+        options: SearchOptions | None = None,
+        trace: SearchTrace | None = None,
     ) -> list[SearchResult]:
-        """Vector similarity search (L2). Requires embedder and chunks.embedding."""
+        """Vector similarity search (L2 or cosine). Requires embedder and chunks.embedding."""
         # #region agent log
         _dlog("_vector_search start", {"retrieval_mode": self._retrieval_mode, "version": version}, "H4")
-        # Diagnostic: total chunks vs chunks with embedding (same DB?)
-        try:
-            r_tot = await session.execute(select(func.count()).select_from(Chunk))
-            r_emb = await session.execute(select(func.count()).select_from(Chunk).where(Chunk.embedding.isnot(None)))
-            _dlog("_vector_search DB diagnostic", {"total_chunks": r_tot.scalar() or 0, "chunks_with_embedding": r_emb.scalar() or 0}, "H2")
-        except Exception as e:
-            _dlog("_vector_search DB diagnostic failed", {"exc_type": type(e).__name__, "exc_msg": str(e)[:200]}, "H2")
         # #endregion
-        embedder = self._embedder
-        if embedder is None:
-            embedder = _get_embedder()()
-        query_embedding = embedder.embed_texts([query])[0]
+        if query_embedding is None:
+            with _stage(trace, "embedding"):
+                query_embedding = await self._get_query_encoder().encode_one(query)
 
-        try:
-            from pgvector.sqlalchemy import Vector
-        except ImportError:
+        if Vector is None:
             # #region agent log
             _dlog("_vector_search no pgvector", {"message": "ImportError"}, "H3")
             # #endregion
             return []
 
-        # Use l2_distance() so return_type=Float is set
-        dist_col = Chunk.embedding.l2_distance(bindparam("q_emb", type_=Vector(384)))
-        distance_col = dist_col.label("distance")
-        stmt = (
-            select(
-                Chunk.id,
-                Chunk.text,
-                Document.source,
-                Document.version,
-                Chunk.section_title,
-                Chunk.document_title,
-                Chunk.position,
-                distance_col,
-            )
-            .join(Document, Chunk.document_id == Document.id)
-            .where(Chunk.embedding.isnot(None))
-            .order_by(dist_col)
-            .limit(top_k * 2)
-        )
-        stmt = stmt.where(Document.version == version)
+        dist_col = self._distance_expr()
+        projection = await self._projection(version)
+        q_terms = query_terms(query)
+        params = {**self._ann_params(query_embedding, version, projection), **self._cutoff_params(q_terms)}
         # #region agent log
         _dlog("_vector_search executing", {"version_filter": True}, "H1")
         # #endregion
-        result = await session.execute(stmt, {"q_emb": query_embedding})
-        rows = result.all()
+        # Adaptive over-fetch: start at top_k * overfetch; only when the LIMIT was hit and too
+        # few rows passed min_score (keyword part of the score) re-query with a 4x larger LIMIT
+        mmr_lambda = self._mmr_for(options)
+        wanted = top_k * self._mmr_candidates if mmr_lambda is not None else top_k
+        limit = max(top_k * self._overfetch, wanted)
+        fetched = 0
+        while True:
+            rows = await self._fetch_vector_rows(
+                session, dist_col, limit, params, options, projection, mmr_lambda is not None, trace
+            )
+            fetched += len(rows)
+            with _stage(trace, "decode"):
+                decoded = [self._decode_row(row) for row in rows]
+            with _stage(trace, "scoring"):
+                scored = [
+                    (build_result(q_terms, row, distance, terms, trace), row)
+                    for row, distance, terms in decoded
+                ]
+                scored = [(r, row) for r, row in scored if r.score >= self._min_score]
+            if (
+                len(scored) >= top_k
+                or len(rows) < limit
+                or limit >= top_k * self._overfetch_max
+                or self._ann_candidates(limit, projection) >= _HNSW_EF_SEARCH_MAX
+            ):
+                break
+            SEARCH_REFETCHES.inc()
+            if trace is not None:
+                trace.refetches += 1
+            limit = min(limit * 4, top_k * self._overfetch_max)
         # #region agent log
         _dlog("_vector_search rows", {"count": len(rows)}, "H2")
         # #endregion
-        out: list[SearchResult] = []
-        for row in rows:
-            chunk_id = row[0]
-            text_val = row[1]
-            source = row[2]
-            doc_version = row[3]
-            section_title = row[4] if len(row) > 4 else None
-            document_title = row[5] if len(row) > 5 else None
-            position = int(row[6]) if len(row) > 6 else 0
-            distance = row[-1]
-            dist_float = float(distance) if distance is not None else 0.0
-            vector_confidence = 1.0 / (1.0 + dist_float)
-            kw_score = _keyword_score(query, text_val or "")
-            final_score = 0.8 * vector_confidence + 0.2 * kw_score
-            if final_score < self._min_score:
-                continue
-            doc_title = (document_title or source or "").strip() or None
-            out.append(
-                SearchResult(
-                    chunk_id=str(chunk_id),
-                    text=text_val or "",
-                    source=source or "",
-                    score=final_score,
-                    distance=dist_float,
-                    confidence=vector_confidence,
-                    version=doc_version,
-                    document_title=doc_title,
-                    section_title=(section_title or "").strip() if section_title else None,
-                    position=position,
-                )
-            )
-        out.sort(
-            key=lambda sr: (
-                -sr.score,
-                sr.distance or 0.0,
-                -_query_word_overlap(query, sr.text),
-            )
+        with _stage(trace, "sort"):
+            scored.sort(key=lambda p: rank_key(p[0]))
+            if mmr_lambda is not None:
+                out = self._diversify(scored[:wanted], top_k, mmr_lambda)
+            else:
+                out = [r for r, _ in scored[:top_k]]
+        if trace is not None:
+            trace.candidates, trace.passed_min_score = len(rows), len(scored)
+        SEARCH_ROWS_FETCHED.labels(mode="vector").observe(fetched)
+        SEARCH_ROWS_RETURNED.labels(mode="vector").observe(len(out))
+        return out
+
+    def _mmr_for(self, options: SearchOptions | None) -> float | None:
+        if options is not None and options.mmr_lambda is not None:
+            return options.mmr_lambda
+        return self._mmr_lambda
+
+    @staticmethod
+    def _diversify(
+        scored: list[tuple[SearchResult, Any]], top_k: int, mmr_lambda: float
+    ) -> list[SearchResult]:
+        """MMR over (result, row) pairs ranked by score; row[9] is chunks.embedding.
+
+        A lexical-only candidate without an embedding gets a zero vector (similar to nothing).
+        """
+        embedded = [row[9] for _, row in scored if row[9] is not None]
+        if len(scored) <= 1 or not embedded:
+            return [r for r, _ in scored[:top_k]]
+        zero = np.zeros(len(embedded[0]), dtype=np.float32)
+        relevance = np.array([r.score for r, _ in scored])
+        vectors = np.array(
+            [zero if row[9] is None else np.asarray(row[9], dtype=np.float32) for _, row in scored]
         )
-        return out[:top_k]
+        return [scored[i][0] for i in mmr(relevance, vectors, top_k, mmr_lambda)]
+
+    async def _hybrid_search(
+        self,
+        query: str,
+        top_k: int,
+        version: str | None = None,
+        query_embedding: list[float] | None = None,
+        options: SearchOptions | None = None,
+        trace: SearchTrace | None = None,
+    ) -> list[SearchResult]:
+        """Vector + full-text (chunks.tsv) candidates fetched in parallel, merged by weighted RRF.
+
+        Candidates below min_score (vector/keyword relevance) are dropped before fusion;
+        score of a result is its fused RRF score scaled to [0, 1]. With MMR, top_k is picked
+        from the top_k * mmr_candidates fused results.
+        """
+        if query_embedding is None:
+            with _stage(trace, "embedding"):
+                query_embedding = await self._get_query_encoder().encode_one(query)
+        if Vector is None:
+            return []
+        mmr_lambda = self._mmr_for(options)
+        wanted = top_k * self._mmr_candidates if mmr_lambda is not None else top_k
+        n = max(wanted, top_k * self._hybrid_candidates)
+        dist_col = self._distance_expr()
+        projection = await self._projection(version)
+        # plainto_tsquery ANDs words; OR them so one matching term is enough for recall
+        ts_query = cast(
+            func.replace(
+                cast(func.plainto_tsquery(self._text_search_config, bindparam("q_text")), Text),
+                "&",
+                "|",
+            ),
+            TSQUERY,
+        )
+        rank_col = func.ts_rank_cd(Chunk.tsv, ts_query)
+        q_terms = query_terms(query)
+        params = {
+            **self._ann_params(query_embedding, version, projection),
+            **self._cutoff_params(q_terms),
+            "q_text": query,
+        }
+        with_embedding = mmr_lambda is not None
+        lexical_stmt = self._candidate_select(dist_col, with_embedding).where(
+            Chunk.tsv.op("@@")(ts_query)
+        )
+        if "min_score" in params:
+            lexical_stmt = lexical_stmt.where(self._cutoff(dist_col))
+        lexical_stmt = lexical_stmt.order_by(rank_col.desc()).limit(n)
+
+        async def fetch_vector() -> list[Any]:
+            async with self._session_factory() as s:
+                return await self._fetch_vector_rows(
+                    s, dist_col, n, params, options, projection, with_embedding, trace
+                )
+
+        async def fetch_lexical() -> list[Any]:
+            async with self._session_factory() as s:
+                return await self._execute_rows(s, lexical_stmt, params, trace, "lexical", "sql_lexical")
+
+        vector_rows, lexical_rows = await asyncio.gather(fetch_vector(), fetch_lexical())
+        candidates: dict[str, SearchResult] = {}
+        candidate_rows: dict[str, Any] = {}
+        rankings: list[list[str]] = []
+        with _stage(trace, "decode"):
+            decoded = [
+                [self._decode_row(row) for row in rows] for rows in (vector_rows, lexical_rows)
+            ]
+        with _stage(trace, "scoring"):
+            for rows in decoded:
+                ranking = []
+                for row, distance, terms in rows:
+                    r = candidates.get(str(row[0])) or build_result(q_terms, row, distance, terms)
+                    if r.score < self._min_score:
+                        continue
+                    candidates[r.chunk_id] = r
+                    candidate_rows.setdefault(r.chunk_id, row)
+                    ranking.append(r.chunk_id)
+                rankings.append(ranking)
+        with _stage(trace, "sort"):
+            weights = [self._hybrid_vector_weight, self._hybrid_lexical_weight]
+            fused = _rrf_fuse(rankings, weights, self._hybrid_rrf_k)
+            max_fused = sum(weights) / (self._hybrid_rrf_k + 1) or 1.0
+            ordered = sorted(fused.items(), key=lambda kv: (-kv[1], candidates[kv[0]].distance or 0.0))
+            out: list[SearchResult] = []
+            for chunk_id, rrf in ordered[:wanted]:
+                r = candidates[chunk_id]
+                r.score = min(1.0, rrf / max_fused)
+                out.append(r)
+            if trace is not None:
+                # Score parts are each list's RRF term weight / (k + rank), scaled like the score
+                positions = [{cid: rank for rank, cid in enumerate(ranking, start=1)} for ranking in rankings]
+                for r in out:
+                    trace.scores[r.chunk_id] = {
+                        name: weight / (self._hybrid_rrf_k + ranks[r.chunk_id]) / max_fused
+                        if r.chunk_id in ranks
+                        else 0.0
+                        for name, weight, ranks in zip(("vector", "keyword"), weights, positions)
+                    }
+            if mmr_lambda is not None:
+                out = self._diversify([(r, candidate_rows[r.chunk_id]) for r in out], top_k, mmr_lambda)
+        if trace is not None:
+            trace.candidates = len({str(row[0]) for row in (*vector_rows, *lexical_rows)})
+            trace.passed_min_score = len(candidates)
+        SEARCH_ROWS_FETCHED.labels(mode="hybrid").observe(len(vector_rows) + len(lexical_rows))
+        SEARCH_ROWS_RETURNED.labels(mode="hybrid").observe(len(out))
+        return out
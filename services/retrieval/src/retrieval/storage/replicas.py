@@ -0,0 +1,190 @@
+"""Read-replica routing for search: one Storage per database, primary as fallback."""
+import asyncio
+import itertools
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, TypeVar
+
+import structlog
+
+from retrieval.metrics import REPLICA_FALLBACKS, REPLICA_LAG, REPLICA_SEARCHES, REPLICA_UP
+from retrieval.service.kb_generation import KbGenerationWatcher
+from retrieval.storage.base import SearchOptions, SearchQuery, SearchResult, SearchTrace, Storage
+
+T = TypeVar("T")
+
+
+@dataclass
+class Replica:
+    """Search storage bound to one replica plus its own view of retrieval.kb_generation."""
+
+    name: str
+    storage: Storage
+    generations: KbGenerationWatcher
+    in_flight: int = 0
+    synced: bool = False  # generations read at least once
+    down_until: float = 0.0
+
+
+class ReplicaRouter(Storage):
+    """Sends searches to read replicas (round_robin | least_connections), the primary otherwise.
+
+    A replica serves a version only while its kb_generation for it is not behind the primary's
+    (so result caches keyed by generation stay consistent); replica generations are polled
+    every poll_seconds. If the replica attempt raises anything (connection loss, timeout, a
+    missing migration, a bug), the search is retried on the primary and the replica is skipped
+    for retry_seconds; errors of the primary itself propagate.
+    """
+
+    def __init__(
+        self,
+        primary: Storage,
+        replicas: list[Replica],
+        kb_generation: KbGenerationWatcher,
+        kb_latest_version: str = "6.1 (latest)",
+        policy: str = "round_robin",
+        poll_seconds: float = 5.0,
+        retry_seconds: float = 30.0,
+    ) -> None:
+        policy = (policy or "round_robin").lower()
+        if policy not in ("round_robin", "least_connections"):
+            raise ValueError(f"unknown replica policy: {policy}")
+        self._primary = primary
+        self._replicas = replicas
+        self._kb_generation = kb_generation
+        self._kb_latest_version = kb_latest_version
+        self._policy = policy
+        self._poll_seconds = poll_seconds
+        self._retry_seconds = retry_seconds
+        self._rr = itertools.count()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def replicas(self) -> list[Replica]:
+        return list(self._replicas)
+
+    async def reload(self, versions: set[str]) -> None:
+        """Forward KbGenerationWatcher notifications (e.g. PCA projection reset) to every storage."""
+        for storage in (self._primary, *(r.storage for r in self._replicas)):
+            reload = getattr(storage, "reload", None)
+            if reload is not None:
+                await reload(versions)
+
+    async def refresh(self) -> None:
+        """Re-read kb_generation on every replica; unreachable replicas are marked down."""
+        log = structlog.get_logger()
+        for replica in self._replicas:
+            try:
+                await replica.generations.refresh()
+            except Exception as e:
+                self._mark_down(replica, e, "replica_generation_poll_failed")
+                continue
+            replica.synced = True
+            lag = self._lag(replica)
+            REPLICA_UP.labels(replica=replica.name).set(1 if replica.down_until <= time.monotonic() else 0)
+            REPLICA_LAG.labels(replica=replica.name).set(sum(lag.values()))
+            if lag:
+                log.info("replica_lagging", replica=replica.name, versions=sorted(lag))
+
+    def _lag(self, replica: Replica, versions: set[str] | None = None) -> dict[str, int]:
+        """Generations the replica is behind the primary, per version (only lagging versions)."""
+        primary = self._kb_generation.versions
+        own = replica.generations.versions
+        out = {}
+        for version in primary if versions is None else versions:
+            behind = primary.get(version, 0) - own.get(version, 0)
+            if behind > 0:
+                out[version] = behind
+        return out
+
+    def _mark_down(self, replica: Replica, error: Exception, event: str) -> None:
+        replica.down_until = time.monotonic() + self._retry_seconds
+        REPLICA_UP.labels(replica=replica.name).set(0)
+        structlog.get_logger().warning(
+            event, replica=replica.name, exc_type=type(error).__name__, exc_msg=str(error)[:200]
+        )
+
+    def _pick(self, versions: set[str]) -> Replica | None:
+        """Replica for a search over `versions`; None (with a fallback reason counted) -> primary."""
+        if not self._replicas:
+            return None
+        now = time.monotonic()
+        up = [r for r in self._replicas if r.synced and r.down_until <= now]
+        eligible = [r for r in up if not self._lag(r, versions)]
+        if not eligible:
+            REPLICA_FALLBACKS.labels(reason="lag" if up else "unavailable").inc()
+            return None
+        start = next(self._rr) % len(eligible)
+        ordered = eligible[start:] + eligible[:start]
+        if self._policy == "least_connections":
+            return min(ordered, key=lambda r: r.in_flight)
+        return ordered[0]
+
+    async def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        version: str | None = None,
+        options: SearchOptions | None = None,
+    ) -> list[SearchResult]:
+        effective_version = version if version is not None else self._kb_latest_version
+        return await self._route(
+            {effective_version}, lambda storage: storage.search(query, top_k, version, options)
+        )
+
+    async def search_many(self, queries: list[SearchQuery]) -> list[list[SearchResult]]:
+        """The whole batch goes to one database: a replica up to date for all of its versions."""
+        if not queries:
+            return []
+        versions = {q.version if q.version is not None else self._kb_latest_version for q in queries}
+        return await self._route(versions, lambda storage: storage.search_many(queries))
+
+    async def explain(
+        self,
+        query: str,
+        top_k: int = 5,
+        version: str | None = None,
+        options: SearchOptions | None = None,
+        analyze: bool = True,
+    ) -> tuple[list[SearchResult], SearchTrace]:
+        effective_version = version if version is not None else self._kb_latest_version
+        return await self._route(
+            {effective_version},
+            lambda storage: storage.explain(query, top_k, version, options, analyze),
+        )
+
+    async def _route(self, versions: set[str], call: Callable[[Storage], Awaitable[T]]) -> T:
+        replica = self._pick(versions)
+        if replica is not None:
+            replica.in_flight += 1
+            try:
+                out = await call(replica.storage)
+            except Exception as e:
+                self._mark_down(replica, e, "replica_search_failed")
+                REPLICA_FALLBACKS.labels(reason="error").inc()
+            else:
+                REPLICA_SEARCHES.labels(target=replica.name).inc()
+                return out
+            finally:
+                replica.in_flight -= 1
+        REPLICA_SEARCHES.labels(target="primary").inc()
+        return await call(self._primary)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._poll_seconds)
+            await self.refresh()
+
+    async def start(self) -> None:
+        await self.refresh()
+        if self._poll_seconds > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,107 @@
+"""Result scoring shared by storage backends (same scores for Postgres and in-memory search)."""
+import math
+from typing import Any, Collection
+
+from shared.tokenize import tokenize
+
+from retrieval.storage.base import SearchResult, SearchTrace
+
+# score = VECTOR_WEIGHT * 1 / (1 + L2 distance) + KEYWORD_WEIGHT * keyword_score
+VECTOR_WEIGHT = 0.8
+KEYWORD_WEIGHT = 0.2
+
+
+def query_terms(query: str) -> frozenset[str]:
+    """Query tokenized once per search (same tokenizer as ingest's chunks.lexical_terms)."""
+    return frozenset(tokenize(query))
+
+
+def keyword_score(q_terms: frozenset[str], chunk_terms: Collection[str] | None, text: str = "") -> float:
+    """Fraction of distinct query terms present in the chunk, in [0, 1].
+
+    chunk_terms are the precomputed chunks.lexical_terms; rows ingested before they
+    existed (NULL) are tokenized from text.
+    """
+    if not q_terms:
+        return 0.0
+    if chunk_terms is None:
+        chunk_terms = tokenize(text)
+    return len(q_terms.intersection(chunk_terms)) / len(q_terms)
+
+
+def cosine_to_l2(distance: float) -> float:
+    """L2 distance between unit vectors with the given cosine distance: sqrt(2 * d)."""
+    return math.sqrt(max(0.0, 2.0 * distance))
+
+
+def row_result(
+    row: Any, score: float, confidence: float | None = None, distance: float | None = None
+) -> SearchResult:
+    """Row (id, text, source, version, section, doc_title, position, ...) -> result with the given score.
+
+    confidence defaults to score (trigram / BM25 scores are their own confidence).
+    """
+    source = row[2]
+    section_title = row[4] if len(row) > 4 else None
+    document_title = row[5] if len(row) > 5 else None
+    return SearchResult(
+        chunk_id=str(row[0]),
+        text=row[1] or "",
+        source=source or "",
+        score=score,
+        distance=distance,
+        confidence=score if confidence is None else confidence,
+        version=row[3],
+        document_title=(document_title or source or "").strip() or None,
+        section_title=(section_title or "").strip() if section_title else None,
+        position=int(row[6] or 0) if len(row) > 6 else 0,
+    )
+
+
+def build_result(
+    q_terms: frozenset[str],
+    row: Any,
+    distance: float | None,
+    chunk_terms: Collection[str] | None = None,
+    trace: SearchTrace | None = None,
+) -> SearchResult:
+    """Row (id, text, source, version, section, doc_title, position, ...) + L2 distance -> scored result.
+
+    With a trace, the vector and keyword parts of the score are recorded in trace.scores.
+    """
+    vector_confidence = 1.0 / (1.0 + distance) if distance is not None else 0.0
+    kw_score = keyword_score(q_terms, chunk_terms, row[1] or "")
+    final_score = VECTOR_WEIGHT * vector_confidence + KEYWORD_WEIGHT * kw_score
+    result = row_result(row, final_score, confidence=vector_confidence, distance=distance)
+    if trace is not None:
+        trace.scores[result.chunk_id] = {
+            "vector": VECTOR_WEIGHT * vector_confidence,
+            "keyword": KEYWORD_WEIGHT * kw_score,
+        }
+    return result
+
+
+def min_score_params(min_score: float, q_terms: frozenset[str]) -> dict[str, Any]:
+    """Bind parameters for evaluating build_result's score >= min_score in SQL.
+
+    The keyword part is kw_per_term * (query terms found in chunks.lexical_terms); rows
+    with NULL lexical_terms get kw_max, the best case, because build_result tokenizes
+    their text instead. {} when min_score is 0 or less.
+    """
+    if min_score <= 0:
+        return {}
+    n = len(q_terms)
+    return {
+        "min_score": min_score - 1e-9,  # slack for float rounding at the boundary
+        "q_terms": sorted(q_terms),
+        "kw_per_term": KEYWORD_WEIGHT / n if n else 0.0,
+        "kw_max": KEYWORD_WEIGHT if n else 0.0,
+    }
+
+
+def rank_key(sr: SearchResult) -> tuple[float, float]:
+    """Sort key for scored results: score desc, then distance asc.
+
+    Equal score and distance imply equal keyword overlap, so no text re-scan is needed.
+    """
+    return (-sr.score, sr.distance or 0.0)
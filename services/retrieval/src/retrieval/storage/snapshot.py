@@ -0,0 +1,123 @@
+"""On-disk embedding snapshots: float32 matrix + JSON sidecar per (KB version, generation).
+
+Matrices are opened with np.memmap, so startup does not read vectors from Postgres and
+all workers on a host share the same page-cache pages. Layout under the snapshot dir:
+
+    <version-slug>/g<generation>.f32         (count, dim) float32, row-major
+    <version-slug>/g<generation>.norms.f32   (count,) float32, squared row norms
+    <version-slug>/g<generation>.json        version, generation, model, dim, count, rows
+
+The sidecar is written last (atomic os.replace), so its presence marks a complete snapshot.
+"""
+import asyncio
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import AsyncIterator
+
+import numpy as np
+
+from retrieval.storage.vector_index import VersionIndex
+
+SNAPSHOT_FORMAT = 2
+
+
+def version_slug(version: str) -> str:
+    """Filesystem-safe, collision-free directory name for a KB version."""
+    readable = re.sub(r"[^\w.-]+", "_", version).strip("_")[:40]
+    return f"{readable}-{hashlib.sha1(version.encode()).hexdigest()[:8]}"
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class SnapshotStore:
+    """Reads and writes VersionIndex snapshots; a snapshot is valid only for its exact generation and model."""
+
+    def __init__(self, directory: str | os.PathLike, model_name: str = "", dim: int = 384) -> None:
+        self._dir = Path(directory)
+        self._model_name = model_name
+        self._dim = dim
+
+    def _paths(self, version: str, generation: int) -> tuple[Path, Path, Path]:
+        base = self._dir / version_slug(version)
+        return base / f"g{generation}.f32", base / f"g{generation}.norms.f32", base / f"g{generation}.json"
+
+    def open(self, version: str, generation: int) -> VersionIndex | None:
+        """Memory-map the snapshot of (version, generation); None if absent or built for another model/dim."""
+        matrix_path, norms_path, meta_path = self._paths(version, generation)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if (
+            meta.get("format") != SNAPSHOT_FORMAT
+            or meta.get("version") != version
+            or meta.get("generation") != generation
+            or meta.get("model") != self._model_name
+            or meta.get("dim") != self._dim
+        ):
+            return None
+        count = int(meta["count"])
+        if count == 0:
+            return VersionIndex(version, [], np.empty((0, self._dim), np.float32), np.empty(0, np.float32))
+        try:
+            matrix = np.memmap(matrix_path, dtype=np.float32, mode="r", shape=(count, self._dim))
+            sq_norms = np.memmap(norms_path, dtype=np.float32, mode="r", shape=(count,))
+        except (OSError, ValueError):
+            return None
+        rows = [(*r[:7], frozenset(r[7])) if len(r) > 7 else tuple(r) for r in meta["rows"]]
+        return VersionIndex(version, rows, matrix, sq_norms)
+
+    def write(self, index: VersionIndex, generation: int) -> None:
+        """Persist index as (version, generation) and delete older snapshots of that version."""
+        matrix_path, norms_path, meta_path = self._paths(index.version, generation)
+        matrix_path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(matrix_path, np.ascontiguousarray(index.matrix, dtype=np.float32).tobytes())
+        write_atomic(norms_path, np.ascontiguousarray(index.sq_norms, dtype=np.float32).tobytes())
+        meta = {
+            "format": SNAPSHOT_FORMAT,
+            "version": index.version,
+            "generation": generation,
+            "model": self._model_name,
+            "dim": self._dim,
+            "count": index.size,
+            "rows": [
+                [str(r[0]), *r[1:7], sorted(r[7])] if len(r) > 7 else [str(r[0]), *r[1:]]
+                for r in index.rows
+            ],
+        }
+        write_atomic(meta_path, json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+        self._prune(index.version, keep=generation)
+
+    def _prune(self, version: str, keep: int) -> None:
+        # Unlinking is safe while other workers still map old files (inode lives until unmapped)
+        for path in (self._dir / version_slug(version)).glob("g*"):
+            if path.name.split(".", 1)[0] != f"g{keep}":
+                with contextlib.suppress(OSError):
+                    path.unlink()
+
+    @contextlib.asynccontextmanager
+    async def build_lock(self, version: str) -> AsyncIterator[None]:
+        """Exclusive per-version file lock so one worker per host builds a missing snapshot.
+
+        Waiting happens in a thread; the event loop keeps serving searches meanwhile.
+        """
+        lock_path = self._dir / version_slug(version) / ".lock"
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(lock_path, "a") as f:
+            await asyncio.to_thread(fcntl.flock, f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
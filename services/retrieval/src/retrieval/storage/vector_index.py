@@ -0,0 +1,74 @@
+"""Per-version embedding matrix and exact k-NN over it (shared by in-memory backends and snapshots)."""
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+import numpy as np
+
+
+@dataclass
+class VersionIndex:
+    """Chunks of one KB version: row i of `matrix` is the embedding of `rows[i]`."""
+
+    version: str
+    rows: list[tuple]  # (id, text, source, version, section_title, document_title, position[, terms])
+    matrix: np.ndarray  # (n, dim) float32, C-contiguous
+    sq_norms: np.ndarray  # (n,) float32, ||row||^2
+
+    @classmethod
+    def build(cls, version: str, rows: list[tuple], vectors: Iterable[Any], dim: int) -> "VersionIndex":
+        matrix = np.ascontiguousarray(
+            np.asarray(list(vectors), dtype=np.float32).reshape(len(rows), dim)
+        )
+        return cls(version, rows, matrix, np.einsum("ij,ij->i", matrix, matrix))
+
+    @property
+    def size(self) -> int:
+        return len(self.rows)
+
+    @property
+    def nbytes(self) -> int:
+        return self.matrix.nbytes + self.sq_norms.nbytes
+
+
+def distances(
+    queries: np.ndarray, matrix: np.ndarray, sq_norms: np.ndarray, distance: str = "l2"
+) -> np.ndarray:
+    """(m, n) distances: squared L2, or cosine distance for distance="cosine"."""
+    dots = queries @ matrix.T
+    if distance == "cosine":
+        norms = np.sqrt(sq_norms) * np.linalg.norm(queries, axis=1)[:, None]
+        return 1.0 - dots / np.maximum(norms, 1e-12)
+    q_sq = np.einsum("ij,ij->i", queries, queries)[:, None]
+    return np.maximum(sq_norms[None, :] - 2.0 * dots + q_sq, 0.0)
+
+
+def top_k(dist: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Column indices and values of the k smallest entries per row, ascending (argpartition + sort of k)."""
+    m, n = dist.shape
+    k = min(k, n)
+    if k <= 0:
+        return np.empty((m, 0), dtype=np.int64), np.empty((m, 0), dtype=dist.dtype)
+    if k < n:
+        idx = np.argpartition(dist, k - 1, axis=1)[:, :k]
+    else:
+        idx = np.broadcast_to(np.arange(n), (m, n))
+    part = np.take_along_axis(dist, idx, axis=1)
+    order = np.argsort(part, axis=1, kind="stable")
+    return np.take_along_axis(idx, order, axis=1), np.take_along_axis(part, order, axis=1)
+
+
+def finish_distances(dist: np.ndarray, distance: str = "l2") -> np.ndarray:
+    """Squared L2 -> L2; cosine distances are returned as is."""
+    return dist if distance == "cosine" else np.sqrt(dist)
+
+
+def nearest(
+    index: VersionIndex, queries: np.ndarray, k: int, distance: str = "l2"
+) -> tuple[np.ndarray, np.ndarray]:
+    """Exact k nearest rows for each query: one matmul, argpartition, sort of the k survivors.
+
+    Returns (indices, distances), both (m, k'), k' = min(k, n); distances are L2,
+    or cosine distances for distance="cosine".
+    """
+    idx, dist = top_k(distances(queries, index.matrix, index.sq_norms, distance), k)
+    return idx, finish_distances(dist, distance)
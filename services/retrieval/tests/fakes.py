@@ -0,0 +1,172 @@
+"""Fakes shared by the retrieval tests: DB sessions, encoders, storages and row builders."""
+import numpy as np
+
+from shared.tokenize import term_frequencies
+
+from retrieval.storage.base import SearchQuery, SearchResult, Storage
+from retrieval.storage.vector_index import VersionIndex
+
+DIM = 8
+
+
+def unit(i: int) -> list[float]:
+    v = [0.0] * DIM
+    v[i] = 1.0
+    return v
+
+
+def chunk_row(chunk_id: str, text: str, version: str = "6.1 (latest)") -> tuple:
+    """Chunk metadata (id, text, source, version, section, doc_title, position)."""
+    return (chunk_id, text, "faq.md", version, None, "faq.md", 0)
+
+
+def db_row(vector: list[float], chunk_id: str, text: str, version: str = "6.1 (latest)") -> tuple:
+    """Row as selected by NumpyStorage: metadata, lexical_terms (as written by ingest), embedding."""
+    return chunk_row(chunk_id, text, version) + (term_frequencies(text)[0], vector)
+
+
+def pg_row(chunk_id: str, text: str, distance: float | None, position: int = 0) -> tuple:
+    """Candidate row of PgVectorStorage: metadata with the given position, then the distance."""
+    return (chunk_id, text, "faq.md", "6.1 (latest)", None, "faq.md", position, distance)
+
+
+def make_result(chunk_id: str = "1") -> SearchResult:
+    return SearchResult(chunk_id=chunk_id, text="Черный экран после входа", source="faq.md", score=0.9)
+
+
+def clustered(n: int = 600, centers: int = 12, seed: int = 0) -> VersionIndex:
+    rng = np.random.default_rng(seed)
+    means = rng.normal(scale=4.0, size=(centers, DIM))
+    vectors = means[rng.integers(0, centers, size=n)] + rng.normal(size=(n, DIM))
+    return VersionIndex.build("6.1 (latest)", [chunk_row(f"c{i}", "") for i in range(n)], vectors, DIM)
+
+
+class FakeResult:
+    def __init__(self, rows: list[tuple]) -> None:
+        self._rows = rows
+
+    def all(self) -> list[tuple]:
+        return self._rows
+
+
+class FakeDb:
+    """Session factory over (row..., embedding) tuples; filters by the versions in the statement."""
+
+    def __init__(self, rows: list[tuple]) -> None:
+        self.rows = rows
+        self.queries = 0
+
+    def __call__(self) -> "FakeDb":
+        return self
+
+    async def __aenter__(self) -> "FakeDb":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+    async def execute(self, stmt) -> FakeResult:
+        self.queries += 1
+        params = stmt.compile().params
+        wanted = next((v for k, v in params.items() if k.startswith("version")), None)
+        rows = [r for r in self.rows if wanted is None or r[3] in wanted]
+        return FakeResult(rows)
+
+
+class FakeSession:
+    """PgVectorStorage session: full-text (tsv) statements get lexical_rows, others vector_rows."""
+
+    def __init__(self, vector_rows: list[tuple], lexical_rows: list[tuple]) -> None:
+        self.info: dict = {}
+        self._vector_rows = vector_rows
+        self._lexical_rows = lexical_rows
+
+    async def execute(self, stmt, params=None) -> FakeResult:
+        lexical = "tsv" in str(stmt)
+        return FakeResult(self._lexical_rows if lexical else self._vector_rows)
+
+    async def rollback(self) -> None:
+        pass
+
+
+class RecordingSession(FakeSession):
+    def __init__(self, vector_rows: list[tuple]) -> None:
+        super().__init__(vector_rows, [])
+        self.statements: list[str] = []
+
+    async def execute(self, stmt, params=None) -> FakeResult:
+        self.statements.append(str(stmt))
+        return await super().execute(stmt, params)
+
+
+class FakeSessionFactory:
+    def __init__(self, session) -> None:
+        self._session = session
+        self.opened = 0
+
+    def __call__(self) -> "FakeSessionFactory":
+        self.opened += 1
+        return self
+
+    async def __aenter__(self):
+        return self._session
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+
+class ZeroEncoder:
+    """384-d zero query vectors: distances come from the fake rows."""
+
+    async def encode_one(self, query: str) -> list[float]:
+        return [0.0] * 384
+
+    async def encode(self, queries: list[str]) -> list[list[float]]:
+        return [[0.0] * 384 for _ in queries]
+
+
+class StaticEncoder:
+    def __init__(self, vectors: dict[str, list[float]]) -> None:
+        self._vectors = vectors
+
+    async def encode(self, queries: list[str]) -> list[list[float]]:
+        return [self._vectors[q] for q in queries]
+
+
+class CountingStorage(Storage):
+    def __init__(self, results: list[SearchResult]) -> None:
+        self._results = results
+        self.calls = 0
+
+    async def search(
+        self, query: str, top_k: int = 5, version: str | None = None, options=None
+    ) -> list[SearchResult]:
+        self.calls += 1
+        return self._results[:top_k]
+
+
+class BatchStorage(Storage):
+    """One result per query (chunk_id = query); records the queries of every batch."""
+
+    def __init__(self) -> None:
+        self.batches: list[list[str]] = []
+
+    async def search(
+        self, query: str, top_k: int = 5, version: str | None = None, options=None
+    ) -> list[SearchResult]:
+        return (await self.search_many([SearchQuery(query, top_k, version)]))[0]
+
+    async def search_many(self, queries: list[SearchQuery]) -> list[list[SearchResult]]:
+        self.batches.append([q.query for q in queries])
+        return [[SearchResult(chunk_id=q.query, text="t", source="s", score=0.9)] for q in queries]
+
+
+class StubGeneration:
+    """KbGenerationWatcher stand-in: fixed generations per version and the global generation."""
+
+    def __init__(self, versions: dict[str, int] | None = None, generation: int = 0) -> None:
+        self.versions: dict[str, int] = dict(versions if versions is not None else {"6.1 (latest)": 1})
+        self.generation = generation
+
+    def generation_for(self, version: str | None) -> int:
+        return self.versions.get(version or "", 0)
@@ -0,0 +1,57 @@
+"""Tests for batch search: single embedder pass, request order, result cache reuse."""
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from retrieval.cache import SearchResultCache
+from retrieval.service import QueryEncoder, SearchService
+from retrieval.storage.base import SearchQuery, SearchResult
+from retrieval.storage.pgvector_storage import PgVectorStorage
+
+from tests.fakes import BatchStorage
+
+
+class RecordingEmbedder:
+    def __init__(self) -> None:
+        self.calls: list[list[str]] = []
+
+    def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append(list(texts))
+        return [[float(i)] for i, _ in enumerate(texts)]
+
+
+def _session_factory() -> MagicMock:
+    cm = MagicMock()
+    cm.__aenter__ = AsyncMock(return_value=MagicMock())
+    cm.__aexit__ = AsyncMock(return_value=None)
+    factory = MagicMock(return_value=cm)
+    return factory
+
+
+@pytest.mark.asyncio
+async def test_pgvector_search_many_embeds_once_and_keeps_order() -> None:
+    embedder = RecordingEmbedder()
+    factory = _session_factory()
+    storage = PgVectorStorage(factory, query_encoder=QueryEncoder(embedder))
+
+    async def fake_vector_search(session, query, top_k, version=None, query_embedding=None, options=None):
+        return [SearchResult(chunk_id=f"{query}:{version}:{query_embedding[0]}", text="", source="", score=1.0)]
+
+    storage._vector_search = fake_vector_search  # type: ignore[method-assign]
+    batches = await storage.search_many([
+        SearchQuery("a", top_k=3, version="5.1"),
+        SearchQuery("b", top_k=3),
+    ])
+    assert embedder.calls == [["a", "b"]]
+    assert factory.call_count == 1
+    assert [b[0].chunk_id for b in batches] == ["a:5.1:0.0", "b:6.1 (latest):1.0"]
+
+
+@pytest.mark.asyncio
+async def test_service_search_many_sends_only_uncached_queries() -> None:
+    storage = BatchStorage()
+    service = SearchService(storage, result_cache=SearchResultCache(max_entries=10))
+    await service.search("b")
+    batches = await service.search_many([SearchQuery("a"), SearchQuery("b"), SearchQuery("c")])
+    assert storage.batches[-1] == ["a", "c"]
+    assert [b[0].chunk_id for b in batches] == ["a", "b", "c"]
@@ -0,0 +1,41 @@
+"""Tests for the in-memory BM25 index and storage."""
+import pytest
+
+from shared.tokenize import term_frequencies
+
+from retrieval.storage.bm25 import Bm25Index, Bm25Storage
+from retrieval.storage.scoring import query_terms
+
+from tests.fakes import FakeDb, chunk_row
+
+DOCS = {
+    "a": "Ошибка подключения к серверу: проверьте сеть",
+    "b": "Настройка тонкого клиента и подключения",
+    "c": "Установка агента на рабочую станцию",
+}
+
+
+def _index() -> Bm25Index:
+    rows = [chunk_row(cid, text) for cid, text in DOCS.items()]
+    return Bm25Index.build("6.1 (latest)", rows, [term_frequencies(t) for t in DOCS.values()])
+
+
+def test_rare_terms_rank_higher_and_scores_are_normalized() -> None:
+    ranked = _index().top_k(query_terms("ошибки подключения"), k=3)
+    assert [_index().rows[i][0] for i, _ in ranked] == ["a", "b"]
+    assert all(0.0 < score <= 1.0 for _, score in ranked)
+    assert _index().top_k(query_terms("неизвестное слово"), k=3) == []
+
+
+@pytest.mark.asyncio
+async def test_storage_loads_from_lexical_columns_and_reloads_changed_version() -> None:
+    db = FakeDb([chunk_row("a", DOCS["a"]) + term_frequencies(DOCS["a"])])
+    storage = Bm25Storage(db)
+    await storage.load()
+    results = await storage.search("ошибка", top_k=5)
+    assert [r.chunk_id for r in results] == ["a"] and results[0].distance is None
+
+    db.rows.append(chunk_row("c", DOCS["c"]) + (None, None, None))  # NULL features: tokenized on load
+    await storage.reload({"6.1 (latest)"})
+    assert [r.chunk_id for r in await storage.search("агент")] == ["c"]
+    assert await storage.search("ошибка", version="5.1") == []
@@ -0,0 +1,63 @@
+"""Tests for fields="ids" search responses and GET /chunks."""
+import uuid
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from retrieval.api.routes import router
+from retrieval.service import SearchService
+from retrieval.storage.base import SearchResult
+from retrieval.storage.chunks import ChunkReader
+
+from tests.fakes import CountingStorage, FakeResult, StubGeneration
+
+CHUNK_ID = str(uuid.uuid4())
+
+
+class ChunkSession:
+    def __init__(self) -> None:
+        self.statements: list = []
+
+    async def __aenter__(self) -> "ChunkSession":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return FakeResult([(uuid.UUID(CHUNK_ID), "Черный экран", "faq.md", "6.1", "Экран", None, 3)])
+
+
+def _client() -> tuple[TestClient, ChunkSession]:
+    session = ChunkSession()
+    app = FastAPI()
+    app.include_router(router)
+    result = SearchResult(chunk_id=CHUNK_ID, text="Черный экран", source="faq.md", score=0.9, position=3)
+    app.state.search_service = SearchService(CountingStorage([result]))
+    app.state.kb_generation = StubGeneration(versions={}, generation=7)
+    app.state.chunk_reader = ChunkReader(lambda: session)
+    return TestClient(app), session
+
+
+def test_ids_only_search_omits_texts() -> None:
+    client, _ = _client()
+    body = client.post("/search", json={"query": "экран", "fields": "ids"}).json()
+    assert body["kb_generation"] == 7
+    item = body["results"][0]
+    assert item["chunk_id"] == CHUNK_ID and item["score"] == 0.9 and item["position"] == 3
+    assert item["text"] is None and item["source"] is None
+    full = client.post("/search", json={"query": "экран"}).json()
+    assert full["results"][0]["text"] == "Черный экран"
+
+
+def test_chunks_by_ids() -> None:
+    client, session = _client()
+    body = client.get("/chunks", params={"ids": f"{CHUNK_ID},not-a-uuid"}).json()
+    assert body["kb_generation"] == 7
+    assert [(c["chunk_id"], c["text"], c["section_title"]) for c in body["chunks"]] == [
+        (CHUNK_ID, "Черный экран", "Экран")
+    ]
+    assert len(session.statements) == 1
+    too_many = ",".join(str(uuid.uuid4()) for _ in range(201))
+    assert client.get("/chunks", params={"ids": too_many}).status_code == 422
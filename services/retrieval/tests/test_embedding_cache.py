@@ -0,0 +1,78 @@
+"""Tests for query embedding cache and QueryEncoder."""
+import pytest
+
+from retrieval.cache import QueryEmbeddingCache, normalize_query
+from retrieval.service import QueryEncoder
+
+
+class CountingEmbedder:
+    def __init__(self) -> None:
+        self.calls: list[list[str]] = []
+
+    def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_normalize_query_collapses_case_and_spaces() -> None:
+    assert normalize_query("  Черный   Экран ") == "черный экран"
+
+
+def test_cache_hit_ignores_case_and_whitespace() -> None:
+    cache = QueryEmbeddingCache(max_size=10)
+    cache.put("черный экран", [1.0, 2.0])
+    assert cache.get("  ЧЕРНЫЙ  экран") == [1.0, 2.0]
+    assert cache.stats()["hits"] == 1
+
+
+def test_cache_evicts_least_recently_used() -> None:
+    cache = QueryEmbeddingCache(max_size=2)
+    cache.put("a", [1.0])
+    cache.put("b", [2.0])
+    cache.get("a")
+    cache.put("c", [3.0])
+    assert cache.get("b") is None
+    assert cache.get("a") == [1.0]
+    assert cache.get("c") == [3.0]
+
+
+def test_cache_ttl_expiry() -> None:
+    clock = FakeClock()
+    cache = QueryEmbeddingCache(max_size=10, ttl_seconds=60, clock=clock)
+    cache.put("q", [1.0])
+    clock.now = 61
+    assert cache.get("q") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_cache_disabled_with_zero_size() -> None:
+    cache = QueryEmbeddingCache(max_size=0)
+    cache.put("q", [1.0])
+    assert cache.get("q") is None
+
+
+def test_clear_returns_flushed_count() -> None:
+    cache = QueryEmbeddingCache(max_size=10)
+    cache.put("a", [1.0])
+    cache.put("b", [1.0])
+    assert cache.clear() == 2
+    assert cache.stats()["size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_encoder_embeds_only_misses_in_one_batch() -> None:
+    embedder = CountingEmbedder()
+    encoder = QueryEncoder(embedder, cache=QueryEmbeddingCache(max_size=10))
+    await encoder.encode_one("ошибка подключения")
+    vectors = await encoder.encode(["Ошибка подключения", "черный экран", "черный экран"])
+    assert embedder.calls == [["ошибка подключения"], ["черный экран"]]
+    assert vectors[1] == vectors[2]
+    assert len(vectors) == 3
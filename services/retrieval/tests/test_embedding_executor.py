@@ -0,0 +1,101 @@
+"""Tests for micro-batching embedding executor."""
+import asyncio
+import threading
+
+import pytest
+from prometheus_client import REGISTRY
+
+from retrieval.service import MicroBatchEmbeddingExecutor, QueryEncoder
+
+
+class ThreadRecordingEmbedder:
+    def __init__(self) -> None:
+        self.batches: list[list[str]] = []
+        self.threads: set[str] = set()
+
+    def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        self.batches.append(list(texts))
+        self.threads.add(threading.current_thread().name)
+        return [[float(len(t))] for t in texts]
+
+
+class FailingEmbedder:
+    def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        raise RuntimeError("model failed")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_coalesced_into_one_batch_off_loop() -> None:
+    embedder = ThreadRecordingEmbedder()
+    executor = MicroBatchEmbeddingExecutor(embedder, max_batch_size=8, max_wait_ms=50)
+    await executor.start()
+    depths = REGISTRY.get_sample_value("retrieval_embedding_queue_depth_count") or 0.0
+    try:
+        results = await asyncio.gather(*[executor.embed_texts(["x" * n]) for n in range(1, 5)])
+    finally:
+        await executor.stop()
+    assert [r[0][0] for r in results] == [1.0, 2.0, 3.0, 4.0]
+    assert len(embedder.batches) == 1
+    # Queue depth is sampled on each of the 4 enqueues and once for the batch
+    assert REGISTRY.get_sample_value("retrieval_embedding_queue_depth_count") == depths + 5
+    assert threading.main_thread().name not in embedder.threads
+
+
+@pytest.mark.asyncio
+async def test_batches_split_at_max_batch_size() -> None:
+    embedder = ThreadRecordingEmbedder()
+    executor = MicroBatchEmbeddingExecutor(embedder, max_batch_size=2, max_wait_ms=50)
+    try:
+        out = await executor.embed_texts(["a", "bb", "ccc"])
+    finally:
+        await executor.stop()
+    assert out == [[1.0], [2.0], [3.0]]
+    assert [len(b) for b in embedder.batches] == [2, 1]
+
+
+@pytest.mark.asyncio
+async def test_embedder_error_propagates_to_caller() -> None:
+    executor = MicroBatchEmbeddingExecutor(FailingEmbedder(), max_wait_ms=1)
+    encoder = QueryEncoder(FailingEmbedder(), executor=executor)
+    try:
+        with pytest.raises(RuntimeError):
+            await encoder.encode_one("q")
+    finally:
+        await executor.stop()
+
+
+class BlockingEmbedder:
+    def __init__(self) -> None:
+        self.release = threading.Event()
+
+    def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        self.release.wait(5)
+        return [[0.0] for _ in texts]
+
+
+@pytest.mark.asyncio
+async def test_stop_fails_batch_being_collected() -> None:
+    executor = MicroBatchEmbeddingExecutor(ThreadRecordingEmbedder(), max_batch_size=8, max_wait_ms=5000)
+    await executor.start()
+    pending = asyncio.ensure_future(executor.embed_texts(["a"]))
+    await asyncio.sleep(0.05)  # "a" taken off the queue, batch waits for more texts
+    await executor.stop()
+    with pytest.raises(RuntimeError, match="stopped"):
+        await asyncio.wait_for(pending, timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_encode_fails_its_batch() -> None:
+    embedder = BlockingEmbedder()
+    executor = MicroBatchEmbeddingExecutor(embedder, max_wait_ms=1)
+    await executor.start()
+    pending = asyncio.ensure_future(executor.embed_texts(["a", "b"]))
+    await asyncio.sleep(0.05)
+    for task in list(executor._inflight):
+        task.cancel()
+    try:
+        with pytest.raises(RuntimeError, match="stopped"):
+            await asyncio.wait_for(pending, timeout=1)
+    finally:
+        embedder.release.set()
+        await executor.stop()
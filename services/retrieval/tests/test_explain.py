@@ -0,0 +1,160 @@
+"""Tests for /search/explain: stage trace, EXPLAIN plans and score components."""
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import OperationalError
+
+from retrieval.api.routes import router
+from retrieval.service import SearchService
+from retrieval.storage.base import SearchResult
+from retrieval.storage.explain import Explain, PlanSummary
+from retrieval.storage.pgvector_storage import PgVectorStorage
+
+from tests.fakes import CountingStorage, FakeResult, FakeSessionFactory, ZeroEncoder, pg_row
+
+PLAN = [
+    {
+        "Plan": {
+            "Node Type": "Limit",
+            "Actual Rows": 2,
+            "Shared Hit Blocks": 40,
+            "Shared Read Blocks": 3,
+            "Plans": [
+                {
+                    "Node Type": "Nested Loop",
+                    "Plans": [
+                        {
+                            "Node Type": "Index Scan",
+                            "Index Name": "ix_chunks_embedding_hnsw",
+                            "Relation Name": "chunks",
+                            "Order By": "(embedding <-> '[...]'::vector)",
+                        },
+                        {"Node Type": "Index Scan", "Index Name": "documents_pkey", "Relation Name": "documents"},
+                    ],
+                }
+            ],
+        },
+        "Planning Time": 0.4,
+        "Execution Time": 1.7,
+    }
+]
+
+
+class PlanResult(FakeResult):
+    def scalar(self):
+        return json.dumps(PLAN)
+
+
+class ExplainSession:
+    def __init__(self, rows: list[tuple]) -> None:
+        self.info: dict = {}
+        self.rows = rows
+        self.explained: list[str] = []
+
+    async def execute(self, stmt, params=None) -> FakeResult:
+        if isinstance(stmt, Explain):
+            self.explained.append(str(stmt.compile(dialect=postgresql.dialect())))
+            return PlanResult([])
+        return FakeResult(self.rows)
+
+    async def rollback(self) -> None:
+        pass
+
+
+def test_plan_summary_from_json() -> None:
+    summary = PlanSummary.from_json("ann", json.dumps(PLAN))
+    assert summary.nodes == [
+        "Limit",
+        "Nested Loop",
+        "Index Scan using ix_chunks_embedding_hnsw on chunks",
+        "Index Scan using documents_pkey on documents",
+    ]
+    assert summary.ann_index_used and summary.indexes == ["ix_chunks_embedding_hnsw", "documents_pkey"]
+    assert (summary.execution_ms, summary.shared_hit_blocks, summary.rows) == (1.7, 40, 2)
+    seq = PlanSummary.from_json("ann", [{"Plan": {"Node Type": "Seq Scan", "Relation Name": "chunks"}}])
+    assert not seq.ann_index_used and seq.execution_ms is None
+
+
+@pytest.mark.asyncio
+async def test_pgvector_explain_traces_stages_and_plans() -> None:
+    session = ExplainSession(
+        [pg_row("a", "Ошибка подключения", 0.5), pg_row("b", "Черный экран", 0.9), pg_row("c", "Прочее", 3.0)]
+    )
+    storage = PgVectorStorage(
+        FakeSessionFactory(session), min_score=0.35, query_encoder=ZeroEncoder(), overfetch=1
+    )
+    results, trace = await storage.explain("ошибка подключения", top_k=3)
+    assert [r.chunk_id for r in results] == ["a", "b"]
+    assert trace.error is None and trace.backend == "pgvector" and trace.mode == "vector"
+    assert {"embedding", "sql", "decode", "scoring", "sort"} <= set(trace.stages_ms)
+    assert (trace.candidates, trace.passed_min_score) == (3, 2)
+    # 2 of LIMIT 3 rows passed min_score: re-queried once, each round EXPLAINed
+    assert trace.refetches == 1
+    assert [p.statement for p in trace.plans] == ["ann", "ann"] and trace.plans[0].ann_index_used
+    assert session.explained[0].startswith("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) WITH ann AS")
+
+    _, trace = await storage.explain("ошибка", analyze=False)
+    assert session.explained[-1].startswith("EXPLAIN (FORMAT JSON) ")
+
+
+def _explain_app(storage) -> TestClient:
+    app = FastAPI()
+    app.include_router(router)
+    app.state.search_service = SearchService(storage)
+    return TestClient(app)
+
+
+def test_explain_endpoint_reports_score_components_recorded_by_the_backend() -> None:
+    session = ExplainSession([pg_row("a", "Ошибка подключения к серверу", 0.5)])
+    storage = PgVectorStorage(FakeSessionFactory(session), query_encoder=ZeroEncoder())
+    body = _explain_app(storage).post("/search/explain", json={"query": "ошибка подключения сети"}).json()
+    item = body["results"][0]
+    assert item["vector_score"] == pytest.approx(0.8 / 1.5)
+    assert item["keyword_score"] == pytest.approx(0.2 * 2 / 3)  # "сети" is not in the chunk
+    assert item["score"] == pytest.approx(item["vector_score"] + item["keyword_score"])
+
+    # Backends without a per-result breakdown report none instead of a reconstruction
+    result = SearchResult(chunk_id="a", text="Ошибка подключения", source="faq.md", score=0.7, confidence=0.5)
+    body = _explain_app(CountingStorage([result])).post("/search/explain", json={"query": "ошибка"}).json()
+    assert body["backend"] == "CountingStorage" and set(body["stages_ms"]) == {"search"}
+    assert body["ann_index_used"] is None and body["plans"] == [] and body["error"] is None
+    assert (body["results"][0]["vector_score"], body["results"][0]["keyword_score"]) == (None, None)
+
+
+@pytest.mark.asyncio
+async def test_hybrid_explain_reports_rrf_terms_per_list() -> None:
+    # Every list returns the same rows: "a" is rank 1 in both, "b" rank 2 in both
+    session = ExplainSession([pg_row("a", "Ошибка подключения", 0.5), pg_row("b", "Черный экран", 0.6)])
+    storage = PgVectorStorage(
+        FakeSessionFactory(session),
+        query_encoder=ZeroEncoder(),
+        retrieval_mode="hybrid",
+        hybrid_vector_weight=3.0,
+        hybrid_lexical_weight=1.0,
+    )
+    results, trace = await storage.explain("ошибка", top_k=2)
+    assert [r.chunk_id for r in results] == ["a", "b"]
+    assert {"sql", "sql_lexical", "decode", "scoring", "sort"} <= set(trace.stages_ms)
+    max_fused = 4.0 / 61
+    assert trace.scores["a"] == pytest.approx({"vector": 3.0 / 61 / max_fused, "keyword": 1.0 / 61 / max_fused})
+    assert trace.scores["b"]["vector"] == pytest.approx(3.0 / 62 / max_fused)
+    for r in results:
+        assert r.score == pytest.approx(sum(trace.scores[r.chunk_id].values()))
+
+
+class BrokenSession(ExplainSession):
+    async def execute(self, stmt, params=None):
+        raise OperationalError("SELECT", {}, OSError("server closed the connection"))
+
+
+@pytest.mark.asyncio
+async def test_explain_raises_connection_errors_only_with_raise_on_error() -> None:
+    kwargs = {"query_encoder": ZeroEncoder()}
+    _, trace = await PgVectorStorage(FakeSessionFactory(BrokenSession([])), **kwargs).explain("ошибка")
+    assert trace.error.startswith("OperationalError")
+    replica = PgVectorStorage(FakeSessionFactory(BrokenSession([])), raise_on_error=True, **kwargs)
+    with pytest.raises(OperationalError):  # so that ReplicaRouter.explain falls back to the primary
+        await replica.explain("ошибка")
@@ -0,0 +1,273 @@
+"""Tests for hybrid retrieval: weighted RRF over vector and full-text candidates."""
+import pytest
+from sqlalchemy.exc import ProgrammingError
+
+from retrieval.storage.pgvector_storage import PgVectorStorage, _rrf_fuse
+from retrieval.storage.scoring import query_terms
+
+from tests.fakes import FakeResult, FakeSession, FakeSessionFactory, RecordingSession, ZeroEncoder, pg_row
+
+
+def test_rrf_rewards_items_in_both_rankings() -> None:
+    fused = _rrf_fuse([["a", "b"], ["b", "c"]], [1.0, 1.0], k=60)
+    assert max(fused, key=fused.get) == "b"
+    weighted = _rrf_fuse([["a"], ["c"]], [1.0, 3.0], k=60)
+    assert weighted["c"] > weighted["a"]
+
+
+@pytest.mark.asyncio
+async def test_hybrid_includes_lexical_only_hits_and_fuses_in_parallel_sessions() -> None:
+    session = FakeSession(
+        vector_rows=[
+            pg_row("v1", "Настройка тонкого клиента", 0.6),
+            pg_row("both", "Ошибка подключения к серверу", 0.7),
+        ],
+        lexical_rows=[
+            pg_row("both", "Ошибка подключения к серверу", 0.7),
+            pg_row("lex", "Код ошибки подключения 0x204", 1.2),
+        ],
+    )
+    factory = FakeSessionFactory(session)
+    storage = PgVectorStorage(
+        factory, retrieval_mode="hybrid", min_score=0.35, query_encoder=ZeroEncoder()
+    )
+    results = await storage.search("ошибка подключения", top_k=3)
+    ids = [r.chunk_id for r in results]
+    assert ids[0] == "both"
+    assert "lex" in ids
+    assert factory.opened == 3  # outer session + one per candidate list
+    assert all(0.0 < r.score <= 1.0 for r in results)
+
+
+@pytest.mark.asyncio
+async def test_vector_search_sets_index_params_per_request() -> None:
+    from retrieval.storage.base import SearchOptions
+
+    session = RecordingSession([pg_row("v1", "Настройка тонкого клиента", 0.6)])
+    storage = PgVectorStorage(
+        FakeSessionFactory(session), query_encoder=ZeroEncoder(), ivfflat_probes=4
+    )
+    await storage.search("тонкий клиент", top_k=5, options=SearchOptions(ef_search=3))
+    # ef_search is raised to the LIMIT (top_k * 2); probes falls back to the setting
+    assert "SET LOCAL hnsw.ef_search = 10" in session.statements
+    assert "SET LOCAL ivfflat.probes = 4" in session.statements
+
+    session = RecordingSession([pg_row("v1", "Настройка тонкого клиента", 0.6)])
+    await PgVectorStorage(FakeSessionFactory(session), query_encoder=ZeroEncoder()).search("q")
+    # No override: pgvector's default 40, still raised to the LIMIT; probes left alone
+    sets = [s for s in session.statements if s.startswith(("SET LOCAL hnsw", "SET LOCAL ivfflat"))]
+    assert sets == ["SET LOCAL hnsw.ef_search = 40"]
+
+
+@pytest.mark.asyncio
+async def test_batch_override_does_not_leak_into_later_queries() -> None:
+    from retrieval.storage.base import SearchOptions, SearchQuery
+
+    session = RecordingSession([pg_row("v1", "Настройка тонкого клиента", 0.6)])
+    storage = PgVectorStorage(FakeSessionFactory(session), query_encoder=ZeroEncoder())
+    await storage.search_many(
+        [
+            SearchQuery("a", options=SearchOptions(ef_search=64, probes=8)),
+            SearchQuery("b"),
+            SearchQuery("c"),
+        ]
+    )
+    sets = [s for s in session.statements if s.startswith(("SET LOCAL hnsw", "SET LOCAL ivfflat"))]
+    assert sets == [
+        "SET LOCAL hnsw.ef_search = 64",
+        "SET LOCAL ivfflat.probes = 8",
+        "SET LOCAL hnsw.ef_search = 40",
+        "SET LOCAL ivfflat.probes = DEFAULT",
+        "SET LOCAL hnsw.ef_search = 40",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_vector_search_scans_chunks_by_version_before_joining_documents() -> None:
+    session = RecordingSession([pg_row("v1", "Настройка тонкого клиента", 0.6)])
+    storage = PgVectorStorage(FakeSessionFactory(session), query_encoder=ZeroEncoder())
+    await storage.search("тонкий клиент", top_k=5)
+    assert not any("plan_cache_mode" in s for s in session.statements)
+    sql = next(s for s in session.statements if s.startswith("WITH ann AS"))
+    ann, outer = sql.split("\n SELECT", 1)
+    # Rendered as a literal at execution, so the plan can use the version's partial index
+    assert "retrieval.chunks.version = __[POSTCOMPILE_version]" in ann
+    assert "retrieval.documents" not in ann and "LIMIT :param_1" in ann
+    assert "JOIN retrieval.documents" in outer
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("quantization", "prefilter"),
+    [("halfvec", "embedding_half <-> CAST(:q_emb AS HALFVEC(384))"), ("binary", "embedding_bin <~> binary_quantize(:q_emb)")],
+)
+async def test_quantized_search_prefilters_on_compact_column_and_rescores(quantization, prefilter) -> None:
+    session = RecordingSession([pg_row("v1", "Настройка тонкого клиента", 0.6)])
+    storage = PgVectorStorage(
+        FakeSessionFactory(session),
+        query_encoder=ZeroEncoder(),
+        hnsw_ef_search=10,
+        quantization=quantization,
+        rescore_factor=4,
+    )
+    await storage.search("тонкий клиент", top_k=5)
+    sql = next(s for s in session.statements if s.startswith("WITH ann AS"))
+    ann, outer = sql.split("\n SELECT", 1)
+    assert f"ORDER BY retrieval.chunks.{prefilter}" in ann
+    assert "embedding <-> :q_emb AS distance" in ann
+    assert "ORDER BY ann.distance" in outer and "LIMIT" in outer
+    # HNSW must be allowed to return all LIMIT * rescore_factor candidates
+    assert "SET LOCAL hnsw.ef_search = 40" in session.statements
+
+
+class ParamsRecordingSession(RecordingSession):
+    def __init__(self, vector_rows: list[tuple]) -> None:
+        super().__init__(vector_rows)
+        self.params: list[dict] = []
+
+    async def execute(self, stmt, params=None) -> FakeResult:
+        self.params.append(params or {})
+        return await super().execute(stmt, params)
+
+
+@pytest.mark.asyncio
+async def test_pca_search_projects_the_query_and_rescores_in_full_dimension() -> None:
+    import numpy as np
+
+    from shared.pca import PcaProjection
+
+    session = ParamsRecordingSession([pg_row("v1", "Настройка тонкого клиента", 0.6)])
+    storage = PgVectorStorage(
+        FakeSessionFactory(session), query_encoder=ZeroEncoder(), pca=True, rescore_factor=3
+    )
+    mean = np.ones(384, dtype=np.float32)
+    storage.set_projection("6.1 (latest)", PcaProjection(mean, np.eye(2, 384, dtype=np.float32)))
+    await storage.search("тонкий клиент", top_k=5)
+    i, sql = next((i, s) for i, s in enumerate(session.statements) if s.startswith("WITH ann AS"))
+    assert "ORDER BY retrieval.chunks.embedding_pca <-> :q_pca" in sql and "LIMIT :param_1" in sql
+    assert session.params[i]["q_pca"] == [-1.0, -1.0]
+
+    # A re-ingested version drops the cached projection
+    await storage.reload({"6.1 (latest)"})
+    assert "6.1 (latest)" not in storage._projections
+
+
+class HierarchySession(RecordingSession):
+    """Empty first stage when `populated` is False (version ingested before migration 013)."""
+
+    def __init__(self, vector_rows: list[tuple], populated: bool) -> None:
+        super().__init__(vector_rows)
+        self._populated = populated
+
+    async def execute(self, stmt, params=None) -> FakeResult:
+        result = await super().execute(stmt, params)
+        if self.statements[-1].startswith("WITH candidates") and not self._populated:
+            return FakeResult([])
+        return result
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("populated", [True, False])
+async def test_hierarchical_search_ranks_chunks_of_nearest_sections(populated: bool) -> None:
+    session = HierarchySession([pg_row("v1", "Настройка тонкого клиента", 0.6)], populated)
+    storage = PgVectorStorage(
+        FakeSessionFactory(session), query_encoder=ZeroEncoder(), hierarchical="section", hierarchical_top_n=3
+    )
+    results = await storage.search("тонкий клиент", top_k=5)
+    assert [r.chunk_id for r in results] == ["v1"]
+    first = session.statements[0]
+    assert first.startswith("WITH candidates AS MATERIALIZED")
+    assert "retrieval.chunks.section_id IN (SELECT retrieval.sections.id" in first
+    assert "ORDER BY retrieval.sections.embedding <-> :q_emb" in first
+    # Falls back to the flat ANN scan only when the first stage found nothing
+    assert any(s.startswith("WITH ann AS") for s in session.statements) is not populated
+
+
+class LimitSession(ParamsRecordingSession):
+    """Returns as many rows as the statement's LIMIT asks for."""
+
+    async def execute(self, stmt, params=None) -> FakeResult:
+        await super().execute(stmt, params)
+        limits = [v for k, v in stmt.compile().params.items() if k.startswith("param_")]
+        return FakeResult(self._vector_rows[: min(limits)] if limits else [])
+
+
+@pytest.mark.asyncio
+async def test_min_score_cutoff_in_sql_and_adaptive_overfetch() -> None:
+    # 10 far rows without the query words (fail min_score), then 5 that pass by keywords
+    far = [pg_row(f"f{i}", "другой текст", 2.0, i) for i in range(10)]
+    hits = [pg_row(f"h{i}", "тонкий клиент", 2.0, 10 + i) for i in range(5)]
+    session = LimitSession(far + hits)
+    storage = PgVectorStorage(FakeSessionFactory(session), query_encoder=ZeroEncoder())
+    results = await storage.search("тонкий клиент", top_k=5)
+    assert [r.chunk_id for r in results] == [f"h{i}" for i in range(5)]
+    scans = [(s, p) for s, p in zip(session.statements, session.params) if s.startswith("WITH ann AS")]
+    assert len(scans) == 2  # LIMIT 10 came back full but nothing passed -> re-queried with LIMIT 40
+    sql, params = scans[0]
+    ann = sql.split("\n SELECT", 1)[0]
+    assert "ANY (retrieval.chunks.lexical_terms)" in ann and ">= :min_score" in ann
+    assert params["q_terms"] == sorted(query_terms("тонкий клиент"))
+    assert params["kw_per_term"] == pytest.approx(0.1) and params["min_score"] == pytest.approx(0.35)
+
+    # HNSW may return LIMIT rows on the re-query too: ef_search follows the LIMIT past its default 40
+    assert [s for s in session.statements if s.startswith("SET LOCAL hnsw")] == [
+        "SET LOCAL hnsw.ef_search = 40",
+        "SET LOCAL hnsw.ef_search = 40",
+    ]
+    session = LimitSession([pg_row(f"f{i}", "другой текст", 2.0, i) for i in range(100)] + hits)
+    storage = PgVectorStorage(FakeSessionFactory(session), query_encoder=ZeroEncoder())
+    await storage.search("тонкий клиент", top_k=20)
+    assert [s for s in session.statements if s.startswith("SET LOCAL hnsw")] == [
+        "SET LOCAL hnsw.ef_search = 40",
+        "SET LOCAL hnsw.ef_search = 160",
+    ]
+
+    # Enough rows pass on the first round: one query
+    session = LimitSession(hits + far)
+    storage = PgVectorStorage(FakeSessionFactory(session), query_encoder=ZeroEncoder())
+    assert len(await storage.search("тонкий клиент", top_k=5)) == 5
+    assert sum(s.startswith("WITH ann AS") for s in session.statements) == 1
+
+
+@pytest.mark.asyncio
+async def test_ef_search_and_ann_limit_stay_within_pgvector_range() -> None:
+    # top_k 20 * overfetch_max 16 * rescore 4 = 1280 candidates: more than hnsw.ef_search accepts
+    far = [pg_row(f"f{i}", "другой текст", 2.0, i) for i in range(2000)]
+    session = LimitSession(far)
+    storage = PgVectorStorage(
+        FakeSessionFactory(session), query_encoder=ZeroEncoder(), quantization="halfvec", rescore_factor=4
+    )
+    assert await storage.search("тонкий клиент", top_k=20) == []
+    sets = [s for s in session.statements if s.startswith("SET LOCAL hnsw")]
+    assert [s.rsplit(" ", 1)[1] for s in sets] == ["160", "640", "1000"]
+    scans = [p for s, p in zip(session.statements, session.params) if s.startswith("WITH ann AS")]
+    assert len(scans) == 3  # stops at the cap instead of re-querying the same 1000 rows
+
+
+@pytest.mark.asyncio
+async def test_no_sql_cutoff_without_min_score() -> None:
+    session = ParamsRecordingSession([pg_row("v1", "Настройка тонкого клиента", 0.6)])
+    storage = PgVectorStorage(FakeSessionFactory(session), query_encoder=ZeroEncoder(), min_score=0.0)
+    await storage.search("тонкий клиент", top_k=5)
+    sql = next(s for s in session.statements if s.startswith("WITH ann AS"))
+    assert "min_score" not in sql
+    assert all("min_score" not in p for p in session.params)
+
+
+class MissingRelationSession(FakeSession):
+    def __init__(self) -> None:
+        super().__init__([], [])
+
+    async def execute(self, stmt, params=None) -> FakeResult:
+        raise ProgrammingError(str(stmt), params, Exception('relation "retrieval.chunks" does not exist'))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["text", "vector", "hybrid"])
+async def test_missing_relation_raises_only_with_raise_on_error(mode: str) -> None:
+    kwargs = {"query_encoder": ZeroEncoder(), "retrieval_mode": mode}
+    storage = PgVectorStorage(FakeSessionFactory(MissingRelationSession()), **kwargs)
+    assert await storage.search("тонкий клиент") == []
+    replica = PgVectorStorage(FakeSessionFactory(MissingRelationSession()), raise_on_error=True, **kwargs)
+    with pytest.raises(ProgrammingError):
+        await replica.search("тонкий клиент")
@@ -0,0 +1,62 @@
+"""Tests for the NumPy IVF index, its persistence and IvfStorage."""
+import numpy as np
+import pytest
+
+from retrieval.eval.recall import recall_at_k, recall_report, sample_queries
+from retrieval.storage.ivf import IvfIndex, IvfStore
+from retrieval.storage.ivf_storage import IvfStorage
+
+from tests.fakes import DIM, FakeDb, StaticEncoder, StubGeneration, clustered, db_row, unit
+
+
+def test_recall_grows_with_nprobe_and_is_exact_when_probing_all_lists() -> None:
+    base = clustered()
+    ivf = IvfIndex.train(base, nlist=16, iters=10)
+    assert ivf.offsets[-1] == base.size and sorted(ivf.row_ids) == sorted(r[0] for r in base.rows)
+    positions = ivf.base_positions(base)
+
+    def search(nprobe: int):
+        return lambda q, k: positions[ivf.search(q, k, nprobe)[0]]
+
+    queries = sample_queries(base, 50)
+    report = {r["name"]: r["recall"] for r in recall_report(base, queries, {"1": search(1), "16": search(16)}, k=10)}
+    assert report["16"] == 1.0
+    assert report["1"] <= report["16"]
+    assert recall_at_k(np.array([[1, 2]]), np.array([[2, 3]])) == 0.5
+
+
+def test_store_roundtrip_checks_generation(tmp_path) -> None:
+    base = clustered(n=100)
+    store = IvfStore(tmp_path, dim=DIM)
+    store.save(IvfIndex.train(base, nlist=4, iters=3), generation=2)
+    loaded = store.open("6.1 (latest)", 2)
+    assert isinstance(loaded.matrix, np.memmap) and loaded.nlist == 4
+    assert store.open("6.1 (latest)", 3) is None
+
+
+@pytest.mark.asyncio
+async def test_storage_uses_ivf_for_current_generation_and_falls_back_to_exact(tmp_path) -> None:
+    db = FakeDb([db_row(unit(0), "a", "тонкий клиент"), db_row(unit(1), "b", "ошибка")])
+    generations = StubGeneration({"6.1 (latest)": 1})
+    store = IvfStore(tmp_path, dim=DIM)
+
+    def make_storage(build_missing: bool) -> IvfStorage:
+        return IvfStorage(
+            db,
+            ivf_store=store,
+            nlist=2,
+            build_missing=build_missing,
+            query_encoder=StaticEncoder({"тонкий клиент": unit(0)}),
+            dim=DIM,
+            kb_generation=generations,
+        )
+
+    exact = make_storage(build_missing=False)
+    await exact.reload({"6.1 (latest)"})
+    assert exact.ivf_versions == {}
+    assert [r.chunk_id for r in await exact.search("тонкий клиент")] == ["a"]
+
+    approx = make_storage(build_missing=True)
+    await approx.reload({"6.1 (latest)"})
+    assert approx.ivf_versions == {"6.1 (latest)": 2}
+    assert [r.chunk_id for r in await approx.search("тонкий клиент")] == ["a"]
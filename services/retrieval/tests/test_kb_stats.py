@@ -0,0 +1,23 @@
+"""Tests for KB statistics helpers."""
+from retrieval.service.kb_stats import IndexInfo, KbStats, VersionStats, _index_method
+
+
+def test_index_method_parsed_from_indexdef() -> None:
+    indexdef = (
+        "CREATE INDEX ix_retrieval_chunks_embedding_ivfflat ON retrieval.chunks "
+        "USING ivfflat (embedding vector_l2_ops) WITH (lists='100')"
+    )
+    assert _index_method(indexdef) == "ivfflat"
+    assert _index_method("CREATE UNIQUE INDEX x ON t USING btree (a)") == "btree"
+
+
+def test_stats_as_dict_reports_coverage_and_ann_presence() -> None:
+    stats = KbStats(
+        versions=[VersionStats("6.1 (latest)", documents=2, chunks=10, chunks_with_embedding=8)],
+        indexes=[IndexInfo("ix_emb", "hnsw"), IndexInfo("chunks_pkey", "btree")],
+    )
+    data = stats.as_dict()
+    assert data["versions"][0]["coverage"] == 0.8
+    assert data["total_chunks"] == 10
+    assert data["ann_index_present"] is True
+    assert KbStats(indexes=[IndexInfo("chunks_pkey", "btree")]).ann_index_present is False
@@ -0,0 +1,64 @@
+"""Tests for MMR diversification of the top-k."""
+import numpy as np
+import pytest
+
+from retrieval.storage.base import SearchOptions
+from retrieval.storage.mmr import mmr
+from retrieval.storage.numpy_storage import NumpyStorage
+from retrieval.storage.pgvector_storage import PgVectorStorage
+
+from tests.fakes import DIM, FakeDb, FakeSessionFactory, RecordingSession, ZeroEncoder, db_row, pg_row, unit
+
+
+def test_mmr_skips_near_duplicates() -> None:
+    relevance = np.array([0.9, 0.89, 0.7])
+    vectors = np.array([[1.0, 0.0], [0.99, 0.01], [0.0, 1.0]])
+    assert mmr(relevance, vectors, 2, 0.5) == [0, 2]
+    assert mmr(relevance, vectors, 2, 1.0) == [0, 1]  # lambda 1: relevance order
+    assert mmr(relevance, vectors, 5, 0.5) == [0, 2, 1]
+    assert mmr(np.array([]), np.empty((0, 2)), 3, 0.5) == []
+
+
+@pytest.mark.asyncio
+async def test_numpy_storage_diversifies_overlapping_chunks() -> None:
+    near = (np.array(unit(0)) * 0.99 + np.array(unit(1)) * 0.05).tolist()
+    db = FakeDb(
+        [
+            db_row(unit(0), "a", "тонкий клиент"),
+            db_row(near, "a2", "тонкий клиент"),
+            db_row((np.array(unit(0)) * 0.8 + np.array(unit(2)) * 0.6).tolist(), "b", "клиент"),
+        ]
+    )
+
+    class Encoder:
+        async def encode(self, queries: list[str]) -> list[list[float]]:
+            return [unit(0) for _ in queries]
+
+    storage = NumpyStorage(db, query_encoder=Encoder(), min_score=0.0, dim=DIM)
+    await storage.load()
+    plain = await storage.search("тонкий клиент", top_k=2)
+    assert [r.chunk_id for r in plain] == ["a", "a2"]
+    diverse = await storage.search("тонкий клиент", top_k=2, options=SearchOptions(mmr_lambda=0.3))
+    assert [r.chunk_id for r in diverse] == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_pgvector_mmr_fetches_embeddings_with_candidates() -> None:
+    rows = [
+        pg_row("a", "тонкий клиент", 0.1) + (None, [1.0] + [0.0] * 383),
+        pg_row("a2", "тонкий клиент", 0.11) + (None, [0.99, 0.01] + [0.0] * 382),
+        pg_row("b", "тонкий клиент", 0.5) + (None, [0.0, 1.0] + [0.0] * 382),
+    ]
+    session = RecordingSession(rows)
+    storage = PgVectorStorage(
+        FakeSessionFactory(session), query_encoder=ZeroEncoder(), mmr_lambda=0.5, mmr_candidates=4
+    )
+    results = await storage.search("тонкий клиент", top_k=2)
+    assert [r.chunk_id for r in results] == ["a", "b"]
+    sql = next(s for s in session.statements if s.startswith("WITH ann AS"))
+    ann, outer = sql.split("\n SELECT", 1)
+    assert "retrieval.chunks.embedding AS embedding" in ann and "ann.embedding" in outer
+
+    # lambda 1 per request: relevance order
+    results = await storage.search("тонкий клиент", top_k=2, options=SearchOptions(mmr_lambda=1.0))
+    assert [r.chunk_id for r in results] == ["a", "a2"]
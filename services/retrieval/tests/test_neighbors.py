@@ -0,0 +1,90 @@
+"""Tests for neighbor expansion: one self-join query, neighbors around their hit, no duplicates."""
+import uuid
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from retrieval.service import SearchService
+from retrieval.storage.base import SearchQuery, SearchResult
+from retrieval.storage.neighbors import NeighborExpander
+
+from tests.fakes import BatchStorage, FakeResult
+
+DOC = uuid.uuid4()
+IDS = [uuid.uuid4() for _ in range(6)]  # positions 0..5 of DOC
+
+
+class NeighborSession:
+    """Answers the neighbor query for DOC from its bound hit ids and n."""
+
+    def __init__(self, statements: list) -> None:
+        self.statements = statements
+
+    async def __aenter__(self) -> "NeighborSession":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+    async def execute(self, stmt, params=None):
+        self.statements.append((stmt, params))
+        n = params["n"]
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        hit_ids = next(v for v in compiled.params.values() if isinstance(v, list))
+        rows = []
+        for hit_id in hit_ids:
+            hp = IDS.index(hit_id)
+            for p in range(max(0, hp - n), min(len(IDS), hp + n + 1)):
+                if p != hp:
+                    rows.append((hit_id, hp, IDS[p], f"text {p}", "doc.md", "6.1", None, "Doc", p))
+        return FakeResult(rows)
+
+
+def _expander() -> tuple[NeighborExpander, list]:
+    statements: list = []
+    return NeighborExpander(lambda: NeighborSession(statements)), statements
+
+
+def _hit(p: int, score: float) -> SearchResult:
+    return SearchResult(chunk_id=str(IDS[p]), text=f"text {p}", source="doc.md", score=score, position=p)
+
+
+@pytest.mark.asyncio
+async def test_neighbors_surround_hit_and_inherit_score() -> None:
+    expander, statements = _expander()
+    out = await expander.expand([_hit(3, 0.9)], 1)
+    assert [r.position for r in out] == [2, 3, 4]
+    assert [r.neighbor_of for r in out] == [str(IDS[3]), None, str(IDS[3])]
+    assert all(r.score == 0.9 for r in out)
+    assert out[0].distance is None
+    assert len(statements) == 1
+    sql = str(statements[0][0].compile(dialect=postgresql.dialect()))
+    assert "JOIN retrieval.chunks" in sql and "BETWEEN" in sql
+
+
+@pytest.mark.asyncio
+async def test_overlapping_windows_are_not_repeated() -> None:
+    expander, _ = _expander()
+    out = await expander.expand([_hit(2, 0.9), _hit(3, 0.8)], 1)
+    assert [r.position for r in out] == [1, 2, 3, 4]
+    assert [r.neighbor_of for r in out] == [str(IDS[2]), None, None, str(IDS[3])]
+
+
+@pytest.mark.asyncio
+async def test_expand_many_one_query_per_batch() -> None:
+    expander, statements = _expander()
+    out = await expander.expand_many([[_hit(0, 0.9)], [_hit(5, 0.7)], [_hit(3, 0.5)]], [2, 1, 0])
+    assert [r.position for r in out[0]] == [0, 1, 2]
+    assert [r.position for r in out[1]] == [4, 5]
+    assert [r.position for r in out[2]] == [3]
+    assert len(statements) == 1 and statements[0][1] == {"n": 2}
+
+
+@pytest.mark.asyncio
+async def test_no_query_without_expansion() -> None:
+    expander, statements = _expander()
+    service = SearchService(BatchStorage(), neighbor_expander=expander)
+    assert [r.chunk_id for r in await service.search("q")] == ["q"]
+    batches = await service.search_many([SearchQuery("a"), SearchQuery("b")])
+    assert [b[0].chunk_id for b in batches] == ["a", "b"]
+    assert statements == []
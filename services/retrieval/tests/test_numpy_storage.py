@@ -0,0 +1,53 @@
+"""Tests for in-memory NumPy vector storage."""
+import numpy as np
+import pytest
+
+from retrieval.storage.base import SearchQuery
+from retrieval.storage.numpy_storage import NumpyStorage, VersionIndex, nearest
+
+from tests.fakes import DIM, FakeDb, StaticEncoder, chunk_row, db_row, unit
+
+
+def test_nearest_matches_brute_force() -> None:
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(200, DIM)).astype(np.float32)
+    index = VersionIndex.build("v", [chunk_row(str(i), "") for i in range(200)], vectors, DIM)
+    queries = rng.normal(size=(3, DIM)).astype(np.float32)
+    idx, dist = nearest(index, queries, 5)
+    brute = np.linalg.norm(vectors[None, :, :] - queries[:, None, :], axis=2)
+    expected = np.argsort(brute, axis=1)[:, :5]
+    assert (idx == expected).all()
+    assert np.allclose(dist, np.take_along_axis(brute, expected, axis=1), atol=1e-4)
+
+
+@pytest.mark.asyncio
+async def test_search_scores_filters_and_reloads_changed_versions() -> None:
+    db = FakeDb(
+        [
+            db_row(unit(0), "a", "тонкий клиент"),
+            db_row(unit(1), "b", "ошибка подключения"),
+            db_row(unit(0), "old", "тонкий клиент", version="5.1"),
+        ]
+    )
+    encoder = StaticEncoder({"тонкий клиент": unit(0), "ошибка": unit(1)})
+    storage = NumpyStorage(db, query_encoder=encoder, min_score=0.5, dim=DIM)
+    await storage.load()
+    assert storage.versions == {"6.1 (latest)": 2, "5.1": 1}
+
+    results = await storage.search("тонкий клиент", top_k=5)
+    # "b" is at distance sqrt(2): confidence 0.41 -> score below min_score
+    assert [r.chunk_id for r in results] == ["a"]
+    assert results[0].distance == pytest.approx(0.0)
+    assert results[0].score == pytest.approx(1.0)
+
+    batch = await storage.search_many(
+        [SearchQuery("ошибка", top_k=1), SearchQuery("тонкий клиент", version="5.1")]
+    )
+    assert [[r.chunk_id for r in rs] for rs in batch] == [["b"], ["old"]]
+
+    db.rows = [r for r in db.rows if r[3] != "5.1"] + [db_row(unit(2), "c", "новый")]
+    await storage.reload({"5.1"})
+    assert storage.versions == {"6.1 (latest)": 2}  # 6.1 untouched until its generation changes
+    await storage.reload({"6.1 (latest)"})
+    assert storage.versions == {"6.1 (latest)": 3}
+    assert await storage.search("тонкий клиент", version="5.1") == []
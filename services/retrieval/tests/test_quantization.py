@@ -0,0 +1,54 @@
+"""Tests for the quantization model used by retrieval.quantization_report."""
+from shared.pca import PcaProjection
+
+from retrieval.eval.quantization import (
+    bytes_per_vector,
+    extra_bytes_per_vector,
+    quantization_searches,
+)
+from retrieval.eval.recall import recall_report, sample_queries
+
+from tests.fakes import clustered
+
+
+def test_rescoring_recovers_binary_recall_and_sizes_shrink() -> None:
+    base = clustered(n=400)
+    queries = sample_queries(base, 40)
+    report = {
+        r["name"]: r["recall"]
+        for r in recall_report(base, queries, quantization_searches(base, rescore_factors=(1, 10)), k=5)
+    }
+    assert report["halfvec"] >= 0.95
+    assert report["binary+rescore x10"] >= report["binary"]
+    assert report["binary+rescore x10"] >= 0.9
+    assert bytes_per_vector("binary", 384) < bytes_per_vector("halfvec", 384) < bytes_per_vector("none", 384)
+    assert bytes_per_vector("none", 384) == 8 + 384 * 4
+    # float4 embedding stays: compact columns (half + bin) and the scanned index only add storage
+    assert extra_bytes_per_vector("none", 384) == 0
+    assert extra_bytes_per_vector("halfvec", 384) == (8 + 768) + (8 + 48) + (8 + 768)
+    assert extra_bytes_per_vector("binary", 384) == (8 + 768) + (8 + 48) + (8 + 48)
+
+
+def test_pca_recall_grows_with_dims() -> None:
+    base = clustered(n=300)
+    queries = sample_queries(base, 30)
+    searches = quantization_searches(base, rescore_factors=(1,), pca_dims=(2, 7, 100))
+    assert "pca100" not in searches  # not below the input dimension
+    report = {r["name"]: r["recall"] for r in recall_report(base, queries, searches, k=5)}
+    assert report["pca2"] <= report["pca7"]
+    assert bytes_per_vector("pca128", 384) == 8 + 128 * 4
+    assert extra_bytes_per_vector("pca128", 384) == 2 * (8 + 128 * 4)
+
+
+def test_pca_fitted_once_per_dimension(monkeypatch) -> None:
+    fitted: list[int] = []
+    fit = PcaProjection.fit
+
+    def counting_fit(matrix, dim_out):
+        fitted.append(dim_out)
+        return fit(matrix, dim_out)
+
+    monkeypatch.setattr(PcaProjection, "fit", counting_fit)
+    searches = quantization_searches(clustered(n=100), rescore_factors=(1, 4, 10), pca_dims=(2, 4))
+    assert {"pca2", "pca2+rescore x10", "pca4+rescore x4"} <= set(searches)
+    assert sorted(fitted) == [2, 4]
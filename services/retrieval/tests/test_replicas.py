@@ -0,0 +1,108 @@
+"""Tests for read-replica routing of searches."""
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy.exc import OperationalError
+
+from retrieval.storage.base import SearchQuery, SearchResult, Storage
+from retrieval.storage.replicas import Replica, ReplicaRouter
+
+
+class StubGenerations:
+    def __init__(self, versions: dict[str, int] | None = None, fail: bool = False) -> None:
+        self.versions = dict(versions or {})
+        self.fail = fail
+
+    async def refresh(self) -> set[str]:
+        if self.fail:
+            raise OSError("connection refused")
+        return set()
+
+
+class NamedStorage(Storage):
+    def __init__(self, name: str, fail: bool = False) -> None:
+        self.name = name
+        self.fail = fail
+        self.error: Exception = OperationalError("SELECT", {}, OSError("server closed"))
+        self.calls = 0
+
+    async def search(self, query, top_k=5, version=None, options=None):
+        self.calls += 1
+        if self.fail:
+            raise self.error
+        return [SearchResult(chunk_id=self.name, text=query, source="faq.md", score=1.0)]
+
+
+def _router(replica_versions: list[dict[str, int]], policy: str = "round_robin", fail=()):
+    primary = NamedStorage("primary")
+    replicas = [
+        Replica(
+            name=f"replica{i}",
+            storage=NamedStorage(f"replica{i}", fail=i in fail),
+            generations=StubGenerations(versions),
+        )
+        for i, versions in enumerate(replica_versions)
+    ]
+    router = ReplicaRouter(
+        primary,
+        replicas,
+        kb_generation=StubGenerations({"6.1": 3, "5.1": 2}),
+        kb_latest_version="6.1",
+        policy=policy,
+        poll_seconds=0,
+    )
+    return router, primary, replicas
+
+
+@pytest.mark.asyncio
+async def test_round_robin_across_synced_replicas() -> None:
+    router, primary, replicas = _router([{"6.1": 3, "5.1": 2}, {"6.1": 3, "5.1": 2}])
+    assert (await router.search("x"))[0].chunk_id == "primary"  # not polled yet
+    await router.start()
+    served = [(await router.search("x"))[0].chunk_id for _ in range(4)]
+    assert sorted(served) == ["replica0", "replica0", "replica1", "replica1"]
+    assert primary.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_lagging_replica_skipped_per_version() -> None:
+    router, primary, _ = _router([{"6.1": 3, "5.1": 1}])
+    await router.start()
+    assert (await router.search("x"))[0].chunk_id == "replica0"
+    assert (await router.search("x", version="5.1"))[0].chunk_id == "primary"
+    batch = await router.search_many([SearchQuery("a", version="6.1"), SearchQuery("b", version="5.1")])
+    assert [r[0].chunk_id for r in batch] == ["primary", "primary"]
+
+
+@pytest.mark.asyncio
+async def test_error_falls_back_to_primary_and_cools_down() -> None:
+    router, primary, replicas = _router([{"6.1": 3, "5.1": 2}], fail={0})
+    await router.start()
+    assert (await router.search("x"))[0].chunk_id == "primary"
+    assert (await router.search("x"))[0].chunk_id == "primary"
+    assert replicas[0].storage.calls == 1  # skipped during retry_seconds
+    assert replicas[0].in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_any_replica_error_falls_back_but_primary_errors_propagate() -> None:
+    router, primary, replicas = _router([{"6.1": 3, "5.1": 2}], fail={0})
+    replicas[0].storage.error = RuntimeError("unexpected")
+    await router.start()
+    labels = {"reason": "error"}
+    errors = REGISTRY.get_sample_value("retrieval_replica_fallbacks_total", labels) or 0.0
+    assert (await router.search("x"))[0].chunk_id == "primary"
+    assert REGISTRY.get_sample_value("retrieval_replica_fallbacks_total", labels) == errors + 1
+    assert replicas[0].down_until > 0
+
+    primary.fail = True  # replica in cooldown: the primary's own error reaches the caller
+    with pytest.raises(OperationalError):
+        await router.search("x")
+
+
+@pytest.mark.asyncio
+async def test_unreachable_replica_not_used_and_least_connections() -> None:
+    router, _, replicas = _router([{"6.1": 3, "5.1": 2}] * 3, policy="least_connections")
+    replicas[0].generations.fail = True
+    await router.start()
+    replicas[1].in_flight = 2
+    assert {(await router.search("x"))[0].chunk_id for _ in range(3)} == {"replica2"}
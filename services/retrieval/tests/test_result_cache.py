@@ -0,0 +1,56 @@
+"""Tests for search result cache and SearchService caching."""
+import pytest
+
+from retrieval.cache import SearchResultCache
+from retrieval.service import SearchService
+
+from tests.fakes import CountingStorage, StubGeneration, make_result
+
+
+def test_cache_miss_on_new_generation() -> None:
+    cache = SearchResultCache(max_entries=10)
+    key = cache.make_key("q", "6.1 (latest)", 5, "vector")
+    cache.put(key, 1, [make_result()])
+    assert cache.get(key, 1) is not None
+    assert cache.get(key, 2) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_invalidate_versions_only_drops_matching() -> None:
+    cache = SearchResultCache(max_entries=10)
+    k1 = cache.make_key("q", "6.1 (latest)", 5, "vector")
+    k2 = cache.make_key("q", "5.1", 5, "vector")
+    cache.put(k1, 1, [make_result()])
+    cache.put(k2, 1, [make_result()])
+    assert cache.invalidate_versions({"5.1"}) == 1
+    assert cache.get(k1, 1) is not None
+    assert cache.get(k2, 1) is None
+
+
+def test_empty_results_not_cached_and_bytes_tracked() -> None:
+    cache = SearchResultCache(max_entries=10)
+    cache.put(cache.make_key("a", None, 5, "vector"), 0, [])
+    assert cache.stats()["size"] == 0
+    cache.put(cache.make_key("b", None, 5, "vector"), 0, [make_result()])
+    assert cache.stats()["bytes"] > 0
+    cache.clear()
+    assert cache.stats()["bytes"] == 0
+
+
+@pytest.mark.asyncio
+async def test_service_serves_repeated_query_from_cache() -> None:
+    storage = CountingStorage([make_result("1"), make_result("2")])
+    generation = StubGeneration()
+    service = SearchService(
+        storage,
+        result_cache=SearchResultCache(max_entries=10),
+        kb_generation=generation,  # type: ignore[arg-type]
+        default_version="6.1 (latest)",
+    )
+    first = await service.search("Черный экран", top_k=2)
+    second = await service.search("черный  экран", top_k=2)
+    assert storage.calls == 1
+    assert [r.chunk_id for r in second] == [r.chunk_id for r in first]
+    generation.versions["6.1 (latest)"] = 2
+    await service.search("черный экран", top_k=2)
+    assert storage.calls == 2
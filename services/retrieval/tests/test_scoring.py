@@ -0,0 +1,40 @@
+"""Tests for result scoring on precomputed lexical terms."""
+import pytest
+
+from shared.tokenize import term_frequencies
+
+from retrieval.storage.scoring import build_result, keyword_score, min_score_params, query_terms, rank_key
+
+
+def test_keyword_score_uses_precomputed_terms_and_falls_back_to_text() -> None:
+    text = "Ошибки подключения к серверу VDI"
+    q = query_terms("ошибка подключения")
+    precomputed = frozenset(term_frequencies(text)[0])
+    assert keyword_score(q, precomputed) == 1.0
+    assert keyword_score(q, None, text) == 1.0  # NULL lexical_terms (not re-ingested yet)
+    assert keyword_score(q, frozenset()) == 0.0
+    assert keyword_score(query_terms("!!"), precomputed) == 0.0
+
+
+def test_build_result_combines_distance_and_keywords() -> None:
+    row = ("id", "тонкий клиент", "faq.md", "6.1 (latest)", None, "faq.md", 0)
+    q = query_terms("тонкий клиент")
+    hit = build_result(q, row, 0.0, frozenset({"тонк", "клиент"}))
+    miss = build_result(q, row, 0.0, frozenset())
+    assert hit.score == 1.0 and miss.score == 0.8
+    assert sorted([miss, hit], key=rank_key)[0] is hit
+
+
+def test_min_score_params_reproduce_the_score_in_sql() -> None:
+    q = query_terms("тонкий клиент сеть")
+    row = ("id", "тонкий клиент", "faq.md", "6.1 (latest)", None, "faq.md", 0)
+    params = min_score_params(0.35, q)
+    assert params["q_terms"] == sorted(q) and params["kw_max"] == 0.2
+    for matched in (0, 1, len(q)):
+        chunk_terms = frozenset(sorted(q)[:matched])
+        for distance in (0.3, 1.2, 2.0):
+            # the SQL predicate: VECTOR_WEIGHT / (1 + distance) + kw_per_term * matched terms
+            sql_score = 0.8 / (1.0 + distance) + params["kw_per_term"] * matched
+            assert sql_score == pytest.approx(build_result(q, row, distance, chunk_terms).score)
+    assert min_score_params(0.35, frozenset())["kw_per_term"] == 0.0
+    assert min_score_params(0.0, q) == {}
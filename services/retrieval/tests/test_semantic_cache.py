@@ -0,0 +1,83 @@
+"""Tests for the semantic (near-duplicate query) result cache."""
+import pytest
+
+from retrieval.cache import SemanticResultCache
+from retrieval.service import SearchService
+from retrieval.storage.base import SearchQuery
+
+from tests.fakes import CountingStorage, StubGeneration, make_result
+
+SCOPE = SemanticResultCache.make_scope("6.1 (latest)", 5, "vector")
+
+
+class TableEncoder:
+    """Fixed 3-d vectors: paraphrases of one question point (almost) the same way."""
+
+    VECTORS = {
+        "черный экран": [1.0, 0.0, 0.0],
+        "чёрный экран после входа": [0.99, 0.1, 0.0],
+        "нет звука": [0.0, 1.0, 0.0],
+    }
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def encode(self, queries: list[str]) -> list[list[float]]:
+        self.calls += 1
+        return [self.VECTORS[q] for q in queries]
+
+    async def encode_one(self, query: str) -> list[float]:
+        return (await self.encode([query]))[0]
+
+
+def test_hit_above_threshold_only_in_same_scope() -> None:
+    cache = SemanticResultCache(max_entries=10, threshold=0.95)
+    cache.put(SCOPE, [1.0, 0.0, 0.0], 1, [make_result()])
+    assert cache.get(SCOPE, [2.0, 0.1, 0.0], 1) is not None  # cosine ~0.999, length ignored
+    assert cache.get(SCOPE, [0.7, 0.7, 0.0], 1) is None
+    assert cache.get(SemanticResultCache.make_scope("5.1", 5, "vector"), [1.0, 0.0, 0.0], 1) is None
+    assert cache.get(SemanticResultCache.make_scope("6.1 (latest)", 3, "vector"), [1.0, 0.0, 0.0], 1) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 3
+
+
+def test_lru_eviction_generation_and_invalidation() -> None:
+    cache = SemanticResultCache(max_entries=2, threshold=0.95)
+    cache.put(SCOPE, [1.0, 0.0, 0.0], 1, [make_result("a")])
+    cache.put(SCOPE, [0.0, 1.0, 0.0], 1, [make_result("b")])
+    assert cache.get(SCOPE, [1.0, 0.0, 0.0], 1) is not None  # "a" is now most recent
+    cache.put(SCOPE, [0.0, 0.0, 1.0], 1, [make_result("c")])
+    assert cache.get(SCOPE, [0.0, 1.0, 0.0], 1) is None  # "b" evicted
+    assert cache.get(SCOPE, [1.0, 0.0, 0.0], 2) is None  # newer KB generation
+    assert cache.stats()["size"] == 1
+    assert cache.invalidate_versions({"6.1 (latest)"}) == 1
+    assert cache.stats()["size"] == 0 and cache.stats()["scopes"] == 0
+
+
+@pytest.mark.asyncio
+async def test_service_reuses_results_of_paraphrase_without_storage() -> None:
+    storage = CountingStorage([make_result()])
+    encoder = TableEncoder()
+    service = SearchService(
+        storage,
+        kb_generation=StubGeneration(),
+        default_version="6.1 (latest)",
+        semantic_cache=SemanticResultCache(max_entries=10, threshold=0.95),
+        query_encoder=encoder,
+    )
+    await service.search("черный экран")
+    assert [r.chunk_id for r in await service.search("чёрный экран после входа")] == ["1"]
+    assert storage.calls == 1
+    await service.search("нет звука")
+    assert storage.calls == 2
+
+    batches = await service.search_many([SearchQuery("черный экран"), SearchQuery("нет звука")])
+    assert [len(b) for b in batches] == [1, 1] and storage.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_service_without_encoder_skips_semantic_cache() -> None:
+    storage = CountingStorage([make_result()])
+    service = SearchService(storage, semantic_cache=SemanticResultCache(max_entries=10))
+    await service.search("черный экран")
+    await service.search("черный экран")
+    assert storage.calls == 2
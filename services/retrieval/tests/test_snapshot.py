@@ -0,0 +1,52 @@
+"""Tests for memory-mapped embedding snapshots."""
+import numpy as np
+import pytest
+
+from retrieval.storage.numpy_storage import NumpyStorage
+from retrieval.storage.snapshot import SnapshotStore
+from retrieval.storage.vector_index import VersionIndex
+
+from tests.fakes import DIM, FakeDb, StaticEncoder, StubGeneration, chunk_row, db_row, unit
+
+
+def test_snapshot_roundtrip_is_memory_mapped_and_generation_checked(tmp_path) -> None:
+    store = SnapshotStore(tmp_path, model_name="m", dim=DIM)
+    index = VersionIndex.build("6.1 (latest)", [chunk_row("a", "текст"), chunk_row("b", "ещё")], [unit(0), unit(1)], DIM)
+    store.write(index, generation=3)
+
+    opened = store.open("6.1 (latest)", 3)
+    assert isinstance(opened.matrix, np.memmap)
+    assert np.array_equal(opened.matrix, index.matrix)
+    assert opened.rows[0] == ("a", "текст", "faq.md", "6.1 (latest)", None, "faq.md", 0)
+    assert store.open("6.1 (latest)", 4) is None
+    assert SnapshotStore(tmp_path, model_name="other", dim=DIM).open("6.1 (latest)", 3) is None
+
+    store.write(index, generation=4)
+    assert store.open("6.1 (latest)", 3) is None  # older generation pruned
+
+
+@pytest.mark.asyncio
+async def test_storage_builds_snapshot_once_then_reads_it(tmp_path) -> None:
+    db = FakeDb([db_row(unit(0), "a", "тонкий клиент")])
+    generations = StubGeneration({"6.1 (latest)": 1})
+    encoder = StaticEncoder({"тонкий клиент": unit(0)})
+
+    def make_storage() -> NumpyStorage:
+        return NumpyStorage(
+            db,
+            query_encoder=encoder,
+            dim=DIM,
+            snapshot=SnapshotStore(tmp_path, dim=DIM),
+            kb_generation=generations,
+        )
+
+    await make_storage().reload({"6.1 (latest)"})
+    assert db.queries == 1
+    second = make_storage()
+    await second.reload({"6.1 (latest)"})
+    assert db.queries == 1  # second worker mapped the snapshot, no DB read
+    assert [r.chunk_id for r in await second.search("тонкий клиент")] == ["a"]
+
+    generations.versions["6.1 (latest)"] = 2
+    await second.reload({"6.1 (latest)"})
+    assert db.queries == 2
@@ -0,0 +1,54 @@
+"""Tests for trigram text search (RETRIEVAL_MODE=text)."""
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from retrieval.storage.pgvector_storage import PgVectorStorage
+
+from tests.fakes import FakeResult, FakeSessionFactory
+
+
+class ScriptedSession:
+    """Returns phrase rows for the ILIKE query and word rows for the <% query."""
+
+    def __init__(self, phrase_rows: list[tuple], word_rows: list[tuple]) -> None:
+        self._phrase_rows = phrase_rows
+        self._word_rows = word_rows
+        self.sql: list[str] = []
+        self.params: list[dict] = []
+
+    async def execute(self, stmt, params=None) -> FakeResult:
+        sql = str(stmt.compile(dialect=postgresql.dialect())) if hasattr(stmt, "compile") else str(stmt)
+        self.sql.append(sql)
+        self.params.append(params or {})
+        if "ILIKE" in sql:
+            return FakeResult(self._phrase_rows)
+        if "<%" in sql:
+            return FakeResult(self._word_rows)
+        return FakeResult([])
+
+    async def rollback(self) -> None:
+        pass
+
+
+def _row(chunk_id: str, *extra) -> tuple:
+    return (chunk_id, "текст", "faq.md", "6.1 (latest)", None, "faq.md", 0, *extra)
+
+
+@pytest.mark.asyncio
+async def test_phrase_hits_are_ranked_by_similarity_and_pattern_is_escaped() -> None:
+    session = ScriptedSession([_row("p1"), _row("p2")], [])
+    storage = PgVectorStorage(FakeSessionFactory(session), retrieval_mode="text")
+    results = await storage.search("100%_cpu", top_k=2)
+    assert [r.chunk_id for r in results] == ["p1", "p2"]
+    assert "ORDER BY similarity(retrieval.chunks.text" in session.sql[0]
+    assert session.params[0]["pattern"] == "%100\\%\\_cpu%"
+
+
+@pytest.mark.asyncio
+async def test_word_fallback_uses_trigram_operator_and_similarity_score() -> None:
+    session = ScriptedSession([], [_row("w1", 0.42)])
+    storage = PgVectorStorage(FakeSessionFactory(session), retrieval_mode="text")
+    results = await storage.search("ошибка подключения", top_k=3)
+    assert "SET LOCAL pg_trgm.word_similarity_threshold = 0.300" in session.sql
+    assert any("<%" in sql and "word_similarity" in sql for sql in session.sql)
+    assert [(r.chunk_id, r.score) for r in results] == [("w1", 0.42)]
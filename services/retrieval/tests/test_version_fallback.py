@@ -0,0 +1,96 @@
+"""Tests for the version fallback chain: searched for thin versions, merged with a score penalty."""
+import pytest
+
+from retrieval.cache import SearchResultCache
+from retrieval.service import SearchService
+from retrieval.storage.base import SearchQuery, SearchResult, Storage
+
+FALLBACK = {"5.1.1": ["5.1", "6.1 (latest)"], "*": ["6.1 (latest)"]}
+
+
+class VersionStorage(Storage):
+    """Fixed results per version; records the versions asked for."""
+
+    def __init__(self, by_version: dict[str, list[tuple[str, float]]]) -> None:
+        self.by_version = by_version
+        self.calls: list[str | None] = []
+
+    def _results(self, version: str | None) -> list[SearchResult]:
+        v = version or "6.1 (latest)"
+        return [
+            SearchResult(chunk_id=f"{v}:{text}", text=text, source="faq.md", score=score, version=v)
+            for text, score in self.by_version.get(v, [])
+        ]
+
+    async def search(self, query, top_k=5, version=None, options=None) -> list[SearchResult]:
+        self.calls.append(version)
+        return self._results(version)[:top_k]
+
+    async def search_many(self, queries: list[SearchQuery]) -> list[list[SearchResult]]:
+        self.calls.extend(q.version for q in queries)
+        return [self._results(q.version)[: q.top_k] for q in queries]
+
+
+STORAGE = {
+    "5.1.1": [("a", 0.5)],
+    "5.1": [("a", 0.9), ("b", 0.8)],
+    "6.1 (latest)": [("c", 0.7)],
+}
+
+
+@pytest.mark.asyncio
+async def test_chain_is_searched_and_labelled_by_version() -> None:
+    storage = VersionStorage(STORAGE)
+    service = SearchService(storage, version_fallback=FALLBACK, version_fallback_penalty=0.1)
+    results = await service.search("q", top_k=3, version="5.1.1")
+    assert storage.calls == ["5.1.1", "5.1", "6.1 (latest)"]
+    # "a" is kept from 5.1.1 (most specific); 5.1 costs 0.1, latest 0.2
+    assert [(r.text, r.version, round(r.score, 2)) for r in results] == [
+        ("b", "5.1", 0.7),
+        ("a", "5.1.1", 0.5),
+        ("c", "6.1 (latest)", 0.5),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_default_chain_and_no_fallback_for_latest() -> None:
+    storage = VersionStorage(STORAGE)
+    service = SearchService(
+        storage, default_version="6.1 (latest)", version_fallback=FALLBACK, version_fallback_penalty=0.1
+    )
+    assert [r.text for r in await service.search("q", version="5.1")] == ["a", "b", "c"]
+    assert storage.calls == ["5.1", "6.1 (latest)"]
+    storage.calls.clear()
+    await service.search("q")  # default version is the fallback target itself
+    assert storage.calls == [None]
+
+
+@pytest.mark.asyncio
+async def test_batch_sends_fallbacks_in_one_storage_call_and_caches_per_version() -> None:
+    storage = VersionStorage(STORAGE)
+    service = SearchService(
+        storage,
+        result_cache=SearchResultCache(max_entries=10),
+        version_fallback=FALLBACK,
+        version_fallback_penalty=0.1,
+    )
+    batches = await service.search_many([SearchQuery("q", version="5.1.1"), SearchQuery("q", version="6.1 (latest)")])
+    # Own versions first, then one batch of fallbacks; latest of query 1 is query 2's cache key
+    assert storage.calls == ["5.1.1", "6.1 (latest)", "5.1"]
+    assert [r.text for r in batches[0]] == ["b", "a", "c"]
+    assert [r.text for r in batches[1]] == ["c"] and batches[1][0].score == 0.7
+
+
+@pytest.mark.asyncio
+async def test_fallbacks_are_not_searched_when_the_version_fills_top_k() -> None:
+    storage = VersionStorage(STORAGE)
+    service = SearchService(storage, version_fallback=FALLBACK, version_fallback_penalty=0.1)
+    results = await service.search("q", top_k=2, version="5.1")
+    assert storage.calls == ["5.1"]
+    assert [(r.text, r.score) for r in results] == [("a", 0.9), ("b", 0.8)]  # no penalty, no merge
+
+    storage.calls.clear()
+    queries = [SearchQuery("q", top_k=2, version="5.1"), SearchQuery("q", version="5.1.1")]
+    batches = await service.search_many(queries)
+    assert storage.calls == ["5.1", "5.1.1", "5.1", "6.1 (latest)"]  # only query 2 is thin
+    assert [[r.text for r in b] for b in batches] == [["a", "b"], ["b", "a", "c"]]
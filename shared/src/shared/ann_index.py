@@ -0,0 +1,57 @@
+"""DDL for per-KB-version partial HNSW indexes on retrieval.chunks (used by migrations and ingest).
+
+A partial index `WHERE version = '<v>'` holds only that version's chunks, so an ANN scan
+filtered by version returns neighbours of that version instead of filtering them afterwards.
+With quantization the index is built on the compact column (migration 011): halfvec
+(embedding_half) or binary (embedding_bin, Hamming distance); "pca" indexes the
+PCA-reduced embedding_pca (migration 012).
+"""
+import hashlib
+
+OPCLASSES = {"l2": "vector_l2_ops", "cosine": "vector_cosine_ops"}
+HALFVEC_OPCLASSES = {"l2": "halfvec_l2_ops", "cosine": "halfvec_cosine_ops"}
+QUANTIZATIONS = ("none", "halfvec", "binary", "pca")
+VERSION_INDEX_PREFIX = "ix_retrieval_chunks_embedding_hnsw_v_"
+_NAME_TAGS = {"none": "", "halfvec": "h_", "binary": "b_", "pca": "p_"}
+
+
+def _check_quantization(quantization: str) -> str:
+    quantization = (quantization or "none").lower()
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"quantization must be one of {list(QUANTIZATIONS)}, got {quantization!r}")
+    return quantization
+
+
+def version_index_name(version: str, quantization: str = "none") -> str:
+    """Stable index name for a KB version (identifier-safe, within the 63-byte limit)."""
+    tag = _NAME_TAGS[_check_quantization(quantization)]
+    return VERSION_INDEX_PREFIX + tag + hashlib.sha1(version.encode()).hexdigest()[:12]
+
+
+def version_index_ddl(
+    version: str,
+    distance: str = "l2",
+    m: int = 16,
+    ef_construction: int = 64,
+    quantization: str = "none",
+) -> str:
+    """CREATE INDEX IF NOT EXISTS for the version's partial HNSW index; opclass must match the search distance."""
+    distance = (distance or "l2").lower()
+    if distance not in OPCLASSES:
+        raise ValueError(f"distance must be one of {sorted(OPCLASSES)}, got {distance!r}")
+    quantization = _check_quantization(quantization)
+    if quantization == "halfvec":
+        target = f"embedding_half {HALFVEC_OPCLASSES[distance]}"
+    elif quantization == "binary":
+        target = "embedding_bin bit_hamming_ops"
+    elif quantization == "pca":
+        target = f"embedding_pca {OPCLASSES[distance]}"
+    else:
+        target = f"embedding {OPCLASSES[distance]}"
+    literal = version.replace("'", "''")
+    return (
+        f"CREATE INDEX IF NOT EXISTS {version_index_name(version, quantization)} ON retrieval.chunks "
+        f"USING hnsw ({target}) "
+        f"WITH (m = {int(m)}, ef_construction = {int(ef_construction)}) "
+        f"WHERE version = '{literal}'"
+    )
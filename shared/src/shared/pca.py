@@ -0,0 +1,55 @@
+"""PCA projection of embeddings: fitted by ingest per KB version, applied to query vectors by retrieval."""
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class PcaProjection:
+    """x -> (x - mean) @ components.T; components are the top principal axes, (dim_out, dim_in)."""
+
+    mean: np.ndarray
+    components: np.ndarray
+    explained_variance: float = 1.0
+
+    @property
+    def dim_in(self) -> int:
+        return self.components.shape[1]
+
+    @property
+    def dim_out(self) -> int:
+        return self.components.shape[0]
+
+    @classmethod
+    def fit(cls, vectors: Any, dim_out: int) -> "PcaProjection":
+        """Eigen-decomposition of the (dim_in, dim_in) covariance; memory does not grow with n beyond the input."""
+        x = np.asarray(vectors, dtype=np.float64)
+        if x.ndim != 2 or not len(x):
+            raise ValueError("PCA needs a non-empty (n, dim) matrix")
+        if not 0 < dim_out <= x.shape[1]:
+            raise ValueError(f"dim_out must be in 1..{x.shape[1]}, got {dim_out}")
+        mean = x.mean(axis=0)
+        centered = x - mean
+        eigvals, eigvecs = np.linalg.eigh(centered.T @ centered)
+        order = np.argsort(eigvals)[::-1][:dim_out]
+        total = float(eigvals.clip(min=0).sum()) or 1.0
+        return cls(
+            mean=mean.astype(np.float32),
+            components=np.ascontiguousarray(eigvecs[:, order].T, dtype=np.float32),
+            explained_variance=float(eigvals[order].clip(min=0).sum()) / total,
+        )
+
+    @classmethod
+    def from_flat(cls, mean: Any, components: Any, dim_out: int, explained_variance: float = 1.0) -> "PcaProjection":
+        """Rebuild from the flat arrays stored in retrieval.pca_projections."""
+        mean_arr = np.asarray(mean, dtype=np.float32)
+        return cls(
+            mean=mean_arr,
+            components=np.asarray(components, dtype=np.float32).reshape(dim_out, len(mean_arr)),
+            explained_variance=explained_variance,
+        )
+
+    def transform(self, vectors: Any) -> np.ndarray:
+        """(n, dim_in) -> (n, dim_out) float32."""
+        return (np.asarray(vectors, dtype=np.float32) - self.mean) @ self.components.T
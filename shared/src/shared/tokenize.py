@@ -0,0 +1,49 @@
+"""Lexical tokenizer shared by ingest (precomputed chunk terms) and retrieval (query terms)."""
+import re
+from collections import Counter
+
+_WORD = re.compile(r"\w+")
+MIN_TERM_LENGTH = 2
+_MIN_STEM_LENGTH = 4
+
+# Common Russian inflectional endings, longest first; stripped only when a stem of
+# _MIN_STEM_LENGTH+ characters remains, so "ошибка"/"ошибки"/"ошибкой" share a term.
+_RU_ENDINGS = tuple(
+    sorted(
+        (
+            "иями", "ями", "ами", "ией", "ого", "его", "ому", "ему", "ыми", "ими", "ых", "их",
+            "ой", "ей", "ий", "ый", "ая", "яя", "ое", "ее", "ую", "юю", "ом", "ем", "ам", "ям",
+            "ах", "ях", "ов", "ев", "ия", "ие", "ию", "ть", "ться", "ет", "ют", "ит", "ят",
+            "а", "я", "о", "е", "ы", "и", "у", "ю", "ь",
+        ),
+        key=len,
+        reverse=True,
+    )
+)
+
+
+def stem(word: str) -> str:
+    """Light suffix stripping for Cyrillic words; other words are returned unchanged."""
+    if not ("а" <= word[0] <= "я" or word[0] == "ё"):
+        return word
+    for ending in _RU_ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= _MIN_STEM_LENGTH:
+            return word[: -len(ending)]
+    return word
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased, stemmed word terms (length >= 2) in text order."""
+    return [
+        stem(w.replace("ё", "е"))
+        for w in _WORD.findall((text or "").lower())
+        if len(w) >= MIN_TERM_LENGTH
+    ]
+
+
+def term_frequencies(text: str) -> tuple[list[str], list[int], int]:
+    """(distinct terms sorted, their counts, total term count): the chunks.lexical_* columns."""
+    tokens = tokenize(text)
+    counts = Counter(tokens)
+    terms = sorted(counts)
+    return terms, [counts[t] for t in terms], len(tokens)
@@ -0,0 +1,28 @@
+"""Tests for per-version partial HNSW index DDL."""
+import pytest
+
+from shared.ann_index import version_index_ddl, version_index_name
+
+
+def test_ddl_is_partial_on_quoted_version_and_name_is_stable() -> None:
+    ddl = version_index_ddl("6.1 (it's latest)", distance="cosine", m=8, ef_construction=32)
+    assert "vector_cosine_ops" in ddl
+    assert "WITH (m = 8, ef_construction = 32)" in ddl
+    assert ddl.endswith("WHERE version = '6.1 (it''s latest)'")
+    assert version_index_name("6.1") == version_index_name("6.1") != version_index_name("6.2")
+    assert len(version_index_name("x" * 500)) <= 63
+
+
+def test_unknown_distance_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        version_index_ddl("6.1", distance="ip")
+
+
+def test_quantized_indexes_use_compact_columns_and_distinct_names() -> None:
+    assert "embedding_half halfvec_l2_ops" in version_index_ddl("6.1", quantization="halfvec")
+    assert "embedding_bin bit_hamming_ops" in version_index_ddl("6.1", distance="cosine", quantization="binary")
+    assert "embedding_pca vector_l2_ops" in version_index_ddl("6.1", quantization="pca")
+    names = {version_index_name("6.1", q) for q in ("none", "halfvec", "binary", "pca")}
+    assert len(names) == 4
+    with pytest.raises(ValueError):
+        version_index_ddl("6.1", quantization="pq")
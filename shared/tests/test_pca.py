@@ -0,0 +1,24 @@
+"""Tests for the PCA projection shared by ingest and retrieval."""
+import numpy as np
+import pytest
+
+from shared.pca import PcaProjection
+
+
+def test_fit_captures_low_rank_structure_and_roundtrips() -> None:
+    rng = np.random.default_rng(0)
+    basis = rng.normal(size=(4, 32))
+    x = rng.normal(size=(500, 4)) @ basis + 0.01 * rng.normal(size=(500, 32))
+    pca = PcaProjection.fit(x, 4)
+    assert (pca.dim_in, pca.dim_out) == (32, 4)
+    assert pca.explained_variance > 0.99
+    # Distances in the reduced space match the original ones when the variance is kept
+    y = pca.transform(x[:10])
+    assert np.allclose(np.linalg.norm(y[0] - y[1]), np.linalg.norm(x[0] - x[1]), rtol=1e-2)
+    restored = PcaProjection.from_flat(pca.mean.tolist(), pca.components.ravel().tolist(), 4)
+    assert np.allclose(restored.transform(x[:3]), pca.transform(x[:3]))
+
+
+def test_fit_rejects_bad_dims() -> None:
+    with pytest.raises(ValueError):
+        PcaProjection.fit(np.ones((3, 4)), 5)
@@ -0,0 +1,16 @@
+"""Tests for the shared lexical tokenizer."""
+from shared.tokenize import stem, term_frequencies, tokenize
+
+
+def test_inflections_share_a_term_and_short_words_are_kept() -> None:
+    assert stem("ошибка") == stem("ошибки") == stem("ошибкой")
+    assert stem("клиента") == stem("клиент")
+    assert stem("vdi") == "vdi"
+    assert tokenize("Ошибка 0x204, ёлка и VDI") == ["ошибк", "0x204", "елка", "vdi"]
+
+
+def test_term_frequencies_are_sorted_and_counted() -> None:
+    terms, tf, length = term_frequencies("ошибка ошибки клиент")
+    assert terms == sorted(terms)
+    assert dict(zip(terms, tf)) == {"ошибк": 2, "клиент": 1}
+    assert length == 3